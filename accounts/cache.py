@@ -0,0 +1,76 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+
+# --------------------------------------------------------------------
+# 🔹 Settings
+# --------------------------------------------------------------------
+DEFAULTS = {
+    "ENABLED": False,  # entries must be dropped in every worker: needs a shared cache
+    "TTL": 300,   # upper bound for changes made without a save signal
+}
+
+
+def me_cache_setting(name):
+    return getattr(settings, "ME_CACHE", {}).get(name, DEFAULTS[name])
+
+
+# --------------------------------------------------------------------
+# 🔹 /auth/me/ responses, one cache entry per user
+#
+# The entry maps each variant (include=..., host of the absolute URLs)
+# to its payload, so a single delete on any user or profile save drops
+# all of them.
+#
+# Every save also bumps a per-user generation. A request reads it before
+# the rows and only stores its payload under that same generation, so a
+# payload built from rows read before a save is never served after it.
+# --------------------------------------------------------------------
+def _key(user_id):
+    return f"me:{user_id}"
+
+
+def _generation_key(user_id):
+    return f"me:{user_id}:generation"
+
+
+def _read(user_id):
+    found = cache.get_many([_key(user_id), _generation_key(user_id)])
+    return found.get(_key(user_id)), found.get(_generation_key(user_id), 0)
+
+
+def get_me(user_id, variant):
+    """The cached payload (None on a miss) and the generation to hand to set_me."""
+    if not me_cache_setting("ENABLED"):
+        return None, None
+    entry, generation = _read(user_id)
+    if not entry or entry["generation"] != generation:
+        return None, generation
+    return entry["variants"].get(variant), generation
+
+
+def set_me(user_id, variant, data, generation):
+    if not me_cache_setting("ENABLED"):
+        return
+    entry, current = _read(user_id)
+    if current != generation:
+        return  # saved since the rows were read
+    if not entry or entry["generation"] != generation:
+        entry = {"generation": generation, "variants": {}}
+    entry["variants"][variant] = data
+    cache.set(_key(user_id), entry, me_cache_setting("TTL"))
+
+
+def _bump(user_id):
+    try:
+        cache.incr(_generation_key(user_id))
+    except ValueError:
+        cache.add(_generation_key(user_id), 1, None)
+
+
+def invalidate_me(user_id):
+    cache.delete(_key(user_id))
+    _bump(user_id)
+    # And again once committed, in case a request read the old rows meanwhile
+    transaction.on_commit(lambda: _bump(user_id))
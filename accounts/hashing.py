@@ -0,0 +1,29 @@
+"""
+Password hashing that runs in the login process pool (accounts/login.py).
+
+Kept free of model imports: pool processes are started with "spawn" and
+import this module before anything else, with only settings available.
+"""
+import os
+
+
+def setup_worker():
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings")
+
+
+def check(password, encoded):
+    """
+    `(is_correct, new_encoded)`: whether `password` matches `encoded`,
+    and — when it does but was hashed with older parameters or another
+    algorithm — the password rehashed with the current default hasher.
+    A missing `encoded` (unknown user) costs as much as a real check.
+    """
+    from django.contrib.auth.hashers import make_password, verify_password
+
+    if encoded is None:
+        make_password(password)  # as ModelBackend does, so unknown usernames do not answer faster
+        return False, None
+    is_correct, must_update = verify_password(password, encoded)
+    if is_correct and must_update:
+        return True, make_password(password)
+    return is_correct, None
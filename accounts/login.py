@@ -0,0 +1,228 @@
+import asyncio
+import hashlib
+import json
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import update_last_login
+from django.core.cache import cache
+from django.http import JsonResponse
+from django.utils.module_loading import import_string
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_POST
+from rest_framework.exceptions import APIException, ValidationError
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings
+
+from . import hashing
+
+User = get_user_model()
+
+
+# --------------------------------------------------------------------
+# 🔹 Settings
+# --------------------------------------------------------------------
+DEFAULTS = {
+    "WORKERS": min(4, os.cpu_count() or 1),   # hashing processes per server process; 0 hashes on a thread
+    "MAX_PENDING": 64,    # password checks queued or running per process before answering 503
+    "PER_ACCOUNT": 2,     # concurrent checks per username, across workers when the cache is shared
+    "LOCK_TTL": 30,       # seconds a per-account counter outlives a crashed request
+}
+
+
+def login_setting(name):
+    return getattr(settings, "LOGIN", {}).get(name, DEFAULTS[name])
+
+
+# --------------------------------------------------------------------
+# 🔹 Hashing pool
+#
+# PBKDF2 is pure CPU; run in the request it pins a worker for the whole
+# check. Here it runs in a bounded pool of separate processes, so the
+# event loop (and every other request on it) keeps moving during a
+# login storm, and the excess is refused instead of queued.
+# --------------------------------------------------------------------
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(
+                login_setting("WORKERS"),
+                mp_context=multiprocessing.get_context("spawn"),  # no forked locks or connections
+                initializer=hashing.setup_worker,
+            )
+        return _pool
+
+
+def start_pool():
+    """Spawn the hashing processes ahead of the first login (ASGI lifespan startup)."""
+    if login_setting("WORKERS"):
+        pool = get_pool()
+        for _ in range(login_setting("WORKERS")):
+            pool.submit(hashing.setup_worker)
+
+
+def shutdown_pool():
+    global _pool
+    with _pool_lock:
+        pool, _pool = _pool, None
+    if pool is not None:
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
+async def check_password(password, encoded):
+    executor = get_pool() if login_setting("WORKERS") else None
+    return await asyncio.get_running_loop().run_in_executor(executor, hashing.check, password, encoded)
+
+
+# --------------------------------------------------------------------
+# 🔹 Concurrency limits
+# --------------------------------------------------------------------
+class PendingChecks:
+    """Password checks in flight in this process."""
+
+    def __init__(self):
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def enter(self):
+        with self._lock:
+            if self.count >= login_setting("MAX_PENDING"):
+                return False
+            self.count += 1
+            return True
+
+    def leave(self):
+        with self._lock:
+            self.count -= 1
+
+
+pending = PendingChecks()
+
+
+def account_key(username):
+    return "login-inflight:" + hashlib.sha256(username.lower().encode()).hexdigest()
+
+
+async def enter_account(key):
+    await cache.aadd(key, 0, login_setting("LOCK_TTL"))
+    try:
+        count = await cache.aincr(key)
+    except ValueError:  # expired in between
+        await cache.aset(key, 1, login_setting("LOCK_TTL"))
+        count = 1
+    if count > login_setting("PER_ACCOUNT"):
+        await leave_account(key)
+        return False
+    return True
+
+
+async def leave_account(key):
+    try:
+        await cache.adecr(key)
+    except ValueError:
+        pass
+
+
+# --------------------------------------------------------------------
+# 🔹 Views (async; served natively under config/asgi.py)
+# --------------------------------------------------------------------
+def error(detail, status, code=None, retry_after=None):
+    response = JsonResponse({"detail": detail, **({"code": code} if code else {})}, status=status)
+    if retry_after:
+        response["Retry-After"] = str(retry_after)
+    return response
+
+
+def read_body(request):
+    if request.content_type == "application/json":
+        try:
+            data = json.loads(request.body or b"{}")
+        except ValueError:
+            return None
+        return data if isinstance(data, dict) else None
+    return request.POST
+
+
+def issue_tokens(user):
+    token = import_string(api_settings.TOKEN_OBTAIN_SERIALIZER).get_token(user)
+    if api_settings.UPDATE_LAST_LOGIN:
+        update_last_login(None, user)
+    return {"refresh": str(token), "access": str(token.access_token)}
+
+
+@csrf_exempt
+@require_POST
+async def login(request):
+    """
+    Username + password for a refresh/access token pair, like simplejwt's
+    TokenObtainPairView, with the password check in the hashing pool.
+    Busy process: 503; too many concurrent attempts on one account: 429.
+    A correct password stored with outdated parameters is rehashed.
+    """
+    data = read_body(request)
+    if data is None:
+        return error("JSON parse error.", 400, "parse_error")
+    username, password = data.get(User.USERNAME_FIELD), data.get("password")
+    missing = {
+        name: ["This field is required."]
+        for name, value in ((User.USERNAME_FIELD, username), ("password", password))
+        if not isinstance(value, str) or not value
+    }
+    if missing:
+        return JsonResponse(missing, status=400)
+
+    if not pending.enter():
+        return error("Too many sign-ins in progress, retry shortly.", 503, "busy", retry_after=1)
+    try:
+        key = account_key(username)
+        if not await enter_account(key):
+            return error("Too many concurrent sign-ins for this account.", 429, "throttled", retry_after=1)
+        try:
+            user = await User._default_manager.filter(**{User.USERNAME_FIELD: username}).afirst()
+            # Unknown users are checked against nothing, at the same cost
+            is_correct, upgraded = await check_password(password, user.password if user else None)
+        except BrokenProcessPool:
+            shutdown_pool()  # a hashing process died; the next login starts a fresh pool
+            return error("Sign-in is temporarily unavailable, retry shortly.", 503, "busy", retry_after=1)
+        finally:
+            await leave_account(key)
+    finally:
+        pending.leave()
+
+    if not is_correct or not api_settings.USER_AUTHENTICATION_RULE(user):
+        return error("No active account found with the given credentials", 401, "no_active_account")
+    if upgraded:
+        # Same password, new parameters: a plain update that loses to a
+        # password change made while the check ran
+        await User._default_manager.filter(pk=user.pk, password=user.password).aupdate(password=upgraded)
+    return JsonResponse(await sync_to_async(issue_tokens)(user))
+
+
+@csrf_exempt
+@require_POST
+async def refresh(request):
+    """A new access token for a refresh token, like simplejwt's TokenRefreshView."""
+    data = read_body(request)
+    if data is None:
+        return error("JSON parse error.", 400, "parse_error")
+    serializer = import_string(api_settings.TOKEN_REFRESH_SERIALIZER)(data=data)
+    try:
+        await sync_to_async(serializer.is_valid)(raise_exception=True)
+    except TokenError as exc:
+        return error(exc.args[0], 401, "token_not_valid")
+    except ValidationError as exc:
+        return JsonResponse(exc.detail, status=400)
+    except APIException as exc:
+        return error(exc.detail, exc.status_code, exc.get_codes())
+    return JsonResponse(serializer.validated_data)
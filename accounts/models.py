@@ -11,6 +11,8 @@ class Profile(models.Model):
     )
     phone = models.CharField(max_length=32, blank=True)
     avatar = models.ImageField(upload_to="avatars/", blank=True, null=True)  # ✅ stores uploaded image
+    # Resized avatars (see projects.thumbnails); reset whenever the avatar changes
+    thumbnails = models.JSONField(default=dict, blank=True)
     timezone = models.CharField(max_length=64, default="UTC", blank=True)
 
     class Meta:
@@ -19,6 +21,18 @@ class Profile(models.Model):
     def __str__(self):
         return f"Profile({self.user.username})"
 
+    @classmethod
+    def for_user(cls, user):
+        """The profile of `user`, created on first use for users that have none yet"""
+        return cls.objects.select_related("user").get_or_create(user_id=user.pk)[0]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Lets the save signals tell a new avatar from an unchanged one without a query
+        instance._loaded_avatar = instance.__dict__.get("avatar")
+        return instance
+
     @property
     def avatar_url(self):
         """Return full avatar URL or empty string"""
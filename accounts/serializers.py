@@ -3,6 +3,7 @@ from rest_framework import serializers
 from django.contrib.auth import get_user_model
 from users.serializers import UserSerializer  # reuse your main one
 from accounts.models import Profile
+from projects.thumbnails import variant_urls
 User = get_user_model()
 
 class RegisterSerializer(serializers.ModelSerializer):
@@ -20,14 +21,51 @@ class ProfileSerializer(serializers.ModelSerializer):
     user = UserSerializer(read_only=True)
     avatar = serializers.ImageField(required=False, allow_null=True)
     avatar_url = serializers.SerializerMethodField()
+    avatar_thumbnails = serializers.SerializerMethodField()
 
     class Meta:
         model = Profile
-        fields = ["user", "phone", "avatar", "avatar_url", "timezone"]
+        fields = ["user", "phone", "avatar", "avatar_url", "avatar_thumbnails", "timezone"]
+
+    def get_avatar_thumbnails(self, obj):
+        # Resized avatars; every size is the original until they are ready
+        return variant_urls(obj.avatar, obj.thumbnails, self.context.get("request"))
 
     def get_avatar_url(self, obj):
         request = self.context.get("request")
         if obj.avatar:
             url = obj.avatar.url
             return request.build_absolute_uri(url) if request else url
-        return ""
\ No newline at end of file
+        return ""
+
+    def update(self, instance, validated_data):
+        # Only what actually changed is written, and nothing when nothing did
+        changed = [name for name, value in validated_data.items() if getattr(instance, name) != value]
+        for name in changed:
+            setattr(instance, name, validated_data[name])
+        if changed:
+            if "avatar" in changed:
+                changed.append("thumbnails")  # reset by the pre_save signal
+            instance.save(update_fields=changed)
+        return instance
+
+
+class MeProfileSerializer(ProfileSerializer):
+    """The profile inside /auth/me/?include=profile (the user is the outer object)"""
+
+    class Meta(ProfileSerializer.Meta):
+        fields = [name for name in ProfileSerializer.Meta.fields if name != "user"]
+
+
+class MeSerializer(UserSerializer):
+    profile = serializers.SerializerMethodField()
+
+    class Meta(UserSerializer.Meta):
+        fields = UserSerializer.Meta.fields + ["profile"]
+
+    def get_profile(self, user):
+        try:
+            profile = user.profile
+        except Profile.DoesNotExist:
+            profile = Profile.for_user(user)
+        return MeProfileSerializer(profile, context=self.context).data
@@ -1,13 +1,41 @@
-from django.db.models.signals import post_save
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
 from django.dispatch import receiver
 from django.conf import settings
+from projects.thumbnails import delete_variants, pending_state, queue_thumbnails
+from .cache import invalidate_me
 from .models import Profile
 
 @receiver(post_save, sender=settings.AUTH_USER_MODEL)
-def create_user_profile(sender, instance, created, **kwargs):
-    if created:
+def create_user_profile(sender, instance, created, raw=False, **kwargs):
+    # Once, with the user; profiles are only saved again when they change
+    # (users older than this signal get theirs lazily, see Profile.for_user)
+    if created and not raw:
         Profile.objects.create(user=instance)
 
+
 @receiver(post_save, sender=settings.AUTH_USER_MODEL)
-def save_user_profile(sender, instance, **kwargs):
-    instance.profile.save()
\ No newline at end of file
+@receiver(post_delete, sender=settings.AUTH_USER_MODEL)
+def drop_cached_me(sender, instance, **kwargs):
+    invalidate_me(instance.pk)
+
+
+@receiver(pre_save, sender=Profile)
+def reset_avatar_thumbnails(sender, instance, raw=False, **kwargs):
+    instance._avatar_changed = not raw and (instance.avatar.name or None) != (
+        getattr(instance, "_loaded_avatar", None) or None
+    )
+    if instance._avatar_changed:
+        instance.thumbnails = pending_state() if instance.avatar else {}
+
+
+@receiver(post_save, sender=Profile)
+def queue_avatar_thumbnails(sender, instance, **kwargs):
+    invalidate_me(instance.user_id)
+    if getattr(instance, "_avatar_changed", False):
+        replaced = getattr(instance, "_loaded_avatar", None)
+        if replaced:
+            # Avatars are never shared, so the old one's variants can go
+            transaction.on_commit(lambda: delete_variants(replaced))
+        instance._loaded_avatar = instance.avatar.name
+        queue_thumbnails(instance, "avatar")
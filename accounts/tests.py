@@ -1,3 +1,206 @@
-from django.test import TestCase
+import io
+import tempfile
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.cache import cache
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from PIL import Image
+from rest_framework.test import APIClient
+
+from .cache import get_me, invalidate_me, set_me
+from .models import Profile
+from .serializers import ProfileSerializer
+
+User = get_user_model()
+
+
+def image_file(name, size):
+    buffer = io.BytesIO()
+    Image.new("RGB", size, "blue").save(buffer, "PNG")
+    return SimpleUploadedFile(name, buffer.getvalue(), content_type="image/png")
+
+
+class AvatarThumbnailTests(TestCase):
+    def setUp(self):
+        root = tempfile.TemporaryDirectory()
+        self.addCleanup(root.cleanup)
+        override = self.settings(MEDIA_ROOT=root.name)
+        override.enable()
+        self.addCleanup(override.disable)
+
+        self.user = User.objects.create_user(username="alice", password="pw")
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def upload_avatar(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.client.patch(
+                "/api/v1/auth/profile/", {"avatar": image_file("me.png", (300, 300))}, format="multipart"
+            )
+
+    def test_avatar_variants(self):
+        response = self.upload_avatar()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["avatar_thumbnails"]["status"], "pending")
+
+        data = self.client.get("/api/v1/auth/profile/").data["avatar_thumbnails"]
+        self.assertEqual(data["status"], "ready")
+        self.assertTrue(data["small"].endswith(".small.webp"))
+        self.assertEqual(data["large"], self.client.get("/api/v1/auth/profile/").data["avatar"])
+
+    def test_unchanged_avatar_keeps_its_variants(self):
+        self.upload_avatar()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.patch("/api/v1/auth/profile/", {"phone": "123"}, format="json")
+        self.assertEqual(Profile.objects.get(user=self.user).thumbnails["status"], "ready")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.upload_avatar()
+        self.assertEqual(Profile.objects.get(user=self.user).thumbnails["status"], "ready")
+
+    def test_replacing_the_avatar_deletes_the_old_variants(self):
+        self.upload_avatar()
+        small = Profile.objects.get(user=self.user).thumbnails["variants"]["small"]
+        self.assertTrue(default_storage.exists(small))
+
+        self.upload_avatar()
+        self.assertFalse(default_storage.exists(small))
+        self.assertEqual(Profile.objects.get(user=self.user).thumbnails["status"], "ready")
+
+    def test_no_avatar(self):
+        self.assertIsNone(self.client.get("/api/v1/auth/profile/").data["avatar_thumbnails"])
+
+
+@override_settings(ME_CACHE={"ENABLED": True})
+class MeTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.user = User.objects.create_user(username="bob", password="pw", email="bob@example.com")
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_user_saves_leave_the_profile_alone(self):
+        with CaptureQueriesContext(connection) as ctx:
+            self.user.last_login = timezone.now()
+            self.user.save(update_fields=["last_login"])
+        self.assertFalse([q for q in ctx.captured_queries if "accounts_profile" in q["sql"]])
+
+    def test_me_with_profile_in_one_query_then_cached(self):
+        with self.assertNumQueries(1):
+            response = self.client.get("/api/v1/auth/me/", {"include": "profile"})
+        self.assertEqual(response.data["username"], "bob")
+        self.assertEqual(response.data["profile"]["timezone"], "UTC")
+        self.assertNotIn("user", response.data["profile"])
+        self.assertIsNone(response.data["profile"]["avatar_thumbnails"])
+
+        with self.assertNumQueries(0):
+            cached = self.client.get("/api/v1/auth/me/", {"include": "profile"})
+        self.assertEqual(cached.data, response.data)
+        self.assertNotIn("profile", self.client.get("/api/v1/auth/me/").data)
+
+    def test_profile_changes_invalidate_me(self):
+        self.client.get("/api/v1/auth/me/", {"include": "profile"})
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.patch("/api/v1/auth/profile/", {"phone": "555"}, format="json")
+        self.assertEqual(self.client.get("/api/v1/auth/me/", {"include": "profile"}).data["profile"]["phone"], "555")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.email = "new@example.com"
+            self.user.save()
+        self.assertEqual(self.client.get("/api/v1/auth/me/", {"include": "profile"}).data["email"], "new@example.com")
+
+    def test_payload_read_before_a_save_is_not_cached(self):
+        variant = ("", "testserver")
+        _, generation = get_me(self.user.pk, variant)  # request reads the old rows...
+        invalidate_me(self.user.pk)  # ...while another one saves
+        set_me(self.user.pk, variant, {"username": "stale"}, generation)
+        self.assertIsNone(get_me(self.user.pk, variant)[0])
+
+        _, generation = get_me(self.user.pk, variant)
+        set_me(self.user.pk, variant, {"username": "bob"}, generation)
+        self.assertEqual(get_me(self.user.pk, variant)[0], {"username": "bob"})
+        invalidate_me(self.user.pk)
+        self.assertIsNone(get_me(self.user.pk, variant)[0])
+
+    def test_unchanged_profile_is_not_written(self):
+        profile = Profile.objects.get(user=self.user)
+        with self.assertNumQueries(0):
+            ProfileSerializer().update(profile, {"timezone": "UTC"})
+
+    def test_profile_created_lazily(self):
+        Profile.objects.filter(user=self.user).delete()
+        response = self.client.get("/api/v1/auth/me/", {"include": "profile"})
+        self.assertEqual(response.data["profile"]["timezone"], "UTC")
+        self.assertEqual(self.client.get("/api/v1/auth/profile/").status_code, 200)
+        self.assertEqual(Profile.objects.filter(user=self.user).count(), 1)
+
+
+@override_settings(LOGIN={"WORKERS": 0})
+class AsyncLoginTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.user = User.objects.create_user(username="erin", password="s3cret-pass!")
+        self.client = APIClient()
+
+    def login(self, password="s3cret-pass!", username="erin"):
+        return self.client.post("/api/v1/auth/login/", {"username": username, "password": password}, format="json")
+
+    def test_login_and_refresh(self):
+        response = self.login()
+        self.assertEqual(response.status_code, 200)
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {response.json()['access']}")
+        self.assertEqual(self.client.get("/api/v1/auth/me/").data["username"], "erin")
+
+        refreshed = self.client.post("/api/v1/auth/refresh/", {"refresh": response.json()["refresh"]}, format="json")
+        self.assertEqual(refreshed.status_code, 200)
+        self.assertIn("access", refreshed.json())
+        self.assertEqual(self.client.post("/api/v1/auth/refresh/", {"refresh": "junk"}, format="json").status_code, 401)
+
+    def test_rejections(self):
+        self.assertEqual(self.login(password="wrong").status_code, 401)
+        self.assertEqual(self.login(username="nobody").status_code, 401)
+        self.assertEqual(self.client.post("/api/v1/auth/login/", {"username": "erin"}, format="json").status_code, 400)
+        User.objects.filter(pk=self.user.pk).update(is_active=False)
+        self.assertEqual(self.login().json()["code"], "no_active_account")
+
+    @override_settings(PASSWORD_HASHERS=[
+        "django.contrib.auth.hashers.PBKDF2PasswordHasher",
+        "django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher",
+    ])
+    def test_outdated_hash_is_upgraded_without_revoking_tokens(self):
+        User.objects.filter(pk=self.user.pk).update(password=make_password("s3cret-pass!", hasher="pbkdf2_sha1"))
+        first = self.login().json()
+        self.assertTrue(User.objects.get(pk=self.user.pk).password.startswith("pbkdf2_sha256$"))
+        self.assertEqual(self.login().status_code, 200)
+
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {first['access']}")
+        self.assertEqual(self.client.get("/api/v1/auth/me/").status_code, 200)
+
+    def test_concurrency_limits(self):
+        from .login import account_key
+
+        cache.set(account_key("ERIN"), 2, 30)  # two checks already running for this account
+        response = self.login()
+        self.assertEqual((response.status_code, response["Retry-After"]), (429, "1"))
+        self.assertEqual(cache.get(account_key("erin")), 2)
+
+        cache.clear()
+        with self.settings(LOGIN={"WORKERS": 0, "MAX_PENDING": 0}):
+            self.assertEqual(self.login().status_code, 503)
+        self.assertEqual(self.login().status_code, 200)
+
+    def test_process_pool(self):
+        from .login import shutdown_pool
+
+        self.addCleanup(shutdown_pool)
+        with self.settings(LOGIN={"WORKERS": 1}):
+            self.assertEqual(self.login().status_code, 200)
+            self.assertEqual(self.login(password="wrong").status_code, 401)
@@ -6,7 +6,8 @@ from rest_framework_simplejwt.tokens import RefreshToken
 from .serializers import RegisterSerializer
 from users.serializers import UserSerializer
 from accounts.models import Profile
-from .serializers import ProfileSerializer
+from .serializers import MeSerializer, ProfileSerializer
+from .cache import get_me, set_me
 
 User = get_user_model()
 
@@ -16,15 +17,35 @@ class RegisterView(generics.CreateAPIView):
     permission_classes = [permissions.AllowAny]
 
 class MeView(APIView):
+    """
+    The signed-in user; ?include=profile adds the profile, read with the
+    user in one query. Responses are cached per user until the user or
+    the profile is saved (see accounts/cache.py).
+    """
     permission_classes = [permissions.IsAuthenticated]
 
     def get(self, request):
-        serializer = UserSerializer(request.user)
-        return Response(serializer.data)
+        include_profile = "profile" in request.query_params.get("include", "").split(",")
+        variant = ("profile" if include_profile else "", request.get_host())
+        data, generation = get_me(request.user.pk, variant)
+        if data is None:
+            if include_profile:
+                user = User.objects.select_related("profile").get(pk=request.user.pk)
+                data = MeSerializer(user, context={"request": request}).data
+                cacheable = data["profile"]["avatar_thumbnails"] is None or (
+                    data["profile"]["avatar_thumbnails"]["status"] != "pending"
+                )  # a pending avatar changes without a save signal
+            else:
+                data, cacheable = UserSerializer(request.user).data, True
+            if cacheable:
+                set_me(request.user.pk, variant, data, generation)
+        response = Response(data)
+        response["Cache-Control"] = "private, no-cache"
+        return response
 
 class ProfileView(generics.RetrieveUpdateAPIView):
     serializer_class = ProfileSerializer
     permission_classes = [permissions.IsAuthenticated]
 
     def get_object(self):
-        return Profile.objects.get(user=self.request.user)
\ No newline at end of file
+        return Profile.for_user(self.request.user)
\ No newline at end of file
@@ -2,6 +2,10 @@
 ASGI config for config project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
+HTTP goes to Django; WebSocket connections go to the live activity stream
+(events/stream.py). Lifespan events start and stop the login hashing
+pool (accounts/login.py). Serve with an ASGI server, e.g.
+``uvicorn config.asgi:application``.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
@@ -13,4 +17,28 @@ from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
 
-application = get_asgi_application()
+django_application = get_asgi_application()
+
+# Needs the app registry loaded by get_asgi_application()
+from accounts.login import shutdown_pool, start_pool  # noqa: E402
+from events.stream import websocket_stream  # noqa: E402
+
+
+async def lifespan(scope, receive, send):
+    while True:
+        message = await receive()
+        if message["type"] == "lifespan.startup":
+            start_pool()
+            await send({"type": "lifespan.startup.complete"})
+        elif message["type"] == "lifespan.shutdown":
+            shutdown_pool()
+            await send({"type": "lifespan.shutdown.complete"})
+            return
+
+
+async def application(scope, receive, send):
+    if scope["type"] == "websocket":
+        return await websocket_stream(scope, receive, send)
+    if scope["type"] == "lifespan":
+        return await lifespan(scope, receive, send)
+    return await django_application(scope, receive, send)
@@ -63,6 +63,7 @@ MIDDLEWARE = [
     "django.contrib.auth.middleware.AuthenticationMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
+    "events.middleware.ActivityBatchMiddleware",          # one ActivityLog write per request
 ]
 
 ROOT_URLCONF = "config.urls"
@@ -101,6 +102,122 @@ DATABASES = {
     )
 }
 
+# --------------------------------------------------------------------------------------
+# Cache (per-process memory by default; set REDIS_URL to share across workers)
+# --------------------------------------------------------------------------------------
+REDIS_URL = os.getenv("REDIS_URL", "")
+if REDIS_URL:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": REDIS_URL,
+        }
+    }
+else:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+            "LOCATION": "eventhub-default",
+        }
+    }
+
+# Project-version-keyed response cache and ETags (see projects/cache.py); both off by default
+# on the per-process cache, where a version bump on one worker is invisible to the others
+PROJECT_RESPONSE_CACHE = {
+    "ENABLED": os.getenv("PROJECT_RESPONSE_CACHE", str(bool(REDIS_URL))).lower() == "true",
+    "TIMEOUT": int(os.getenv("PROJECT_RESPONSE_CACHE_TIMEOUT", "300")),
+    "LOCK_TIMEOUT": 10,
+    "LOCK_WAIT": 2.0,
+    "CONDITIONAL": os.getenv("PROJECT_CONDITIONAL_GET", str(bool(REDIS_URL))).lower() == "true",
+}
+
+# In-process (or shared) cache of (user, project) -> role used by projects/permissions.py
+MEMBERSHIP_CACHE = {
+    "ENABLED": os.getenv("MEMBERSHIP_CACHE", str(bool(REDIS_URL))).lower() == "true",
+    "BACKEND": os.getenv("MEMBERSHIP_CACHE_BACKEND", "shared" if REDIS_URL else "local"),
+    "MAX_ENTRIES": int(os.getenv("MEMBERSHIP_CACHE_MAX_ENTRIES", "10000")),
+    "TTL": int(os.getenv("MEMBERSHIP_CACHE_TTL", "60")),
+}
+
+# Full-text task search (see projects/search.py); CONFIG is the PostgreSQL text search config
+TASK_SEARCH = {
+    "CONFIG": os.getenv("TASK_SEARCH_CONFIG", "english"),
+    "MAX_TERMS": 8,
+    "MAX_RESULTS": 100,
+}
+
+# Member-autocomplete user search (see users/search.py)
+USER_SEARCH = {
+    "MIN_QUERY_LENGTH": 2,
+    "MAX_RESULTS": 20,
+    "PREFIX_INDEX": os.getenv("USER_PREFIX_INDEX", "False").lower() == "true",
+    "REFRESH_SECONDS": 300,
+}
+
+# Project PDF reports (see projects/reports.py): with STORE, rendered once per project watermark and
+# kept on disk under ROOT (shared or per host)
+PROJECT_REPORTS = {
+    "STORE": os.getenv("REPORT_STORE", "True").lower() == "true",
+    "ROOT": Path(os.getenv("REPORT_CACHE_DIR", BASE_DIR / "cache" / "reports")),
+    "WORKERS": int(os.getenv("REPORT_WORKERS", "2")),
+    "WAIT_SECONDS": 5,
+    "JOB_TTL": 3600,
+    "CHUNK_SIZE": 500,
+}
+
+# Streamed CSV/NDJSON exports (see projects/export.py)
+EXPORTS = {
+    "CHUNK_SIZE": 2000,
+    "FLUSH_ROWS": 200,
+}
+
+# Bulk task import (see projects/imports.py)
+IMPORTS = {
+    "CHUNK_SIZE": int(os.getenv("IMPORT_CHUNK_SIZE", "1000")),
+    "MAX_ERRORS": 100,
+}
+
+# Resumable, content-addressed attachment uploads (see projects/uploads.py); with more than one
+# host, UPLOAD_PARTIAL_DIR must be shared storage (chunks of one upload may reach any host)
+ATTACHMENT_UPLOADS = {
+    "ROOT": Path(os.getenv("UPLOAD_PARTIAL_DIR", BASE_DIR / "cache" / "uploads")),
+    "MAX_SIZE": int(os.getenv("UPLOAD_MAX_SIZE", str(2 * 1024 ** 3))),
+    "MAX_CHUNK_SIZE": 8 * 1024 ** 2,
+    "TTL": 24 * 3600,
+}
+
+# Per-user cache of /auth/me/ (see accounts/cache.py)
+ME_CACHE = {
+    "ENABLED": os.getenv("ME_CACHE", str(bool(REDIS_URL))).lower() == "true",
+    "TTL": 300,
+}
+
+# Resized previews of image attachments and avatars (see projects/thumbnails.py)
+THUMBNAILS = {
+    "SIZES": {"small": 64, "medium": 256, "large": 1024},
+    "WORKERS": int(os.getenv("THUMBNAIL_WORKERS", "2")),
+}
+
+# Attachment downloads (see projects/downloads.py): "" serves from Django,
+# "x-accel-redirect" (nginx, internal location at ACCEL_PREFIX) or "x-sendfile" offloads to the proxy
+ATTACHMENT_DOWNLOADS = {
+    "MODE": os.getenv("ATTACHMENT_SENDFILE", ""),
+    "ACCEL_PREFIX": os.getenv("ATTACHMENT_ACCEL_PREFIX", "/protected-media/"),
+}
+
+# Live activity streams (see events/live.py); the Redis backend fans events out across workers
+LIVE_STREAM = {
+    "BACKEND": os.getenv(
+        "LIVE_STREAM_BACKEND",
+        "events.live.RedisBackend" if REDIS_URL else "events.live.LocalBackend",
+    ),
+    "REDIS_URL": REDIS_URL,
+    "QUEUE_SIZE": 100,
+    "HEARTBEAT_SECONDS": int(os.getenv("LIVE_STREAM_HEARTBEAT", "15")),
+    "MAX_CONNECTIONS": int(os.getenv("LIVE_STREAM_MAX_CONNECTIONS", "10000")),
+    "REPLAY_LIMIT": 100,
+}
+
 # --------------------------------------------------------------------------------------
 # Password validation
 # --------------------------------------------------------------------------------------
@@ -153,7 +270,16 @@ CORS_ALLOWED_ORIGINS += [
 CORS_ALLOW_CREDENTIALS = True
 CORS_ALLOW_HEADERS = list(default_headers) + [
     "authorization",
+    "if-none-match",
+    "if-modified-since",
+    "last-event-id",
+    "upload-offset",
+    "range",
+    "if-range",
 ]
+# Let the frontend read the conditional-GET validators (projects/cache.py) and upload offsets
+CORS_EXPOSE_HEADERS = ["ETag", "Last-Modified", "X-Cache", "Upload-Offset", "Upload-Length",
+                       "Content-Range", "Accept-Ranges", "Content-Disposition"]
 
 # Django requires scheme in CSRF_TRUSTED_ORIGINS
 CSRF_TRUSTED_ORIGINS = [
@@ -170,7 +296,7 @@ CSRF_TRUSTED_ORIGINS = [
 # --------------------------------------------------------------------------------------
 REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": [
-        "rest_framework_simplejwt.authentication.JWTAuthentication",
+        "users.authentication.StatelessJWTAuthentication",
     ],
     "DEFAULT_PERMISSION_CLASSES": [
         "rest_framework.permissions.IsAuthenticated",
@@ -187,6 +313,22 @@ SIMPLE_JWT = {
     "BLACKLIST_AFTER_ROTATION": True,
     "ALGORITHM": "HS256",
     "AUTH_HEADER_TYPES": ("Bearer",),
+    # Tokens carry username + token version; revoked ones are refused (users/authentication.py)
+    "TOKEN_OBTAIN_SERIALIZER": "users.authentication.TokenObtainPairSerializer",
+    "TOKEN_REFRESH_SERIALIZER": "users.authentication.TokenRefreshSerializer",
+}
+
+# Async login/refresh (see accounts/login.py): password checks run in a process pool
+LOGIN = {
+    "WORKERS": int(os.getenv("LOGIN_HASH_WORKERS", str(min(4, os.cpu_count() or 1)))),
+    "MAX_PENDING": int(os.getenv("LOGIN_MAX_PENDING", "64")),
+    "PER_ACCOUNT": 2,
+}
+
+# Stateless JWT authentication: request.user from claims, revocation state cached per user
+TOKEN_AUTH = {
+    "STATELESS": True,
+    "TTL": int(os.getenv("TOKEN_STATE_TTL", "60")),
 }
 
 SPECTACULAR_SETTINGS = {
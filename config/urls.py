@@ -17,10 +17,7 @@ Including another URLconf
 from django.contrib import admin
 from django.urls import path, include
 from drf_spectacular.views import SpectacularAPIView, SpectacularSwaggerView
-from rest_framework_simplejwt.views import (
-    TokenObtainPairView,
-    TokenRefreshView,
-)
+from accounts import login
 from django.conf import settings
 from django.conf.urls.static import static
 
@@ -29,8 +26,9 @@ urlpatterns = [
     path("api/schema/", SpectacularAPIView.as_view(), name="schema"),
     path("api/docs/", SpectacularSwaggerView.as_view(url_name="schema"), name="swagger-ui"),
     path("api/v1/auth/", include("accounts.urls")),
-    path("api/v1/auth/login/", TokenObtainPairView.as_view(), name="token_obtain_pair"),
-    path("api/v1/auth/refresh/", TokenRefreshView.as_view(), name="token_refresh"),
+    # Async: password hashing runs in a process pool (accounts/login.py)
+    path("api/v1/auth/login/", login.login, name="token_obtain_pair"),
+    path("api/v1/auth/refresh/", login.refresh, name="token_refresh"),
     path("api/v1/", include("projects.urls")),
     path("api/v1/auth/", include("users.urls")),
 ]
@@ -0,0 +1,84 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.db import transaction
+
+from .live import publish_activity
+from .models import ActivityLog
+
+
+# --------------------------------------------------------------------
+# 🔹 Request-scoped ActivityLog buffer
+#
+# An entry joins the buffer through transaction.on_commit, so a rollback
+# (of the transaction or of a savepoint) discards it together with the
+# rest of the work, and outside a transaction it joins straight away.
+# The buffer is written with one bulk_create when the request ends
+# (events.middleware), or when an activity_batch() block exits.
+# Without one, each entry is written on its own once committed.
+# --------------------------------------------------------------------
+current_batch = ContextVar("activity_buffer", default=None)
+
+
+class ActivityBuffer:
+    def __init__(self):
+        self.entries = []
+        self._updates = {}
+        self.closed = False
+
+    def add(self, entry):
+        if self.closed:
+            write_entries([entry])  # committed after the request's flush
+            return
+        # Repeated UPDATEs of one object collapse into the latest entry,
+        # keeping the position of the first.
+        if entry.action == "UPDATE" and entry.object_id:
+            key = (entry.project_id, entry.object_type, entry.object_id)
+            index = self._updates.get(key)
+            if index is not None:
+                self.entries[index] = entry
+                return
+            self._updates[key] = len(self.entries)
+        self.entries.append(entry)
+
+    def flush(self):
+        self.closed = True
+        entries, self.entries, self._updates = self.entries, [], {}
+        write_entries(entries)
+
+
+def write_entries(entries):
+    from projects.models import Project
+
+    # A project deleted after its entries were logged took its log with it
+    project_ids = {entry.project_id for entry in entries if entry.project_id is not None}
+    if project_ids:
+        live = set(Project.objects.filter(pk__in=project_ids).values_list("pk", flat=True))
+        entries = [entry for entry in entries if entry.project_id is None or entry.project_id in live]
+    if entries:
+        ActivityLog.objects.bulk_create(entries)
+        publish_activity(entries)
+
+
+@contextmanager
+def activity_batch():
+    """Buffer the entries logged inside the block; one write when it exits."""
+    buffer = ActivityBuffer()
+    token = current_batch.set(buffer)
+    try:
+        yield buffer
+    finally:
+        current_batch.reset(token)
+        buffer.flush()
+
+
+def log_activity(**fields):
+    """Record an ActivityLog entry once its transaction commits."""
+    entry = ActivityLog(**fields)
+    buffer = current_batch.get()
+    if buffer is None:
+        transaction.on_commit(lambda: write_entries([entry]))
+    else:
+        transaction.on_commit(lambda: buffer.add(entry))
+    return entry
+
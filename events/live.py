@@ -0,0 +1,221 @@
+import asyncio
+import json
+import logging
+import threading
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+
+# --------------------------------------------------------------------
+# 🔹 Settings
+# --------------------------------------------------------------------
+DEFAULTS = {
+    # events.live.LocalBackend (one process) or events.live.RedisBackend
+    "BACKEND": "events.live.LocalBackend",
+    "REDIS_URL": "",
+    "CHANNEL_PREFIX": "eventhub:live:",
+    "QUEUE_SIZE": 100,            # events buffered per connection before it must resync
+    "HEARTBEAT_SECONDS": 15,
+    "MAX_CONNECTIONS": 10000,     # per worker process
+    "REPLAY_LIMIT": 100,          # activity entries replayed after a reconnect
+}
+
+# Sent instead of the events a slow connection missed (see Subscription)
+RESYNC = {"type": "resync"}
+
+
+def live_setting(name):
+    return getattr(settings, "LIVE_STREAM", {}).get(name, DEFAULTS[name])
+
+
+# --------------------------------------------------------------------
+# 🔹 Subscriptions: one bounded queue per open connection
+#
+# Events are handed to a subscription's own event loop, so publishing
+# is safe from any thread (sync views run in a thread pool under ASGI).
+# A connection that cannot keep up does not hold memory or slow anyone
+# else down: once its queue is full the backlog is dropped and the
+# client is told to resync (refetch), which it has to do after a
+# reconnect anyway.
+# --------------------------------------------------------------------
+class Subscription:
+    def __init__(self, project_id, loop, maxsize):
+        self.project_id = str(project_id)
+        self.loop = loop
+        self.queue = asyncio.Queue(maxsize)
+        self.overflowed = False
+
+    def offer(self, event):
+        # Runs on self.loop
+        if self.overflowed:
+            return
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            self.overflowed = True
+
+    async def next_event(self, timeout):
+        """The next event, RESYNC after an overflow, or None on timeout."""
+        if self.overflowed:
+            self.overflowed = False
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            return RESYNC
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+
+class Hub:
+    """The subscriptions of this process, by project."""
+
+    def __init__(self):
+        self._subscriptions = defaultdict(set)
+        self._lock = threading.Lock()
+        self._count = 0
+
+    @property
+    def connection_count(self):
+        return self._count
+
+    def has_subscribers(self, project_id):
+        return bool(self._subscriptions.get(str(project_id)))
+
+    def subscribe(self, project_id):
+        subscription = Subscription(project_id, asyncio.get_running_loop(), live_setting("QUEUE_SIZE"))
+        with self._lock:
+            self._subscriptions[subscription.project_id].add(subscription)
+            self._count += 1
+        get_backend().start()
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            subscriptions = self._subscriptions.get(subscription.project_id)
+            if subscriptions and subscription in subscriptions:
+                subscriptions.discard(subscription)
+                self._count -= 1
+                if not subscriptions:
+                    del self._subscriptions[subscription.project_id]
+
+    def dispatch(self, project_id, event):
+        with self._lock:
+            subscriptions = list(self._subscriptions.get(str(project_id), ()))
+        for subscription in subscriptions:
+            try:
+                subscription.loop.call_soon_threadsafe(subscription.offer, event)
+            except RuntimeError:
+                # Its loop has shut down; the connection is gone
+                self.unsubscribe(subscription)
+
+
+hub = Hub()
+
+
+# --------------------------------------------------------------------
+# 🔹 Backends: how an event reaches the hubs of every worker
+# --------------------------------------------------------------------
+class LocalBackend:
+    """Single process: events go straight to this process's hub."""
+
+    def __init__(self, hub):
+        self.hub = hub
+
+    def start(self):
+        pass
+
+    def publish(self, project_id, event):
+        if self.hub.has_subscribers(project_id):
+            self.hub.dispatch(project_id, event)
+
+
+class RedisBackend:
+    """
+    Redis pub/sub, one channel per project. Every worker publishes to
+    Redis and delivers what it receives to its own hub, itself included.
+    The listener thread starts with the first connection, so workers that
+    serve no streams only ever publish.
+    """
+
+    def __init__(self, hub):
+        import redis  # optional dependency, as for the Redis cache
+
+        self.hub = hub
+        self.prefix = live_setting("CHANNEL_PREFIX")
+        self.client = redis.Redis.from_url(live_setting("REDIS_URL") or settings.REDIS_URL)
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def start(self):
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._listen, name="live-stream", daemon=True)
+                self._thread.start()
+
+    def _listen(self):
+        pubsub = self.client.pubsub(ignore_subscribe_messages=True)
+        pubsub.psubscribe(f"{self.prefix}*")
+        for message in pubsub.listen():
+            try:
+                project_id = message["channel"].decode()[len(self.prefix):]
+                self.hub.dispatch(project_id, json.loads(message["data"]))
+            except Exception:
+                logger.exception("Dropped malformed live event")
+
+    def publish(self, project_id, event):
+        try:
+            self.client.publish(f"{self.prefix}{project_id}", json.dumps(event, cls=DjangoJSONEncoder))
+        except Exception:
+            # A missed notification only delays clients until their next resync
+            logger.exception("Could not publish live event")
+
+
+_backend = None
+
+
+def get_backend():
+    global _backend
+    if _backend is None:
+        _backend = import_string(live_setting("BACKEND"))(hub)
+    return _backend
+
+
+# --------------------------------------------------------------------
+# 🔹 Publishing
+# --------------------------------------------------------------------
+def publish(project_id, event):
+    """Send an event to the live streams of a project, once committed."""
+    if project_id is None:
+        return
+    # Round-trip through JSON so every backend hands out the same plain data
+    event = json.loads(json.dumps(event, cls=DjangoJSONEncoder))
+    transaction.on_commit(lambda: get_backend().publish(str(project_id), event))
+
+
+def activity_event(entry):
+    return {
+        "type": "activity",
+        "id": entry.pk,
+        "action": entry.action,
+        "object_type": entry.object_type,
+        "object_id": entry.object_id,
+        "description": entry.description,
+        "user": {"id": entry.user.id, "username": entry.user.username} if entry.user else None,
+        "timestamp": entry.timestamp,
+    }
+
+
+def task_event(op, task_ids, **fields):
+    return {"type": "task", "op": op, "ids": [str(pk) for pk in task_ids], **fields}
+
+
+def publish_activity(entries):
+    for entry in entries:
+        publish(entry.project_id, activity_event(entry))
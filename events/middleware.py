@@ -0,0 +1,23 @@
+from asgiref.sync import iscoroutinefunction, sync_to_async
+from django.utils.decorators import sync_and_async_middleware
+
+from .activity import ActivityBuffer, activity_batch, current_batch
+
+
+@sync_and_async_middleware
+def ActivityBatchMiddleware(get_response):
+    """One ActivityLog write per request (see events.activity)."""
+    if iscoroutinefunction(get_response):
+        async def middleware(request):
+            buffer = ActivityBuffer()
+            token = current_batch.set(buffer)  # copied into the threads sync views run in
+            try:
+                return await get_response(request)
+            finally:
+                current_batch.reset(token)
+                await sync_to_async(buffer.flush)()
+    else:
+        def middleware(request):
+            with activity_batch():
+                return get_response(request)
+    return middleware
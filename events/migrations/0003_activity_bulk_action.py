@@ -0,0 +1,18 @@
+# Generated by Django 5.2.7 on 2026-10-18 10:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events', '0002_keyset_indexes'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='activitylog',
+            name='action',
+            field=models.CharField(choices=[('CREATE', 'Create'), ('UPDATE', 'Update'), ('DELETE', 'Delete'), ('COMMENT', 'Comment'), ('UPLOAD', 'Upload'), ('BULK', 'Bulk')], max_length=20),
+        ),
+    ]
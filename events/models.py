@@ -9,12 +9,15 @@ class ActivityLog(models.Model):
         ("DELETE", "Delete"),
         ("COMMENT", "Comment"),
         ("UPLOAD", "Upload"),
+        ("BULK", "Bulk"),
     ]
 
     project = models.ForeignKey(
         "projects.Project",
         on_delete=models.CASCADE,
-        related_name="activities"
+        related_name="activities",
+        null=True,
+        blank=True
     )
     user = models.ForeignKey(
         settings.AUTH_USER_MODEL,
@@ -30,6 +33,8 @@ class ActivityLog(models.Model):
 
     class Meta:
         ordering = ["-timestamp"]
+        indexes = [models.Index(fields=["project", "timestamp", "id"])]
 
     def __str__(self):
-        return f"{self.project.name} - {self.action} by {self.user}"
\ No newline at end of file
+        project = self.project.name if self.project else "(deleted project)"
+        return f"{project} - {self.action} by {self.user}"
\ No newline at end of file
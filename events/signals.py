@@ -9,8 +9,26 @@ from projects.models import (
     Subtask,
     Comment,
     Attachment,
+    Label,
+    ProjectStats,
+    TaskAssignee,
+    TaskLabel,
 )
-from .models import ActivityLog
+from projects.cache import bump_project_version_on_commit
+from projects.membership import invalidate_membership_on_commit
+from projects.stats import (
+    bump_project_stats,
+    on_task_saved,
+    on_task_deleted,
+    on_subtask_saved,
+    on_subtask_deleted,
+)
+from projects.search import index_task, unindex_task, reindex_comments
+from projects.uploads import release_blob
+from projects.thumbnails import is_image, queue_thumbnails
+from projects.sync import touch_task
+from .activity import log_activity
+from .live import publish, task_event
 
 
 print("✅ events.signals imported — all signals registered!")
@@ -34,6 +52,37 @@ def get_user_from_instance(instance):
     )
 
 
+# --------------------------------------------------------------------
+# 🔹 Helper: project a row belongs to (for cache versioning)
+# --------------------------------------------------------------------
+def get_project_id_from_instance(instance):
+    if isinstance(instance, Project):
+        return instance.pk
+    if hasattr(instance, "project_id"):
+        return instance.project_id
+    task = getattr(instance, "task", None)
+    return task.project_id if task else None
+
+
+# --------------------------------------------------------------------
+# 🧩 Project version: any write to a project's rows invalidates its
+# cached responses (see projects.cache)
+# --------------------------------------------------------------------
+VERSIONED_MODELS = (
+    Project, ProjectMember, Label, Task, Subtask,
+    TaskAssignee, TaskLabel, Comment, Attachment,
+)
+
+
+def bump_version(sender, instance, **kwargs):
+    bump_project_version_on_commit(get_project_id_from_instance(instance))
+
+
+for _model in VERSIONED_MODELS:
+    post_save.connect(bump_version, sender=_model, dispatch_uid=f"bump-version-save-{_model.__name__}")
+    post_delete.connect(bump_version, sender=_model, dispatch_uid=f"bump-version-delete-{_model.__name__}")
+
+
 # --------------------------------------------------------------------
 # 🧩 PROJECT Activity
 # --------------------------------------------------------------------
@@ -44,7 +93,12 @@ def log_project_activity(sender, instance, created, **kwargs):
 
     print(f"🔥 Project signal fired for {instance.name}, action={action}")
 
-    ActivityLog.objects.create(
+    if created:
+        ProjectStats.objects.get_or_create(
+            project=instance, defaults={"last_activity_at": timezone.now()}
+        )
+
+    log_activity(
         project=instance,
         user=user,
         action=action,
@@ -57,10 +111,11 @@ def log_project_activity(sender, instance, created, **kwargs):
 
 @receiver(post_delete, sender=Project)
 def log_project_deletion(sender, instance, **kwargs):
-    user = get_user_from_instance(instance)
-    ActivityLog.objects.create(
-        project=instance,
-        user=user,
+    # The project's own log rows cascade with it, so this entry is kept
+    # without one (object_id still names the project).
+    log_activity(
+        project=None,
+        user=get_user_from_instance(instance),
         action="DELETE",
         object_type="Project",
         object_id=str(instance.id),
@@ -74,8 +129,10 @@ def log_project_deletion(sender, instance, **kwargs):
 # --------------------------------------------------------------------
 @receiver(post_save, sender=ProjectMember)
 def log_member_added(sender, instance, created, **kwargs):
+    invalidate_membership_on_commit(instance.user_id, instance.project_id)
     if created:
-        ActivityLog.objects.create(
+        bump_project_stats(instance.project_id, member_count=1)
+        log_activity(
             project=instance.project,
             user=get_user_from_instance(instance),
             action="CREATE",
@@ -85,7 +142,7 @@ def log_member_added(sender, instance, created, **kwargs):
             timestamp=timezone.now(),
         )
     else:
-        ActivityLog.objects.create(
+        log_activity(
             project=instance.project,
             user=get_user_from_instance(instance),
             action="UPDATE",
@@ -98,7 +155,9 @@ def log_member_added(sender, instance, created, **kwargs):
 
 @receiver(post_delete, sender=ProjectMember)
 def log_member_removed(sender, instance, **kwargs):
-    ActivityLog.objects.create(
+    invalidate_membership_on_commit(instance.user_id, instance.project_id)
+    bump_project_stats(instance.project_id, member_count=-1)
+    log_activity(
         project=instance.project,
         user=get_user_from_instance(instance),
         action="DELETE",
@@ -115,7 +174,17 @@ def log_member_removed(sender, instance, **kwargs):
 @receiver(post_save, sender=Task)
 def log_task_activity(sender, instance, created, **kwargs):
     action = "CREATE" if created else "UPDATE"
-    ActivityLog.objects.create(
+    # Before the stats hook, which resets the loaded values both compare against
+    deleted_now = instance.deleted_at is not None and instance.loaded_value("deleted_at") is None
+    index_task(instance, created)
+    on_task_saved(instance, created)
+    publish(instance.project_id, task_event(
+        "created" if created else "deleted" if deleted_now else "updated",
+        [instance.pk],
+        status=instance.status,
+        updated_at=instance.updated_at,
+    ))
+    log_activity(
         project=instance.project,
         user=get_user_from_instance(instance),
         action=action,
@@ -128,7 +197,10 @@ def log_task_activity(sender, instance, created, **kwargs):
 
 @receiver(post_delete, sender=Task)
 def log_task_deletion(sender, instance, **kwargs):
-    ActivityLog.objects.create(
+    on_task_deleted(instance)
+    unindex_task(instance.pk)
+    publish(instance.project_id, task_event("deleted", [instance.pk]))
+    log_activity(
         project=instance.project,
         user=get_user_from_instance(instance),
         action="DELETE",
@@ -145,7 +217,9 @@ def log_task_deletion(sender, instance, **kwargs):
 @receiver(post_save, sender=Subtask)
 def log_subtask_activity(sender, instance, created, **kwargs):
     action = "CREATE" if created else "UPDATE"
-    ActivityLog.objects.create(
+    on_subtask_saved(instance, created)
+    touch_task(instance.task_id)
+    log_activity(
         project=instance.task.project,
         user=get_user_from_instance(instance),
         action=action,
@@ -158,7 +232,9 @@ def log_subtask_activity(sender, instance, created, **kwargs):
 
 @receiver(post_delete, sender=Subtask)
 def log_subtask_deletion(sender, instance, **kwargs):
-    ActivityLog.objects.create(
+    on_subtask_deleted(instance)
+    touch_task(instance.task_id)
+    log_activity(
         project=instance.task.project,
         user=get_user_from_instance(instance),
         action="DELETE",
@@ -174,9 +250,12 @@ def log_subtask_deletion(sender, instance, **kwargs):
 # --------------------------------------------------------------------
 @receiver(post_save, sender=Comment)
 def log_comment_activity(sender, instance, created, **kwargs):
+    reindex_comments(instance.task_id)
+    touch_task(instance.task_id)
     if created:
+        bump_project_stats(instance.task.project_id, comment_count=1)
         user = get_user_from_instance(instance)
-        ActivityLog.objects.create(
+        log_activity(
             project=instance.task.project,
             user=user,
             action="COMMENT",
@@ -187,14 +266,22 @@ def log_comment_activity(sender, instance, created, **kwargs):
         )
 
 
+@receiver(post_delete, sender=Comment)
+def count_comment_deletion(sender, instance, **kwargs):
+    reindex_comments(instance.task_id)
+    touch_task(instance.task_id)
+    bump_project_stats(instance.task.project_id, comment_count=-1)
+
+
 # --------------------------------------------------------------------
 # 🧩 ATTACHMENT Activity
 # --------------------------------------------------------------------
 @receiver(post_save, sender=Attachment)
 def log_attachment_activity(sender, instance, created, **kwargs):
     if created:
+        bump_project_stats(instance.task.project_id, attachment_count=1)
         user = get_user_from_instance(instance)
-        ActivityLog.objects.create(
+        log_activity(
             project=instance.task.project,
             user=user,
             action="UPLOAD",
@@ -202,4 +289,31 @@ def log_attachment_activity(sender, instance, created, **kwargs):
             object_id=str(instance.id),
             description=f"{user.username if user else 'Someone'} uploaded '{instance.filename}'.",
             timestamp=timezone.now(),
-        )
\ No newline at end of file
+        )
+
+
+@receiver(post_save, sender=Attachment)
+def queue_attachment_thumbnails(sender, instance, created, **kwargs):
+    if created and is_image(instance.content_type):
+        queue_thumbnails(instance, "file")
+
+
+@receiver(post_delete, sender=Attachment)
+def count_attachment_deletion(sender, instance, **kwargs):
+    bump_project_stats(instance.task.project_id, attachment_count=-1)
+    if instance.blob_id:
+        release_blob(instance.blob_id)
+
+
+# --------------------------------------------------------------------
+# 🧩 LABEL counters (no activity entry, labels are project metadata)
+# --------------------------------------------------------------------
+@receiver(post_save, sender=Label)
+def count_label_creation(sender, instance, created, **kwargs):
+    if created:
+        bump_project_stats(instance.project_id, label_count=1)
+
+
+@receiver(post_delete, sender=Label)
+def count_label_deletion(sender, instance, **kwargs):
+    bump_project_stats(instance.project_id, label_count=-1)
@@ -0,0 +1,248 @@
+import asyncio
+import json
+import re
+import time
+from functools import partial
+from urllib.parse import parse_qs
+
+from asgiref.sync import sync_to_async
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import close_old_connections
+from django.http import JsonResponse, StreamingHttpResponse
+from django.views.decorators.http import require_GET
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+
+from projects.membership import membership_cache
+from projects.models import ProjectMember
+from projects.streaming import is_asgi
+from users.authentication import StatelessJWTAuthentication, check_token
+
+from .live import RESYNC, activity_event, hub, live_setting
+from .models import ActivityLog
+
+
+# --------------------------------------------------------------------
+# 🔹 Live activity of a project, as Server-Sent Events or a WebSocket
+#
+# A connection is a coroutine parked on its subscription queue; it holds
+# no thread and touches the database only to authorize and to replay,
+# so a worker can keep thousands of idle streams open. Both transports
+# need an ASGI server (uvicorn, daphne); under WSGI a stream would tie
+# up a worker thread for its whole lifetime, so the SSE view refuses.
+#
+# Access is checked again every heartbeat interval (token expiry and
+# revocation, deactivation, membership, all from their caches); a
+# stream whose user lost it ends with a "closed" event.
+# --------------------------------------------------------------------
+WEBSOCKET_PATH = re.compile(
+    r"^/ws/projects/(?P<project_pk>[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12})/activity/$"
+)
+
+NOT_AUTHENTICATED, FORBIDDEN = "not_authenticated", "forbidden"
+CLOSE_CODES = {NOT_AUTHENTICATED: 4401, FORBIDDEN: 4403}
+
+
+def project_role(user_id, project_id):
+    return membership_cache.get_role(
+        user_id,
+        project_id,
+        lambda: ProjectMember.objects.filter(project_id=project_id, user_id=user_id)
+        .values_list("role", flat=True)
+        .first(),
+    )
+
+
+def authorize(token, project_id):
+    """`(access, error)`: the validated JWT access token if its user is a project member, else an error code."""
+    if not token:
+        return None, NOT_AUTHENTICATED
+    try:
+        access = StatelessJWTAuthentication().get_validated_token(token)
+    except (InvalidToken, AuthenticationFailed):
+        return None, NOT_AUTHENTICATED
+    error = recheck(access, project_id)
+    return (None, error) if error else (access, None)
+
+
+def recheck(access, project_id):
+    """The error code once `access` no longer grants the project (expired, revoked, inactive, removed), else None."""
+    if access["exp"] <= time.time():
+        return NOT_AUTHENTICATED  # the client reconnects with a refreshed token
+    try:
+        user_id = check_token(access)
+    except (InvalidToken, AuthenticationFailed):
+        return NOT_AUTHENTICATED
+    return None if project_role(user_id, project_id) else FORBIDDEN
+
+
+def parse_event_id(value):
+    try:
+        return int(value) if value else None
+    except ValueError:
+        return None
+
+
+def replay(project_id, after_id):
+    """Activity logged after entry `after_id`, oldest first; RESYNC alone if there is too much."""
+    limit = live_setting("REPLAY_LIMIT")
+    entries = list(
+        ActivityLog.objects.filter(project_id=project_id, id__gt=after_id)
+        .select_related("user")
+        .order_by("id")[: limit + 1]
+    )
+    if len(entries) > limit:
+        return [RESYNC]
+    return [activity_event(entry) for entry in entries]
+
+
+def closed_event(error):
+    return {"type": "closed", "reason": error}
+
+
+async def live_events(project_id, last_event_id=None, check_access=None):
+    """
+    Events of a project as they are published, preceded by a replay of
+    what a reconnecting client missed; None whenever a heartbeat is due.
+    `check_access` (async, returns an error code or None) runs at every
+    heartbeat; on an error the stream ends with closed_event().
+    """
+    subscription = hub.subscribe(project_id)
+    try:
+        seen = 0
+        if last_event_id is not None:
+            for event in await sync_to_async(replay)(project_id, last_event_id):
+                seen = max(seen, event.get("id") or 0)
+                yield event
+        heartbeat = live_setting("HEARTBEAT_SECONDS")
+        next_check = time.monotonic() + heartbeat
+        while True:
+            event = await subscription.next_event(heartbeat)
+            # Every heartbeat, and at the same pace on a busy stream
+            if check_access is not None and (event is None or time.monotonic() >= next_check):
+                error = await check_access()
+                if error:
+                    yield closed_event(error)
+                    return
+                next_check = time.monotonic() + heartbeat
+            # Entries published while the replay ran are already sent
+            if event is not None and event["type"] == "activity" and (event["id"] or 0) <= seen:
+                continue
+            yield event
+    finally:
+        hub.unsubscribe(subscription)
+
+
+def encode(event):
+    return json.dumps(event, cls=DjangoJSONEncoder, separators=(",", ":"))
+
+
+def over_capacity():
+    return hub.connection_count >= live_setting("MAX_CONNECTIONS")
+
+
+# --------------------------------------------------------------------
+# 🧩 Server-Sent Events: GET /api/v1/projects/<id>/activity/stream/
+# --------------------------------------------------------------------
+def sse_message(event):
+    if event is None:
+        return ": ping\n\n"
+    lines = [f"event: {event['type']}", f"data: {encode(event)}"]
+    if event["type"] == "activity" and event["id"]:
+        lines.insert(0, f"id: {event['id']}")
+    return "\n".join(lines) + "\n\n"
+
+
+async def sse_stream(project_id, last_event_id, access):
+    yield "retry: 5000\n\n"
+    check_access = partial(sync_to_async(recheck), access, project_id)
+    async for event in live_events(project_id, last_event_id, check_access):
+        yield sse_message(event)
+
+
+@require_GET
+async def activity_stream(request, project_pk):
+    """
+    Stream a project's new activity entries and task changes.
+    EventSource cannot send headers, so the access token may also be
+    passed as ?token=; a reconnect resumes after Last-Event-ID. Once
+    the user loses access the stream ends with `event: closed` and the
+    browser's automatic reconnect gets the 401/403.
+    """
+    if not is_asgi(request):
+        return JsonResponse({"detail": "Live streams need an ASGI server."}, status=501)
+    token = request.GET.get("token")
+    header = request.headers.get("Authorization", "")
+    if header.startswith("Bearer "):
+        token = header[len("Bearer "):]
+    access, error = await sync_to_async(authorize)(token, project_pk)
+    if error == NOT_AUTHENTICATED:
+        return JsonResponse({"detail": "Authentication credentials were not provided."}, status=401)
+    if error == FORBIDDEN:
+        return JsonResponse({"detail": "You do not have permission to perform this action."}, status=403)
+    if over_capacity():
+        response = JsonResponse({"detail": "Too many open streams, retry later."}, status=503)
+        response["Retry-After"] = "5"
+        return response
+
+    last_event_id = parse_event_id(request.headers.get("Last-Event-ID") or request.GET.get("last_event_id"))
+    response = StreamingHttpResponse(
+        sse_stream(project_pk, last_event_id, access), content_type="text/event-stream"
+    )
+    response["Cache-Control"] = "no-cache"
+    response["X-Accel-Buffering"] = "no"  # nginx: pass events through unbuffered
+    return response
+
+
+# --------------------------------------------------------------------
+# 🧩 WebSocket: ws://<host>/ws/projects/<id>/activity/?token=<access>
+#
+# A plain ASGI app (see config/asgi.py), one JSON message per event and
+# {"type": "ping"} as heartbeat. Close codes: 4401 unauthenticated (or
+# token expired or revoked later), 4403 not a member (or removed later), 4404
+# unknown path, 1013 over capacity.
+# --------------------------------------------------------------------
+def outside_request(func, *args):
+    # Outside a Django request, so recycle stale connections by hand
+    close_old_connections()
+    try:
+        return func(*args)
+    finally:
+        close_old_connections()
+
+
+async def websocket_stream(scope, receive, send):
+    message = await receive()
+    if message["type"] != "websocket.connect":
+        return
+    match = WEBSOCKET_PATH.match(scope["path"])
+    if not match:
+        await send({"type": "websocket.close", "code": 4404})
+        return
+    project_id = match["project_pk"]
+    params = parse_qs(scope.get("query_string", b"").decode())
+    access, error = await sync_to_async(outside_request)(authorize, params.get("token", [None])[0], project_id)
+    if error:
+        await send({"type": "websocket.close", "code": CLOSE_CODES[error]})
+        return
+    if over_capacity():
+        await send({"type": "websocket.close", "code": 1013})
+        return
+    await send({"type": "websocket.accept"})
+
+    async def pump():
+        last_event_id = parse_event_id(params.get("last_event_id", [None])[0])
+        check_access = partial(sync_to_async(outside_request), recheck, access, project_id)
+        async for event in live_events(project_id, last_event_id, check_access):
+            if event and event["type"] == "closed":
+                await send({"type": "websocket.close", "code": CLOSE_CODES[event["reason"]]})
+                return
+            await send({"type": "websocket.send", "text": encode(event or {"type": "ping"})})
+
+    sender = asyncio.ensure_future(pump())
+    try:
+        # Incoming frames are ignored; we only wait for the disconnect
+        while (await receive())["type"] != "websocket.disconnect":
+            pass
+    finally:
+        sender.cancel()
+        await asyncio.gather(sender, return_exceptions=True)
@@ -1,3 +1,291 @@
-from django.test import TestCase
+import asyncio
+from datetime import timedelta
+
+from asgiref.sync import sync_to_async
+from django.test import TestCase, TransactionTestCase, override_settings
 
 # Create your tests here.
+from django.contrib.auth import get_user_model
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from projects.models import Project, ProjectMember, Task
+from .activity import activity_batch
+from .live import RESYNC, get_backend, hub
+from .models import ActivityLog
+from .stream import live_events, recheck, websocket_stream
+
+User = get_user_model()
+
+
+class ActivityBatchTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="owner", password="pw")
+        with self.captureOnCommitCallbacks(execute=True):
+            self.project = Project.objects.create(name="Demo", created_by=self.user)
+            ProjectMember.objects.create(project=self.project, user=self.user, role="OWNER")
+        ActivityLog.objects.all().delete()
+
+    def test_batch_is_written_once_when_it_ends(self):
+        with activity_batch():
+            with self.captureOnCommitCallbacks(execute=True):
+                with transaction.atomic():
+                    task = Task.objects.create(project=self.project, creator=self.user, title="A")
+                    Task.objects.create(project=self.project, creator=self.user, title="B")
+            self.assertFalse(ActivityLog.objects.exists())
+        self.assertEqual(ActivityLog.objects.filter(action="CREATE").count(), 2)
+
+        with activity_batch():
+            with self.captureOnCommitCallbacks(execute=True):
+                with transaction.atomic():
+                    for title in ("B", "C", "D"):
+                        task.title = title
+                        task.save()
+        updates = ActivityLog.objects.filter(action="UPDATE", object_id=str(task.id))
+        self.assertEqual(updates.count(), 1)
+        self.assertIn("'D'", updates.get().description)
+
+    def test_rollback_logs_nothing(self):
+        with activity_batch(), self.captureOnCommitCallbacks(execute=True):
+            with transaction.atomic():
+                Task.objects.create(project=self.project, creator=self.user, title="kept")
+                try:
+                    with transaction.atomic():
+                        Task.objects.create(project=self.project, creator=self.user, title="lost")
+                        raise RuntimeError
+                except RuntimeError:
+                    pass
+        descriptions = list(ActivityLog.objects.values_list("description", flat=True))
+        self.assertEqual(descriptions, ["Task 'kept' was created."])
+
+    def test_task_edit_flushes_one_batch(self):
+        client = APIClient()
+        client.force_authenticate(self.user)
+        url = f"/api/v1/projects/{self.project.id}/tasks/"
+        with self.captureOnCommitCallbacks(execute=True):
+            response = client.post(url, {"title": "T", "assignee_ids": [self.user.id]}, format="json")
+        self.assertEqual(response.status_code, 201)
+        with self.captureOnCommitCallbacks(execute=True):
+            client.patch(f"{url}{response.data['id']}/", {"assignee_ids": [], "title": "T2"}, format="json")
+        self.assertEqual(ActivityLog.objects.filter(object_type="Task").count(), 2)
+
+
+class ActivityBatchMiddlewareTests(TransactionTestCase):
+    def test_one_activity_write_per_request(self):
+        user = User.objects.create_user(username="owner", password="pw")
+        client = APIClient()
+        client.force_authenticate(user)
+
+        with CaptureQueriesContext(connection) as queries:
+            response = client.post("/api/v1/projects/", {"name": "P"}, format="json")
+
+        self.assertEqual(response.status_code, 201)
+        inserts = [q for q in queries if q["sql"].startswith('INSERT INTO "events_activitylog"')]
+        self.assertEqual(len(inserts), 1)
+        self.assertEqual(ActivityLog.objects.count(), 2)  # the project and its owner
+
+
+class ProjectDeletionActivityTests(TransactionTestCase):
+    def test_deleting_project_keeps_only_its_delete_entry(self):
+        user = User.objects.create_user(username="owner", password="pw")
+        client = APIClient()
+        client.force_authenticate(user)
+        project_id = client.post("/api/v1/projects/", {"name": "P"}, format="json").data["id"]
+        client.post(f"/api/v1/projects/{project_id}/tasks/", {"title": "t"}, format="json")
+
+        response = client.delete(f"/api/v1/projects/{project_id}/")
+
+        self.assertEqual(response.status_code, 204)
+        self.assertFalse(Project.objects.exists())
+        entry = ActivityLog.objects.get()
+        self.assertEqual((entry.project, entry.action, entry.object_id), (None, "DELETE", str(project_id)))
+
+
+class LiveStreamTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="owner", password="pw")
+        with self.captureOnCommitCallbacks(execute=True):
+            self.project = Project.objects.create(name="Demo", created_by=self.user)
+            ProjectMember.objects.create(project=self.project, user=self.user, role="OWNER")
+        self.url = f"/api/v1/projects/{self.project.id}/activity/stream/"
+        self.token = str(RefreshToken.for_user(self.user).access_token)
+
+    def create_task(self, title):
+        with self.captureOnCommitCallbacks(execute=True):
+            return Task.objects.create(project=self.project, creator=self.user, title=title)
+
+    async def drain(self, subscription):
+        await asyncio.sleep(0)
+        events = []
+        while not subscription.queue.empty():
+            events.append(subscription.queue.get_nowait())
+        return events
+
+    async def test_committed_writes_reach_subscribers(self):
+        subscription = hub.subscribe(self.project.id)
+        try:
+            task = await sync_to_async(self.create_task)("Live")
+            events = await self.drain(subscription)
+        finally:
+            hub.unsubscribe(subscription)
+
+        self.assertEqual([e["type"] for e in events], ["task", "activity"])
+        self.assertEqual(events[0]["op"], "created")
+        self.assertEqual(events[0]["ids"], [str(task.id)])
+        self.assertEqual(events[1]["description"], "Task 'Live' was created.")
+        self.assertEqual(events[1]["user"]["username"], "owner")
+        self.assertFalse(hub.has_subscribers(self.project.id))
+
+    @override_settings(LIVE_STREAM={"QUEUE_SIZE": 2})
+    async def test_slow_subscriber_is_told_to_resync(self):
+        subscription = hub.subscribe(self.project.id)
+        try:
+            for n in range(5):
+                get_backend().publish(str(self.project.id), {"type": "task", "op": "updated", "n": n})
+            await asyncio.sleep(0)
+            self.assertEqual(subscription.queue.qsize(), 2)
+            self.assertEqual(await subscription.next_event(1), RESYNC)
+            self.assertIsNone(await subscription.next_event(0.01))  # heartbeat due
+        finally:
+            hub.unsubscribe(subscription)
+
+    async def test_sse_requires_project_membership(self):
+        stranger = await sync_to_async(User.objects.create_user)(username="stranger", password="pw")
+        response = await self.async_client.get(self.url)
+        self.assertEqual(response.status_code, 401)
+        token = str(RefreshToken.for_user(stranger).access_token)
+        response = await self.async_client.get(self.url, headers={"Authorization": f"Bearer {token}"})
+        self.assertEqual(response.status_code, 403)
+
+    def test_sse_is_refused_under_wsgi(self):
+        response = self.client.get(self.url, {"token": self.token})
+        self.assertEqual(response.status_code, 501)
+
+    def test_expired_token_loses_access(self):
+        access = RefreshToken.for_user(self.user).access_token
+        self.assertIsNone(recheck(access, self.project.id))
+        access.set_exp(lifetime=timedelta(seconds=-1))
+        self.assertEqual(recheck(access, self.project.id), "not_authenticated")
+
+    async def test_sse_replays_after_last_event_id(self):
+        await sync_to_async(self.create_task)("Before")
+        last_id = await ActivityLog.objects.filter(project=self.project).order_by("id").values_list(
+            "id", flat=True
+        ).alast()
+        await sync_to_async(self.create_task)("Missed")
+
+        response = await self.async_client.get(
+            self.url, {"token": self.token}, headers={"Last-Event-ID": str(last_id)}
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Type"], "text/event-stream")
+        chunks = response.streaming_content
+        try:
+            self.assertEqual(await anext(chunks), b"retry: 5000\n\n")
+            replayed = (await anext(chunks)).decode()
+        finally:
+            await chunks.aclose()
+        self.assertTrue(replayed.startswith(f"id: {last_id + 1}\nevent: activity\n"))
+        self.assertIn("Task 'Missed' was created.", replayed)
+
+    async def test_closing_a_stream_unsubscribes(self):
+        events = live_events(self.project.id)
+        pending = asyncio.ensure_future(anext(events))
+        await asyncio.sleep(0)
+        self.assertTrue(hub.has_subscribers(self.project.id))
+        pending.cancel()
+        await asyncio.gather(pending, return_exceptions=True)
+        self.assertFalse(hub.has_subscribers(self.project.id))
+
+
+class LiveWebSocketTests(TransactionTestCase):
+    async def test_websocket_streams_project_events(self):
+        user = await sync_to_async(User.objects.create_user)(username="owner", password="pw")
+        project = await Project.objects.acreate(name="Demo", created_by=user)
+        await ProjectMember.objects.acreate(project=project, user=user, role="OWNER")
+        token = str(RefreshToken.for_user(user).access_token)
+
+        incoming, outgoing = asyncio.Queue(), asyncio.Queue()
+        scope = {
+            "type": "websocket",
+            "path": f"/ws/projects/{project.id}/activity/",
+            "query_string": f"token={token}".encode(),
+        }
+        await incoming.put({"type": "websocket.connect"})
+        connection = asyncio.ensure_future(websocket_stream(scope, incoming.get, outgoing.put))
+
+        self.assertEqual((await outgoing.get())["type"], "websocket.accept")
+        await asyncio.sleep(0)
+        get_backend().publish(str(project.id), {"type": "task", "op": "deleted", "ids": ["x"]})
+        message = await asyncio.wait_for(outgoing.get(), 1)
+        self.assertEqual(message["text"], '{"type":"task","op":"deleted","ids":["x"]}')
+
+        await incoming.put({"type": "websocket.disconnect", "code": 1000})
+        await asyncio.wait_for(connection, 1)
+        self.assertFalse(hub.has_subscribers(project.id))
+
+    async def test_websocket_rejects_missing_token(self):
+        incoming, outgoing = asyncio.Queue(), asyncio.Queue()
+        await incoming.put({"type": "websocket.connect"})
+        scope = {
+            "type": "websocket",
+            "path": "/ws/projects/00000000-0000-0000-0000-000000000000/activity/",
+            "query_string": b"",
+        }
+        await websocket_stream(scope, incoming.get, outgoing.put)
+        self.assertEqual(await outgoing.get(), {"type": "websocket.close", "code": 4401})
+
+
+# Committed writes: the stream re-checks access from its own thread and connection
+@override_settings(LIVE_STREAM={"HEARTBEAT_SECONDS": 0.01})
+class LiveAccessRecheckTests(TransactionTestCase):
+    async def test_sse_ends_when_membership_is_removed(self):
+        user = await sync_to_async(User.objects.create_user)(username="owner", password="pw")
+        project = await Project.objects.acreate(name="Demo", created_by=user)
+        await ProjectMember.objects.acreate(project=project, user=user, role="OWNER")
+        token = str(RefreshToken.for_user(user).access_token)
+
+        response = await self.async_client.get(f"/api/v1/projects/{project.id}/activity/stream/", {"token": token})
+        chunks = response.streaming_content
+        try:
+            self.assertEqual(await anext(chunks), b"retry: 5000\n\n")
+            self.assertEqual(await anext(chunks), b": ping\n\n")
+            await ProjectMember.objects.filter(project=project, user=user).adelete()
+            chunk = await anext(chunks)
+            while not chunk.startswith(b"event: closed"):  # pings, the removal's own activity
+                chunk = await anext(chunks)
+            self.assertEqual(chunk, b'event: closed\ndata: {"type":"closed","reason":"forbidden"}\n\n')
+            with self.assertRaises(StopAsyncIteration):
+                await anext(chunks)
+        finally:
+            await chunks.aclose()
+
+    async def test_websocket_closes_once_tokens_are_revoked(self):
+        user = await sync_to_async(User.objects.create_user)(username="owner", password="pw")
+        project = await Project.objects.acreate(name="Demo", created_by=user)
+        await ProjectMember.objects.acreate(project=project, user=user, role="OWNER")
+        token = str(RefreshToken.for_user(user).access_token)
+
+        incoming, outgoing = asyncio.Queue(), asyncio.Queue()
+        scope = {
+            "type": "websocket",
+            "path": f"/ws/projects/{project.id}/activity/",
+            "query_string": f"token={token}".encode(),
+        }
+        await incoming.put({"type": "websocket.connect"})
+        connection = asyncio.ensure_future(websocket_stream(scope, incoming.get, outgoing.put))
+        self.assertEqual((await outgoing.get())["type"], "websocket.accept")
+        self.assertEqual(await asyncio.wait_for(outgoing.get(), 1), {"type": "websocket.send", "text": '{"type":"ping"}'})
+
+        user.change_password("changed-pw!")
+        await user.asave()
+        message = await asyncio.wait_for(outgoing.get(), 1)
+        while message["type"] == "websocket.send":
+            message = await asyncio.wait_for(outgoing.get(), 1)
+        self.assertEqual(message, {"type": "websocket.close", "code": 4401})
+
+        await incoming.put({"type": "websocket.disconnect", "code": 4401})
+        await asyncio.wait_for(connection, 1)
+        self.assertFalse(hub.has_subscribers(project.id))
@@ -5,6 +5,8 @@ from rest_framework.decorators import action
 from .models import ActivityLog
 from .serializers import ActivityLogSerializer
 from projects.models import Project
+from projects.export import ACTIVITY_COLUMNS, activity_rows, export_response, wants_gzip
+from projects.pagination import KeysetPagination
 from projects.permissions import IsProjectMember
 
 
@@ -15,13 +17,26 @@ class ActivityLogViewSet(viewsets.ReadOnlyModelViewSet):
     """
     serializer_class = ActivityLogSerializer
     permission_classes = [permissions.IsAuthenticated, IsProjectMember]
+    pagination_class = KeysetPagination
+    cursor_ordering = ("-timestamp", "-id")
 
     def get_queryset(self):
         project_id = self.kwargs.get("project_pk")
-        return ActivityLog.objects.filter(project_id=project_id).order_by("-timestamp")
+        return (
+            ActivityLog.objects.filter(project_id=project_id)
+            .select_related("user")
+            .order_by("-timestamp", "-id")
+        )
 
     @action(detail=False, methods=["get"], url_path="recent")
     def recent(self, request, project_pk=None):
         logs = self.get_queryset()[:10]
         serializer = self.get_serializer(logs, many=True)
-        return Response(serializer.data)
\ No newline at end of file
+        return Response(serializer.data)
+
+    @action(detail=False, methods=["get"], url_path=r"export/(?P<kind>csv|ndjson)")
+    def export(self, request, project_pk=None, kind=None):
+        """The whole activity history, oldest first, as a streamed CSV or NDJSON download."""
+        return export_response(
+            request, activity_rows(project_pk), ACTIVITY_COLUMNS, kind, f"activity-{project_pk}", wants_gzip(request)
+        )
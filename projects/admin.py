@@ -1,10 +1,11 @@
 from django.contrib import admin
 from .models import (
-    Project, ProjectMember, Label, Task, Subtask,
+    Project, ProjectStats, ProjectMember, Label, Task, Subtask,
     TaskAssignee, TaskLabel, Comment, Attachment, ActivityLog
 )
 
 admin.site.register(Project)
+admin.site.register(ProjectStats)
 admin.site.register(ProjectMember)
 admin.site.register(Label)
 admin.site.register(Task)
@@ -0,0 +1,184 @@
+from collections import Counter
+
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import Exists, OuterRef
+from django.utils import timezone
+
+from events.activity import log_activity
+from events.live import publish, task_event
+
+from .cache import bump_project_version_on_commit
+from .models import Label, Task, TaskAssignee, TaskLabel
+from .relations import sync_relation
+from .search import reindex_tasks
+from .serializers import BulkTaskOperationSerializer, TaskSerializer
+from .stats import STATUS_COUNTERS, bump_project_stats
+
+User = get_user_model()
+
+MANAGER_ROLES = ("OWNER", "ADMIN")
+
+
+# --------------------------------------------------------------------
+# 🔹 Bulk task operations
+#
+# Every operation is validated first; the valid ones are then written
+# with a handful of set-based statements in one transaction. Those skip
+# the per-row signals, so the side effects they would have had (stats,
+# cache version, search index, activity) are applied once at the end;
+# the stats as deltas of the statuses rows had before and after, read
+# from rows locked for the transaction.
+# --------------------------------------------------------------------
+def result(index, op, status, task_id=None, errors=None):
+    item = {"index": index, "op": op, "status": status}
+    if task_id is not None:
+        item["id"] = str(task_id)
+    if errors is not None:
+        item["errors"] = errors
+    return item
+
+
+def editable_task_ids(project, user, role, task_ids):
+    """
+    The subset of `task_ids` (live tasks of `project`) this user may change:
+    all of them for owners/admins, otherwise those they created or are
+    assigned to — the bulk counterpart of IsTaskAssigneeOrAdmin.
+    """
+    tasks = Task.objects.filter(project=project, pk__in=task_ids)
+    if role in MANAGER_ROLES:
+        return {pk: True for pk in tasks.values_list("pk", flat=True)}
+    rows = tasks.annotate(
+        is_assignee=Exists(TaskAssignee.objects.filter(task=OuterRef("pk"), user=user))
+    ).values_list("pk", "creator_id", "is_assignee")
+    return {pk: creator_id == user.id or is_assignee for pk, creator_id, is_assignee in rows}
+
+
+def apply_bulk_operations(project, user, role, operations, atomic=False):
+    """
+    Apply create/update/delete operations to the tasks of one project.
+    Returns `(results, applied)`: one result per operation, in order, and
+    whether anything was written (False when `atomic` and an item failed).
+    """
+    results = [None] * len(operations)
+    creates, updates, deletes = [], [], []
+
+    # --- validate ---
+    for index, raw in enumerate(operations):
+        envelope = BulkTaskOperationSerializer(data=raw)
+        if not envelope.is_valid():
+            results[index] = result(index, raw.get("op"), 400, raw.get("id"), envelope.errors)
+            continue
+        op, task_id = envelope.validated_data["op"], envelope.validated_data.get("id")
+        if op == "delete":
+            deletes.append((index, task_id))
+            continue
+        serializer = TaskSerializer(data=envelope.validated_data["data"], partial=op == "update")
+        if not serializer.is_valid():
+            results[index] = result(index, op, 400, task_id, serializer.errors)
+            continue
+        (creates if op == "create" else updates).append((index, task_id, serializer.validated_data))
+
+    targets = [(index, "update", task_id) for index, task_id, _ in updates]
+    targets += [(index, "delete", task_id) for index, task_id in deletes]
+    allowed = editable_task_ids(project, user, role, {t[2] for t in targets}) if targets else {}
+    for index, op, task_id in targets:
+        if task_id not in allowed:
+            results[index] = result(index, op, 404, task_id, {"detail": "Not found."})
+        elif not allowed[task_id]:
+            results[index] = result(
+                index, op, 403, task_id,
+                {"detail": "You do not have permission to perform this action."},
+            )
+
+    failed = {index for index, item in enumerate(results) if item is not None}
+    if atomic and failed:
+        return [item for item in results if item is not None], False
+    updates = [item for item in updates if item[0] not in failed]
+    deletes = [item for item in deletes if item[0] not in failed]
+
+    # --- write ---
+    with transaction.atomic():
+        now = timezone.now()
+        touched, assignee_sets, label_sets = set(), {}, {}
+        deltas = Counter()
+
+        new_tasks = []
+        for index, _, data in creates:
+            data = dict(data)
+            assignee_ids, label_ids = data.pop("assignee_ids", None), data.pop("label_ids", None)
+            task = Task(project=project, creator=user, **data)
+            new_tasks.append(task)
+            if assignee_ids:
+                assignee_sets[task.pk] = assignee_ids
+            if label_ids:
+                label_sets[task.pk] = label_ids
+            results[index] = result(index, "create", 201, task.pk)
+        Task.objects.bulk_create(new_tasks)
+        touched.update(task.pk for task in new_tasks)
+        deltas["task_count"] += len(new_tasks)
+        deltas.update(STATUS_COUNTERS[task.status] for task in new_tasks)
+
+        if updates:
+            tasks = Task.objects.select_for_update().in_bulk([task_id for _, task_id, _ in updates])
+            deltas.subtract(STATUS_COUNTERS[task.status] for task in tasks.values())
+            fields = {"updated_at"}
+            for index, task_id, data in updates:
+                data = dict(data)
+                if "assignee_ids" in data:
+                    assignee_sets[task_id] = data.pop("assignee_ids")
+                if "label_ids" in data:
+                    label_sets[task_id] = data.pop("label_ids")
+                task = tasks[task_id]
+                for name, value in data.items():
+                    setattr(task, name, value)
+                task.updated_at = now
+                fields.update(data)
+                results[index] = result(index, "update", 200, task_id)
+            Task.objects.bulk_update(tasks.values(), sorted(fields))
+            deltas.update(STATUS_COUNTERS[task.status] for task in tasks.values())
+            touched.update(tasks)
+
+        if deletes:
+            delete_ids = [task_id for _, task_id in deletes]
+            live = Task.objects.select_for_update().filter(pk__in=delete_ids)
+            statuses = list(live.values_list("status", flat=True))
+            live.update(deleted_at=now, updated_at=now)
+            deltas["task_count"] -= len(statuses)
+            deltas.subtract(STATUS_COUNTERS[status] for status in statuses)
+            for index, task_id in deletes:
+                results[index] = result(index, "delete", 204, task_id)
+            touched.update(delete_ids)
+
+        replace_relations(project, assignee_sets, label_sets)
+
+        counts = {
+            "created": len(new_tasks),
+            "updated": len(updates),
+            "deleted": len(deletes),
+        }
+        if touched:
+            reindex_tasks(touched)
+            bump_project_stats(project.pk, **deltas)
+            bump_project_version_on_commit(project.pk)
+            publish(project.pk, task_event("bulk", sorted(touched, key=str), **counts))
+            log_activity(
+                project=project,
+                user=user,
+                action="BULK",
+                object_type="Task",
+                description="{} changed {} task(s): {} created, {} updated, {} deleted.".format(
+                    user.username, len(touched), counts["created"], counts["updated"], counts["deleted"]
+                ),
+                timestamp=now,
+            )
+
+    return results, True
+
+
+def replace_relations(project, assignee_sets, label_sets):
+    """Set the assignees/labels of many tasks, writing only the difference."""
+    if assignee_sets:
+        sync_relation(TaskAssignee, "task", "user", assignee_sets, User.objects.all())
+    if label_sets:
+        sync_relation(TaskLabel, "task", "label", label_sets, Label.objects.filter(project=project))
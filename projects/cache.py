@@ -0,0 +1,261 @@
+import hashlib
+import math
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+from django.utils.http import http_date, parse_etags, parse_http_date_safe
+from rest_framework import status
+from rest_framework.response import Response
+
+from .permissions import get_project_role
+
+
+# --------------------------------------------------------------------
+# 🔹 Settings
+# --------------------------------------------------------------------
+DEFAULTS = {
+    "ENABLED": False,     # needs a cache shared by every worker (REDIS_URL)
+    "TIMEOUT": 300,       # seconds a cached response lives
+    "LOCK_TIMEOUT": 10,   # seconds a single-flight lock is held at most
+    "LOCK_WAIT": 2.0,     # seconds a follower waits for the leader's result
+    "CONDITIONAL": False, # ETag / Last-Modified and 304 answers; same requirement
+}
+
+STATS_KEYS = ("hits", "misses", "waits", "not_modified")
+
+
+def cache_setting(name):
+    return getattr(settings, "PROJECT_RESPONSE_CACHE", {}).get(name, DEFAULTS[name])
+
+
+# --------------------------------------------------------------------
+# 🔹 Per-project version
+# --------------------------------------------------------------------
+def _version_key(project_id):
+    return f"project-version:{project_id}"
+
+
+def get_project_version(project_id):
+    """
+    Current version of a project. Seeded from the clock so a version that
+    was evicted from the cache never comes back smaller than before.
+    """
+    key = _version_key(project_id)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, time.time_ns(), None)
+        version = cache.get(key)
+    return version
+
+
+def _modified_key(project_id):
+    return f"project-modified:{project_id}"
+
+
+def bump_project_version(project_id):
+    """Invalidate every cached response of a project by moving its version."""
+    key = _version_key(project_id)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, time.time_ns(), None)
+    cache.set(_modified_key(project_id), time.time(), None)
+
+
+def get_project_watermark(project_id):
+    """
+    `(version, modified)`: the project's version and the time of the last
+    write to any of its rows. A watermark lost to eviction restarts at
+    "now", which can only turn a would-be 304 into a 200.
+    """
+    version_key, modified_key = _version_key(project_id), _modified_key(project_id)
+    values = cache.get_many([version_key, modified_key])
+    version = values.get(version_key) or get_project_version(project_id)
+    modified = values.get(modified_key)
+    if modified is None:
+        cache.add(modified_key, time.time(), None)
+        modified = cache.get(modified_key)
+    return version, modified
+
+
+def bump_project_version_on_commit(project_id):
+    """
+    Bump now, and again once the writing transaction commits, so a reader
+    that raced the commit can't keep pre-commit data under the new version.
+    """
+    if project_id is None:
+        return
+    bump_project_version(project_id)
+    if transaction.get_connection().in_atomic_block:
+        transaction.on_commit(lambda: bump_project_version(project_id))
+
+
+# --------------------------------------------------------------------
+# 🔹 Hit / miss counters (shared through the cache across workers)
+# --------------------------------------------------------------------
+def _stats_key(name):
+    return f"project-cache-stats:{name}"
+
+
+def record(name):
+    key = _stats_key(name)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.add(key, 0, None)
+        cache.incr(key)
+
+
+def cache_stats():
+    values = cache.get_many([_stats_key(name) for name in STATS_KEYS])
+    stats = {name: values.get(_stats_key(name), 0) for name in STATS_KEYS}
+    lookups = stats["hits"] + stats["misses"]
+    stats["hit_ratio"] = round(stats["hits"] / lookups, 4) if lookups else 0.0
+    return stats
+
+
+def reset_cache_stats():
+    cache.delete_many([_stats_key(name) for name in STATS_KEYS])
+
+
+# --------------------------------------------------------------------
+# 🔹 Single-flight computation
+# --------------------------------------------------------------------
+def single_flight(key, compute):
+    """
+    Return `(value, hit)` for `key`, computing it at most once across
+    workers: the first caller takes a lock and computes, the others poll
+    for its result for up to LOCK_WAIT seconds before giving up and
+    computing themselves. `compute` returns `(value, cacheable)`.
+    """
+    value = cache.get(key)
+    if value is not None:
+        record("hits")
+        return value, True
+
+    lock_key = f"{key}:lock"
+    if not cache.add(lock_key, 1, cache_setting("LOCK_TIMEOUT")):
+        record("waits")
+        deadline = time.monotonic() + cache_setting("LOCK_WAIT")
+        while time.monotonic() < deadline:
+            time.sleep(0.05)
+            value = cache.get(key)
+            if value is not None:
+                record("hits")
+                return value, True
+        lock_key = None
+
+    record("misses")
+    try:
+        value, cacheable = compute()
+        if cacheable:
+            cache.set(key, value, cache_setting("TIMEOUT"))
+    finally:
+        if lock_key:
+            cache.delete(lock_key)
+    return value, False
+
+
+# --------------------------------------------------------------------
+# 🔹 ViewSet mixin
+# --------------------------------------------------------------------
+class ProjectCacheMixin:
+    """
+    Cache GET responses of project-scoped viewsets, keyed by project
+    version, the caller's role and the query string. Permissions still run
+    before the cache is consulted; only the serialized body is reused.
+    """
+
+    def get_cache_project_id(self):
+        return self.kwargs.get("project_pk") or self.kwargs.get("pk")
+
+    def cached_response(self, request, handler, *args, **kwargs):
+        if request.method != "GET":
+            return handler(request, *args, **kwargs)
+        conditional, caching = cache_setting("CONDITIONAL"), cache_setting("ENABLED")
+        if not (conditional or caching):
+            return handler(request, *args, **kwargs)
+
+        project_id = self.get_cache_project_id()
+        role = get_project_role(request, project_id)
+        if role is None:
+            # Non-members fall through to the normal 403/404 handling.
+            return handler(request, *args, **kwargs)
+
+        query = "&".join(sorted(
+            f"{name}={value}" for name, values in request.GET.lists() for value in values
+        ))
+        resource = hashlib.sha1(f"{request.path}?{query}".encode()).hexdigest()
+        version, modified = get_project_watermark(project_id)
+
+        # Validators come from the cache alone: a 304 costs no query and
+        # never reaches the serializer.
+        etag = last_modified = None
+        if conditional:
+            etag, last_modified = self.get_validators(request, project_id, version, role, resource, modified)
+            if self.not_modified(request, etag, last_modified):
+                record("not_modified")
+                return self.with_validators(Response(status=status.HTTP_304_NOT_MODIFIED), etag, last_modified)
+
+        if not caching:
+            response = handler(request, *args, **kwargs)
+            if response.status_code == 200:
+                self.with_validators(response, etag, last_modified)
+            return response
+
+        key = "project-response:{}:v{}:{}:{}".format(project_id, version, role, resource)
+
+        response = None
+
+        def compute():
+            nonlocal response
+            response = handler(request, *args, **kwargs)
+            return response.data, response.status_code == 200
+
+        data, hit = single_flight(key, compute)
+        if response is None:
+            response = Response(data)
+        response["X-Cache"] = "HIT" if hit else "MISS"
+        if response.status_code == 200:
+            self.with_validators(response, etag, last_modified)
+        return response
+
+    # --- conditional GET ---
+    def get_validators(self, request, project_id, version, role, resource, modified):
+        renderer = getattr(request, "accepted_renderer", None)
+        # The date is part of the tag because overdue counts roll over daily.
+        raw = "{}:{}:{}:{}:{}:{}".format(
+            project_id, version, role, resource,
+            getattr(renderer, "format", ""), timezone.localdate(),
+        )
+        return '"{}"'.format(hashlib.sha1(raw.encode()).hexdigest()), math.ceil(modified)
+
+    def not_modified(self, request, etag, last_modified):
+        if_none_match = request.headers.get("If-None-Match")
+        if if_none_match:
+            # If-None-Match wins over If-Modified-Since (RFC 9110 13.2.2)
+            tags = {tag.removeprefix("W/") for tag in parse_etags(if_none_match)}
+            return "*" in tags or etag in tags
+        since = parse_http_date_safe(request.headers.get("If-Modified-Since", ""))
+        return since is not None and last_modified <= since
+
+    def with_validators(self, response, etag, last_modified):
+        if etag is None:
+            return response
+        response["ETag"] = etag
+        # Per-user data: browsers may keep it but must revalidate each time
+        response["Cache-Control"] = "private, no-cache"
+        # Only once the watermark's second is over: a later write in that
+        # same second would otherwise share the date and answer 304.
+        if time.time() >= last_modified:
+            response["Last-Modified"] = http_date(last_modified)
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self.cached_response(request, super().list, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.cached_response(request, super().retrieve, *args, **kwargs)
@@ -0,0 +1,222 @@
+import hashlib
+import re
+from urllib.parse import quote
+
+from django.conf import settings
+from django.http import FileResponse, HttpResponse, StreamingHttpResponse
+from django.utils.functional import cached_property
+from django.utils.http import http_date, parse_etags
+from rest_framework.negotiation import BaseContentNegotiation
+
+from .streaming import FileBlocks, is_asgi
+from .thumbnails import thumbnail_setting
+
+
+# --------------------------------------------------------------------
+# 🔹 Settings
+# --------------------------------------------------------------------
+DEFAULTS = {
+    # "" serves the bytes from Django (zero-copy with a WSGI server that
+    # implements wsgi.file_wrapper via sendfile; under ASGI one block at
+    # a time, read on a worker thread); "x-accel-redirect"
+    # (nginx) or "x-sendfile" (Apache, lighttpd) hands the file to the
+    # front proxy, which also answers Range requests itself.
+    "MODE": "",
+    "ACCEL_PREFIX": "/protected-media/",   # nginx `internal` location aliased to MEDIA_ROOT
+    "BLOCK_SIZE": 64 * 1024,
+}
+
+
+def download_setting(name):
+    return getattr(settings, "ATTACHMENT_DOWNLOADS", {}).get(name, DEFAULTS[name])
+
+
+# --------------------------------------------------------------------
+# 🔹 Validators
+#
+# Stored attachment files never change: content-addressed ones are
+# named by their SHA-256, older ones get a fresh storage name on every
+# upload. Either way the tag is known without touching the file.
+# --------------------------------------------------------------------
+def attachment_etag(attachment):
+    if attachment.blob_id:
+        return f'"{attachment.blob_id}"'
+    return '"{}"'.format(hashlib.sha1(f"{attachment.file.name}:{attachment.size}".encode()).hexdigest())
+
+
+class StoredFile:
+    """
+    What a download sends: the file of an attachment, or its resized
+    `variant` (projects.thumbnails) once that exists. Until then, and for
+    sizes the original already fits, the variant is the original itself.
+    """
+
+    def __init__(self, attachment, variant=None):
+        self.storage = attachment.file.storage
+        self.name = attachment.file.name
+        self.etag = attachment_etag(attachment)
+        self.content_type = attachment.content_type or "application/octet-stream"
+        self.filename = attachment.filename or attachment.file.name
+        self.modified = attachment.created_at
+        self._size = attachment.size if attachment.blob_id else None
+        name = (attachment.thumbnails or {}).get("variants", {}).get(variant, self.name)
+        if name != self.name:
+            extension = thumbnail_setting("FORMAT").lower()
+            self.name, self._size = name, None
+            self.etag = f'{self.etag[:-1]}.{variant}"'
+            self.content_type = f"image/{extension}"
+            self.filename = f"{self.filename.rsplit('.', 1)[0]}.{variant}.{extension}"
+
+    @cached_property
+    def size(self):
+        return self._size if self._size is not None else self.storage.size(self.name)
+
+
+def etag_matches(header, etag):
+    tags = {tag.removeprefix("W/") for tag in parse_etags(header)}
+    return "*" in tags or etag in tags
+
+
+# --------------------------------------------------------------------
+# 🔹 Ranges (a single byte range; anything else gets the whole file)
+# --------------------------------------------------------------------
+RANGE_RE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+class Unsatisfiable(Exception):
+    pass
+
+
+def parse_range(header, size):
+    """`(start, end)` (inclusive) of a Range header, or None to send everything."""
+    match = RANGE_RE.match((header or "").strip())
+    if not match or match.groups() == ("", ""):
+        return None
+    first, last = match.groups()
+    if first:
+        start = int(first)
+        end = min(int(last), size - 1) if last else size - 1
+        if last and int(last) < start:
+            return None  # syntactically invalid: ignored (RFC 9110 14.2)
+    else:
+        start, end = max(size - int(last), 0), size - 1   # suffix: the last N bytes
+        if not int(last):
+            raise Unsatisfiable
+    if start >= size:
+        raise Unsatisfiable
+    return start, end
+
+
+class FileRange:
+    """
+    At most `length` bytes of an open file, from its current position.
+    fileno() is passed through so a WSGI server's sendfile still applies
+    (it sends Content-Length bytes from the current offset).
+    """
+
+    def __init__(self, file, length):
+        self.file = file
+        self.remaining = length
+
+    def read(self, size=-1):
+        if self.remaining <= 0:
+            return b""
+        size = self.remaining if size is None or size < 0 else min(size, self.remaining)
+        data = self.file.read(size)
+        self.remaining -= len(data)
+        return data
+
+    def fileno(self):
+        return self.file.fileno()
+
+    def close(self):
+        self.file.close()
+
+
+# --------------------------------------------------------------------
+# 🔹 Response
+# --------------------------------------------------------------------
+class DownloadNegotiation(BaseContentNegotiation):
+    """The body is the file whatever Accept says; errors still render as JSON."""
+
+    def select_parser(self, request, parsers):
+        return parsers[0]
+
+    def select_renderer(self, request, renderers, format_suffix=None):
+        return renderers[0], renderers[0].media_type
+
+
+def _disposition(filename):
+    ascii_name = filename.encode("ascii", "ignore").decode().replace('"', "") or "download"
+    return f"attachment; filename=\"{ascii_name}\"; filename*=UTF-8''{quote(filename)}"
+
+
+def offload_response(stored, mode):
+    response = HttpResponse(content_type=stored.content_type)
+    if mode == "x-accel-redirect":
+        response["X-Accel-Redirect"] = download_setting("ACCEL_PREFIX").rstrip("/") + "/" + quote(stored.name)
+    else:
+        response["X-Sendfile"] = stored.storage.path(stored.name)
+    # The proxy fills in the body, its length and any Range answer
+    del response["Content-Length"]
+    return response
+
+
+def serve_attachment(request, attachment, variant=None):
+    """
+    The file of `attachment` (or its thumbnail `variant`) as a download:
+    304 for a matching If-None-Match, 206 for a single satisfiable Range
+    (honouring If-Range), 416 for an unsatisfiable one, or the whole file.
+    """
+    stored = StoredFile(attachment, variant)
+    headers = {
+        "ETag": stored.etag,
+        "Last-Modified": http_date(stored.modified.timestamp()),
+        "Cache-Control": "private, max-age=0, must-revalidate",
+        "Accept-Ranges": "bytes",
+    }
+    if_none_match = request.headers.get("If-None-Match")
+    if if_none_match and etag_matches(if_none_match, stored.etag):
+        response = HttpResponse(status=304)
+    elif mode := download_setting("MODE"):
+        response = offload_response(stored, mode)
+        response["Content-Disposition"] = _disposition(stored.filename)
+    else:
+        response = file_response(request, stored)
+    for header, value in headers.items():
+        response[header] = value
+    return response
+
+
+def file_response(request, stored):
+    size = stored.size
+    byte_range = None
+    if_range = request.headers.get("If-Range")
+    if not if_range or if_range.strip() == stored.etag:
+        try:
+            byte_range = parse_range(request.headers.get("Range"), size)
+        except Unsatisfiable:
+            response = HttpResponse(status=416)
+            response["Content-Range"] = f"bytes */{size}"
+            return response
+
+    handle = stored.storage.open(stored.name, "rb").file
+    if byte_range is None:
+        body, length, code = handle, size, 200
+    else:
+        start, end = byte_range
+        handle.seek(start)
+        body, length, code = FileRange(handle, end - start + 1), end - start + 1, 206
+
+    if is_asgi(request):
+        # FileResponse would be read whole before sending under ASGI
+        body = FileBlocks(body, download_setting("BLOCK_SIZE"))
+        response = StreamingHttpResponse(body, status=code, content_type=stored.content_type)
+    else:
+        response = FileResponse(body, status=code, content_type=stored.content_type)
+        response.block_size = download_setting("BLOCK_SIZE")
+    response["Content-Length"] = str(length)
+    response["Content-Disposition"] = _disposition(stored.filename)
+    if byte_range is not None:
+        response["Content-Range"] = f"bytes {byte_range[0]}-{byte_range[1]}/{size}"
+    return response
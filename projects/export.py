@@ -0,0 +1,165 @@
+import csv
+import io
+import json
+import zlib
+from collections import defaultdict
+from itertools import islice
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import StreamingHttpResponse
+
+from events.models import ActivityLog
+
+from .models import TaskAssignee, TaskLabel
+from .streaming import streaming_body
+
+
+# --------------------------------------------------------------------
+# 🔹 Settings
+# --------------------------------------------------------------------
+DEFAULTS = {
+    "CHUNK_SIZE": 2000,   # rows per database fetch (and per related-name lookup)
+    "FLUSH_ROWS": 200,    # rows per chunk written to the response
+}
+
+
+def export_setting(name):
+    return getattr(settings, "EXPORTS", {}).get(name, DEFAULTS[name])
+
+
+# --------------------------------------------------------------------
+# 🔹 Rows: plain dicts from values(), read a chunk at a time
+#
+# Nothing here holds more than one chunk of rows, so memory does not
+# grow with the size of the export.
+# --------------------------------------------------------------------
+TASK_FIELDS = (
+    "id", "title", "description", "status", "priority", "due_date",
+    "created_at", "updated_at", "creator__username",
+)
+TASK_COLUMNS = (
+    "id", "title", "description", "status", "priority", "due_date",
+    "created_at", "updated_at", "creator", "assignees", "labels",
+)
+
+ACTIVITY_FIELDS = ("id", "timestamp", "user__username", "action", "object_type", "object_id", "description")
+ACTIVITY_COLUMNS = ("id", "timestamp", "user", "action", "object_type", "object_id", "description")
+
+
+def chunked(iterable, size):
+    iterator = iter(iterable)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
+
+
+def _names_by_task(model, name_field, task_ids):
+    names = defaultdict(list)
+    for task_id, name in model.objects.filter(task_id__in=task_ids).values_list("task_id", name_field):
+        names[task_id].append(name)
+    return names
+
+
+def task_rows(queryset):
+    """Tasks of `queryset` as dicts, oldest first, with assignee and label names."""
+    chunk_size = export_setting("CHUNK_SIZE")
+    rows = (
+        queryset.prefetch_related(None)
+        .order_by("created_at", "id")
+        .values(*TASK_FIELDS)
+        .iterator(chunk_size=chunk_size)
+    )
+    for chunk in chunked(rows, chunk_size):
+        # One lookup per relation per chunk, like a prefetch scoped to the chunk
+        task_ids = [row["id"] for row in chunk]
+        assignees = _names_by_task(TaskAssignee, "user__username", task_ids)
+        labels = _names_by_task(TaskLabel, "label__name", task_ids)
+        for row in chunk:
+            row["creator"] = row.pop("creator__username")
+            row["assignees"] = sorted(assignees.get(row["id"], ()))
+            row["labels"] = sorted(labels.get(row["id"], ()))
+            yield row
+
+
+def activity_rows(project_id):
+    """The ActivityLog history of a project as dicts, oldest first."""
+    rows = (
+        ActivityLog.objects.filter(project_id=project_id)
+        .order_by("timestamp", "id")
+        .values(*ACTIVITY_FIELDS)
+        .iterator(chunk_size=export_setting("CHUNK_SIZE"))
+    )
+    for row in rows:
+        row["user"] = row.pop("user__username")
+        yield row
+
+
+# --------------------------------------------------------------------
+# 🔹 Encoders: rows in, bytes out
+# --------------------------------------------------------------------
+def _csv_value(value):
+    if value is None:
+        return ""
+    if isinstance(value, list):
+        return ";".join(value)
+    if hasattr(value, "isoformat"):
+        return value.isoformat()
+    return value
+
+
+def encode_csv(rows, columns):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columns)
+    for chunk in chunked(rows, export_setting("FLUSH_ROWS")):
+        for row in chunk:
+            writer.writerow([_csv_value(row[column]) for column in columns])
+        yield buffer.getvalue().encode()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode()  # header of an empty export
+
+
+def encode_ndjson(rows, columns):
+    for chunk in chunked(rows, export_setting("FLUSH_ROWS")):
+        yield "".join(
+            json.dumps({column: row[column] for column in columns}, cls=DjangoJSONEncoder) + "\n"
+            for row in chunk
+        ).encode()
+
+
+def gzipped(chunks):
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)  # wbits 31: gzip container
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+ENCODERS = {
+    "csv": (encode_csv, "text/csv; charset=utf-8"),
+    "ndjson": (encode_ndjson, "application/x-ndjson"),
+}
+
+
+def export_response(request, rows, columns, kind, filename, compress=False):
+    """A download of `rows` as CSV or NDJSON, encoded while it is sent."""
+    encode, content_type = ENCODERS[kind]
+    body = encode(rows, columns)
+    filename = f"{filename}.{kind}"
+    if compress:
+        body, content_type, filename = gzipped(body), "application/gzip", f"{filename}.gz"
+    response = StreamingHttpResponse(streaming_body(request, body), content_type=content_type)
+    response["Content-Disposition"] = f'attachment; filename="{filename}"'
+    response["X-Accel-Buffering"] = "no"
+    return response
+
+
+def query_flag(request, name):
+    return request.query_params.get(name, "").lower() in ("1", "true", "yes")
+
+
+def wants_gzip(request):
+    return query_flag(request, "gzip")
@@ -0,0 +1,307 @@
+import codecs
+import csv
+import gzip
+import json
+from collections import Counter
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.utils.dateparse import parse_date
+
+from events.activity import log_activity
+from events.live import publish
+
+from .cache import bump_project_version_on_commit
+from .export import chunked
+from .models import Label, Subtask, Task, TaskAssignee, TaskLabel
+from .search import reindex_tasks
+from .stats import STATUS_COUNTERS, bump_project_stats, refresh_label_count
+
+User = get_user_model()
+
+
+# --------------------------------------------------------------------
+# 🔹 Settings
+# --------------------------------------------------------------------
+DEFAULTS = {
+    "CHUNK_SIZE": 1000,   # rows validated, inserted and committed together
+    "MAX_ERRORS": 100,    # row errors reported back (all are counted)
+}
+
+
+def import_setting(name):
+    return getattr(settings, "IMPORTS", {}).get(name, DEFAULTS[name])
+
+
+# --------------------------------------------------------------------
+# 🔹 Readers: records out of a byte stream, one at a time
+#
+# The input is the same shape as the export (projects/export.py):
+# title, description, status, priority, due_date, assignees (usernames),
+# labels (names) and subtasks (titles). CSV lists are ";"-separated.
+# --------------------------------------------------------------------
+LIST_FIELDS = ("assignees", "labels", "subtasks")
+
+
+def _lines(stream, compressed):
+    # Any file-like source (upload, request body, file) iterates as byte lines
+    if compressed:
+        stream = gzip.GzipFile(fileobj=stream)
+    return codecs.iterdecode(stream, "utf-8-sig")
+
+
+def read_csv(lines):
+    for row in csv.DictReader(lines):
+        yield {
+            key: [part.strip() for part in (value or "").split(";") if part.strip()]
+            if key in LIST_FIELDS else value
+            for key, value in row.items()
+            if key is not None
+        }
+
+
+def read_ndjson(lines):
+    for line in lines:
+        if line.strip():
+            try:
+                yield json.loads(line)
+            except ValueError:
+                yield {"_error": "Invalid JSON."}
+
+
+READERS = {"csv": read_csv, "ndjson": read_ndjson}
+
+# Unreadable input (bad encoding, broken CSV quoting, corrupt gzip) ends
+# an import early; the chunks committed before it stay imported.
+STREAM_ERRORS = (UnicodeDecodeError, csv.Error, OSError, EOFError)
+
+
+def open_records(stream, kind, compressed=False):
+    """Records of `stream`, parsed as they are read."""
+    return READERS[kind](_lines(stream, compressed))
+
+
+# --------------------------------------------------------------------
+# 🔹 Validation
+# --------------------------------------------------------------------
+STATUSES = set(Task.Status.values)
+PRIORITIES = set(Task.Priority.values)
+TITLE_LENGTH = Task._meta.get_field("title").max_length
+
+
+def _as_list(value):
+    if value in (None, ""):
+        return []
+    if isinstance(value, str):
+        return [value]
+    if isinstance(value, list):
+        return value
+    raise ValueError
+
+
+def clean_record(record):
+    """`(data, errors)` for one input record; data is None when invalid."""
+    if not isinstance(record, dict):
+        return None, {"non_field_errors": ["Expected an object."]}
+    if "_error" in record:
+        return None, {"non_field_errors": [record["_error"]]}
+    errors = {}
+    title = str(record.get("title") or "").strip()
+    if not title:
+        errors["title"] = ["This field is required."]
+    elif len(title) > TITLE_LENGTH:
+        errors["title"] = [f"Ensure this field has no more than {TITLE_LENGTH} characters."]
+
+    status = str(record.get("status") or Task.Status.TODO).upper()
+    if status not in STATUSES:
+        errors["status"] = [f'"{status}" is not a valid choice.']
+    priority = str(record.get("priority") or Task.Priority.MEDIUM).upper()
+    if priority not in PRIORITIES:
+        errors["priority"] = [f'"{priority}" is not a valid choice.']
+
+    due_date = record.get("due_date") or None
+    if due_date is not None:
+        try:
+            due_date = parse_date(str(due_date))
+        except ValueError:
+            due_date = None
+        if due_date is None:
+            errors["due_date"] = ["Date has wrong format. Use YYYY-MM-DD."]
+
+    lists = {}
+    for name in LIST_FIELDS:
+        try:
+            lists[name] = _as_list(record.get(name))
+        except ValueError:
+            errors[name] = ["Expected a list."]
+    subtasks = []
+    for item in lists.get("subtasks", []):
+        if isinstance(item, dict) and item.get("title"):
+            subtasks.append((str(item["title"])[:255], bool(item.get("is_done"))))
+        elif isinstance(item, str) and item.strip():
+            subtasks.append((item.strip()[:255], False))
+        else:
+            errors["subtasks"] = ["Each subtask needs a title."]
+
+    if errors:
+        return None, errors
+    return {
+        "title": title,
+        "description": str(record.get("description") or ""),
+        "status": status,
+        "priority": priority,
+        "due_date": due_date,
+        "assignees": {str(name) for name in lists["assignees"]},
+        "labels": {str(name)[:64] for name in lists["labels"]},
+        "subtasks": subtasks,
+    }, None
+
+
+# --------------------------------------------------------------------
+# 🔹 Importer
+# --------------------------------------------------------------------
+class TaskImporter:
+    """
+    Create the tasks of a record stream in one project. Each chunk is
+    validated, resolved against in-memory maps of users and labels and
+    written with one bulk_create per table in its own transaction, so
+    invalid rows are skipped without holding back the rest. bulk_create
+    sends no signals: search rows and stats deltas are applied per chunk,
+    the cache version and a single summary ActivityLog entry once at the end.
+    """
+
+    def __init__(self, project, user, dry_run=False, chunk_size=None):
+        self.project = project
+        self.user = user
+        self.dry_run = dry_run
+        self.chunk_size = chunk_size or import_setting("CHUNK_SIZE")
+        self.labels = dict(Label.objects.filter(project=project).values_list("name", "id"))
+        self.users = {}
+        self.summary = {
+            "dry_run": dry_run,
+            "rows": 0,
+            "created": 0,
+            "invalid": 0,
+            "subtasks": 0,
+            "assignees": 0,
+            "labels_created": 0,
+            "unknown_users": [],
+            "errors": [],
+            "aborted": None,
+        }
+
+    def run(self, records):
+        """Import everything; the summary."""
+        for _ in self.iter_run(records):
+            pass
+        return self.summary
+
+    def iter_run(self, records):
+        """Import chunk by chunk, yielding the running summary after each."""
+        try:
+            for chunk in chunked(records, self.chunk_size):
+                self.import_chunk(chunk)
+                yield self.summary
+        except STREAM_ERRORS as exc:
+            self.summary["aborted"] = f"Unreadable input after row {self.summary['rows']}: {exc}"
+        if self.summary["created"] and not self.dry_run:
+            self.finish()
+
+    def resolve_users(self, names):
+        missing = [name for name in names if name not in self.users]
+        if missing:
+            found = dict(User.objects.filter(username__in=missing).values_list("username", "id"))
+            for name in missing:
+                self.users[name] = found.get(name)
+                unknown = self.summary["unknown_users"]
+                if found.get(name) is None and len(unknown) < import_setting("MAX_ERRORS"):
+                    unknown.append(name)
+
+    def import_chunk(self, chunk):
+        summary = self.summary
+        valid = []
+        for record in chunk:
+            summary["rows"] += 1
+            data, errors = clean_record(record)
+            if errors:
+                summary["invalid"] += 1
+                if len(summary["errors"]) < import_setting("MAX_ERRORS"):
+                    summary["errors"].append({"row": summary["rows"], "errors": errors})
+            else:
+                valid.append(data)
+        if not valid:
+            return
+
+        self.resolve_users({name for data in valid for name in data["assignees"]})
+        new_labels = sorted({name for data in valid for name in data["labels"]} - self.labels.keys())
+        if self.dry_run:
+            self.labels.update(dict.fromkeys(new_labels))
+            self.count(valid, new_labels, assignees=0)
+            return
+
+        with transaction.atomic():
+            if new_labels:
+                # Another import may add the same name meanwhile; take whichever row won
+                Label.objects.bulk_create(
+                    (Label(project=self.project, name=name) for name in new_labels), ignore_conflicts=True
+                )
+                self.labels.update(
+                    Label.objects.filter(project=self.project, name__in=new_labels).values_list("name", "id")
+                )
+
+            tasks, subtasks, assignees, task_labels = [], [], [], []
+            for data in valid:
+                task = Task(
+                    project=self.project,
+                    creator=self.user,
+                    title=data["title"],
+                    description=data["description"],
+                    status=data["status"],
+                    priority=data["priority"],
+                    due_date=data["due_date"],
+                )
+                tasks.append(task)
+                subtasks += [Subtask(task=task, title=title, is_done=done) for title, done in data["subtasks"]]
+                assignees += [
+                    TaskAssignee(task=task, user_id=self.users[name])
+                    for name in data["assignees"] if self.users[name]
+                ]
+                task_labels += [TaskLabel(task=task, label_id=self.labels[name]) for name in data["labels"]]
+
+            Task.objects.bulk_create(tasks)
+            Subtask.objects.bulk_create(subtasks)
+            TaskAssignee.objects.bulk_create(assignees)
+            TaskLabel.objects.bulk_create(task_labels)
+            reindex_tasks([task.pk for task in tasks])
+            bump_project_stats(
+                self.project.pk,
+                task_count=len(tasks),
+                subtask_count=len(subtasks),
+                subtask_done_count=sum(subtask.is_done for subtask in subtasks),
+                **Counter(STATUS_COUNTERS[task.status] for task in tasks),
+            )
+            if new_labels:
+                refresh_label_count(self.project.pk)  # conflicting names were not created
+        self.count(valid, new_labels, len(assignees))
+
+    def count(self, valid, new_labels, assignees):
+        summary = self.summary
+        summary["created"] += len(valid)
+        summary["subtasks"] += sum(len(data["subtasks"]) for data in valid)
+        summary["assignees"] += assignees
+        summary["labels_created"] += len(new_labels)
+
+    def finish(self):
+        summary = self.summary
+        bump_project_version_on_commit(self.project.pk)
+        publish(self.project.pk, {"type": "task", "op": "import", "ids": [], "created": summary["created"]})
+        log_activity(
+            project=self.project,
+            user=self.user,
+            action="BULK",
+            object_type="Task",
+            description="{} imported {} task(s) with {} subtask(s); {} row(s) skipped.".format(
+                self.user.username, summary["created"], summary["subtasks"], summary["invalid"]
+            ),
+        )
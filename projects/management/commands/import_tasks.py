@@ -0,0 +1,75 @@
+import sys
+
+from django.contrib.auth import get_user_model
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+
+from projects.imports import TaskImporter, open_records
+from projects.models import Project
+
+
+class Command(BaseCommand):
+    help = "Imports tasks (with subtasks, labels and assignees) into a project from a CSV or NDJSON file."
+
+    def add_arguments(self, parser):
+        parser.add_argument("project_id", help="Project to import into.")
+        parser.add_argument("path", help="Input file (.csv, .ndjson, optionally .gz), or - for stdin.")
+        parser.add_argument(
+            "--format",
+            choices=["csv", "ndjson"],
+            help="Input format (default: from the file extension).",
+        )
+        parser.add_argument("--gzip", action="store_true", help="Input is gzip-compressed.")
+        parser.add_argument(
+            "--user",
+            help="Username recorded as creator (default: the project's creator).",
+        )
+        parser.add_argument("--dry-run", action="store_true", help="Validate only, write nothing.")
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=None,
+            help="Rows validated and written per transaction.",
+        )
+
+    def handle(self, *args, **options):
+        try:
+            project = Project.objects.select_related("created_by").get(pk=options["project_id"])
+        except (Project.DoesNotExist, ValidationError) as exc:
+            raise CommandError(f"Project {options['project_id']} not found.") from exc
+
+        user = project.created_by
+        if options["user"]:
+            user = get_user_model().objects.filter(username=options["user"]).first()
+        if user is None:
+            raise CommandError("No user to record as creator; pass --user.")
+
+        path = options["path"]
+        name = path[:-3] if path.endswith(".gz") else path
+        kind = options["format"] or ("ndjson" if name.endswith((".ndjson", ".jsonl")) else "csv")
+        compressed = options["gzip"] or path.endswith(".gz")
+
+        importer = TaskImporter(project, user, dry_run=options["dry_run"], chunk_size=options["chunk_size"])
+        stream = sys.stdin.buffer if path == "-" else open(path, "rb")
+        try:
+            for summary in importer.iter_run(open_records(stream, kind, compressed)):
+                self.stdout.write(
+                    f"… {summary['rows']} row(s) read, {summary['created']} valid, {summary['invalid']} skipped"
+                )
+        finally:
+            if stream is not sys.stdin.buffer:
+                stream.close()
+
+        summary = importer.summary
+        for error in summary["errors"]:
+            self.stdout.write(self.style.WARNING(f"Row {error['row']}: {error['errors']}"))
+        if summary["unknown_users"]:
+            self.stdout.write(self.style.WARNING(f"Unknown users (not assigned): {', '.join(summary['unknown_users'])}"))
+        if summary["aborted"]:
+            self.stdout.write(self.style.ERROR(summary["aborted"]))
+
+        verb = "Validated" if summary["dry_run"] else "Imported"
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ {verb} {summary['created']} task(s), {summary['subtasks']} subtask(s); "
+            f"{summary['labels_created']} new label(s), {summary['invalid']} row(s) skipped."
+        ))
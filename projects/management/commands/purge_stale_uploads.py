@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from projects.uploads import purge_stale_uploads, upload_setting
+
+
+class Command(BaseCommand):
+    help = "Deletes resumable attachment uploads (and their partial files) idle for longer than the upload TTL."
+
+    def handle(self, *args, **options):
+        count = purge_stale_uploads()
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ Purged {count} upload(s) idle for more than {upload_setting('TTL')} seconds."
+        ))
@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from projects.search import get_backend, rebuild_index
+
+
+class Command(BaseCommand):
+    help = "Builds the full-text task search index from existing tasks and comments."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "project_ids",
+            nargs="*",
+            help="Only rebuild these projects (default: all projects).",
+        )
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=500,
+            help="Tasks read and written per batch.",
+        )
+
+    def handle(self, *args, **options):
+        if get_backend() is None:
+            self.stdout.write(self.style.WARNING(
+                "This database has no full-text backend; search falls back to LIKE scans."
+            ))
+            return
+
+        with transaction.atomic():
+            count = rebuild_index(options["project_ids"] or None, options["chunk_size"])
+
+        self.stdout.write(self.style.SUCCESS(f"✅ Indexed {count} task(s)."))
@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+
+from projects.models import Project
+from projects.stats import recompute_project_stats
+
+
+class Command(BaseCommand):
+    help = "Rebuilds the denormalized ProjectStats counters from the source tables."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "project_ids",
+            nargs="*",
+            help="Only recompute these projects (default: all projects).",
+        )
+
+    def handle(self, *args, **options):
+        project_ids = options["project_ids"] or Project.objects.values_list("pk", flat=True).iterator()
+
+        count = 0
+        for project_id in project_ids:
+            if recompute_project_stats(project_id) is None:
+                self.stdout.write(self.style.WARNING(f"Project {project_id} not found, skipped."))
+                continue
+            count += 1
+
+        self.stdout.write(self.style.SUCCESS(f"✅ Recomputed stats for {count} project(s)."))
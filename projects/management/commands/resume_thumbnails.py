@@ -0,0 +1,45 @@
+from datetime import timedelta
+
+from django.apps import apps
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+from django.utils import timezone
+
+from projects.models import Attachment
+from projects.thumbnails import PENDING, run_job
+
+
+class Command(BaseCommand):
+    help = (
+        "Generates thumbnails still pending after --older-than seconds: their background "
+        "job was lost, e.g. when the process restarted before running it."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--older-than",
+            type=int,
+            default=600,
+            help="Seconds a row may stay pending before its job counts as lost.",
+        )
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(seconds=options["older_than"])
+        attachments = (
+            Attachment.objects.filter(thumbnails={}, created_at__lt=cutoff, content_type__startswith="image/")
+            .exclude(content_type="image/svg+xml")
+            .values_list("file", flat=True)
+        )
+        # Profiles carry the time their job was queued (older rows: none, so always stale)
+        profiles = (
+            apps.get_model("accounts", "Profile").objects.exclude(Q(avatar="") | Q(avatar=None))
+            .filter(Q(thumbnails={}) | Q(thumbnails__status=PENDING, thumbnails__queued_at__lt=cutoff.timestamp()))
+            .values_list("avatar", flat=True)
+        )
+
+        jobs = [(Attachment, "file", name) for name in set(attachments)]
+        jobs += [(profiles.model, "avatar", name) for name in set(profiles)]
+        for model, field, name in jobs:
+            run_job(model, field, name, in_worker=False)  # updates every row sharing the file
+
+        self.stdout.write(self.style.SUCCESS(f"✅ Generated thumbnails for {len(jobs)} file(s)."))
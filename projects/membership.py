@@ -0,0 +1,208 @@
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+
+# --------------------------------------------------------------------
+# 🔹 Settings
+# --------------------------------------------------------------------
+DEFAULTS = {
+    "ENABLED": False,      # needs a cache shared by every worker (REDIS_URL)
+    "BACKEND": "local",    # "local" (per-process LRU) or "shared" (Django cache)
+    "MAX_ENTRIES": 10000,
+    "TTL": 60,             # seconds; bounds staleness of local entries across workers
+}
+
+MISSING = object()
+
+
+def membership_setting(name):
+    return getattr(settings, "MEMBERSHIP_CACHE", {}).get(name, DEFAULTS[name])
+
+
+# --------------------------------------------------------------------
+# 🔹 Backends
+# --------------------------------------------------------------------
+class RoleEntry:
+    __slots__ = ("role", "expires_at")
+
+    def __init__(self, role, expires_at):
+        self.role = role
+        self.expires_at = expires_at
+
+
+class LocalRoleCache:
+    """
+    Bounded, thread-safe LRU of (user_id, project_id) -> role. Non-members
+    are not kept: a member added through another worker would be refused
+    here until the entry expired.
+    """
+
+    def __init__(self, max_entries, ttl):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return MISSING
+            if entry.expires_at < time.monotonic():
+                del self._entries[key]
+                self.expirations += 1
+                return MISSING
+            self._entries.move_to_end(key)
+            return entry.role
+
+    def set(self, key, role):
+        if role is None:
+            return
+        with self._lock:
+            self._entries[key] = RoleEntry(role, time.monotonic() + self.ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        return {
+            "size": len(self._entries),
+            "max_entries": self.max_entries,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+        }
+
+
+class SharedRoleCache:
+    """
+    Stores roles in Django's cache so every worker sees the same entry and
+    a signal-driven delete is visible everywhere at once.
+    """
+
+    NON_MEMBER = ""
+
+    def __init__(self, ttl):
+        self.ttl = ttl
+
+    def _key(self, key):
+        user_id, project_id = key
+        return f"project-role:{project_id}:{user_id}"
+
+    def get(self, key):
+        role = cache.get(self._key(key), MISSING)
+        if role == self.NON_MEMBER:
+            return None
+        return role
+
+    def set(self, key, role):
+        cache.set(self._key(key), role if role is not None else self.NON_MEMBER, self.ttl)
+
+    def delete(self, key):
+        cache.delete(self._key(key))
+
+    def clear(self):
+        pass  # entries expire on their own; nothing process-local to drop
+
+    def stats(self):
+        return {}
+
+
+# --------------------------------------------------------------------
+# 🔹 Public API
+# --------------------------------------------------------------------
+class MembershipCache:
+    def __init__(self):
+        self._backend = None
+        self._backend_config = None
+        self._counter_lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    @property
+    def backend(self):
+        config = (
+            membership_setting("BACKEND"),
+            membership_setting("MAX_ENTRIES"),
+            membership_setting("TTL"),
+        )
+        if self._backend is None or config != self._backend_config:
+            name, max_entries, ttl = config
+            if name == "shared":
+                self._backend = SharedRoleCache(ttl)
+            else:
+                self._backend = LocalRoleCache(max_entries, ttl)
+            self._backend_config = config
+        return self._backend
+
+    @staticmethod
+    def key(user_id, project_id):
+        return (user_id, str(project_id))
+
+    def get_role(self, user_id, project_id, loader):
+        """Return the cached role, calling `loader()` on a miss."""
+        if not membership_setting("ENABLED"):
+            return loader()
+        key = self.key(user_id, project_id)
+        role = self.backend.get(key)
+        if role is not MISSING:
+            self._count("hits")
+            return role
+        self._count("misses")
+        role = loader()
+        self.backend.set(key, role)
+        return role
+
+    def invalidate(self, user_id, project_id):
+        self._count("invalidations")
+        self.backend.delete(self.key(user_id, project_id))
+
+    def clear(self):
+        self.backend.clear()
+        with self._counter_lock:
+            self.hits = self.misses = self.invalidations = 0
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "enabled": membership_setting("ENABLED"),
+            "backend": membership_setting("BACKEND"),
+            "hits": self.hits,
+            "misses": self.misses,
+            "invalidations": self.invalidations,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+            **self.backend.stats(),
+        }
+
+    def _count(self, name):
+        with self._counter_lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+
+membership_cache = MembershipCache()
+
+
+def invalidate_membership_on_commit(user_id, project_id):
+    """
+    Drop the entry now and again after commit, so a lookup that raced the
+    write can't leave the old role behind.
+    """
+    membership_cache.invalidate(user_id, project_id)
+    if transaction.get_connection().in_atomic_block:
+        transaction.on_commit(lambda: membership_cache.invalidate(user_id, project_id))
@@ -0,0 +1,35 @@
+# Generated by Django 5.2.7 on 2026-10-18 10:20
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('projects', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProjectStats',
+            fields=[
+                ('project', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stats', serialize=False, to='projects.project')),
+                ('task_count', models.IntegerField(default=0)),
+                ('todo_count', models.IntegerField(default=0)),
+                ('in_progress_count', models.IntegerField(default=0)),
+                ('done_count', models.IntegerField(default=0)),
+                ('blocked_count', models.IntegerField(default=0)),
+                ('subtask_count', models.IntegerField(default=0)),
+                ('subtask_done_count', models.IntegerField(default=0)),
+                ('comment_count', models.IntegerField(default=0)),
+                ('attachment_count', models.IntegerField(default=0)),
+                ('member_count', models.IntegerField(default=0)),
+                ('label_count', models.IntegerField(default=0)),
+                ('last_activity_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'verbose_name_plural': 'Project stats',
+            },
+        ),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 5.2.7 on 2026-10-18 10:32
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('projects', '0002_projectstats'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='comment',
+            name='projects_co_task_id_769071_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='task',
+            name='projects_ta_project_a65709_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='task',
+            name='projects_ta_project_6695a1_idx',
+        ),
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(fields=['task', 'created_at', 'id'], name='projects_co_task_id_341dd3_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['project', 'priority', 'id'], name='projects_ta_project_5ed3cb_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['project', 'due_date', 'id'], name='projects_ta_project_7b2027_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['project', 'created_at', 'id'], name='projects_ta_project_4b0be8_idx'),
+        ),
+    ]
@@ -0,0 +1,50 @@
+from django.db import migrations
+
+# The DDL is spelled out here rather than taken from projects.search, so
+# later changes to the app code never alter what this migration does.
+INSTALL = {
+    "sqlite": [
+        "CREATE VIRTUAL TABLE IF NOT EXISTS projects_task_fts USING fts5("
+        "task_id UNINDEXED, project_id UNINDEXED, title, description, comments, "
+        "tokenize = 'unicode61 remove_diacritics 2')",
+    ],
+    "postgresql": [
+        "CREATE TABLE IF NOT EXISTS projects_task_search ("
+        "task_id uuid PRIMARY KEY REFERENCES projects_task (id) "
+        "ON DELETE CASCADE DEFERRABLE INITIALLY DEFERRED, "
+        "project_id uuid NOT NULL, "
+        "comments text NOT NULL DEFAULT '', "
+        "document tsvector NOT NULL)",
+        "CREATE INDEX IF NOT EXISTS projects_task_search_document "
+        "ON projects_task_search USING GIN (document)",
+        "CREATE INDEX IF NOT EXISTS projects_task_search_project ON projects_task_search (project_id)",
+    ],
+}
+
+UNINSTALL = {
+    "sqlite": ["DROP TABLE IF EXISTS projects_task_fts"],
+    "postgresql": ["DROP TABLE IF EXISTS projects_task_search"],
+}
+
+
+def run(statements):
+    def apply(apps, schema_editor):
+        for statement in statements.get(schema_editor.connection.vendor, []):
+            schema_editor.execute(statement)
+    return apply
+
+
+class Migration(migrations.Migration):
+    """
+    Full-text index for task search: an FTS5 table on SQLite, a tsvector
+    table with a GIN index on PostgreSQL. Existing rows are filled by
+    `manage.py rebuild_search_index`.
+    """
+
+    dependencies = [
+        ('projects', '0003_keyset_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(run(INSTALL), run(UNINSTALL)),
+    ]
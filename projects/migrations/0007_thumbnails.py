@@ -0,0 +1,18 @@
+# Generated by Django 5.2.7 on 2026-10-18 11:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('projects', '0006_content_addressed_uploads'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='attachment',
+            name='thumbnails',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+    ]
@@ -1,17 +1,67 @@
 from django.conf import settings
-from django.db import models
+from django.db import models, transaction
 from django.utils import timezone
 import uuid
 
 User = settings.AUTH_USER_MODEL
 
+# Remembers the values a row was loaded with, so signal handlers can see
+# what actually changed on save without re-reading the database.
+#
+# Saves that write a `locked_fields` column re-read the tracked values
+# from the row, locked until the save commits: counters take deltas from
+# them, and two requests saving the same transition (todo -> done) must
+# not both apply it.
+class TrackedFieldsMixin:
+    tracked_fields = ()
+    locked_fields = ()
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance.remember_tracked_fields()
+        return instance
+
+    def remember_tracked_fields(self):
+        self._loaded_values = {
+            name: self.__dict__[name] for name in self.tracked_fields if name in self.__dict__
+        }
+
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get("update_fields")
+        written = self.locked_fields if update_fields is None else set(self.locked_fields) & set(update_fields)
+        if self._state.adding or not written:
+            return super().save(*args, **kwargs)
+        with transaction.atomic(using=kwargs.get("using")):
+            self.lock_tracked_fields()
+            return super().save(*args, **kwargs)
+
+    def lock_tracked_fields(self):
+        row = (
+            type(self)._base_manager.select_for_update()
+            .filter(pk=self.pk)
+            .values(*self.tracked_fields)
+            .first()
+        )
+        if row is not None:
+            self._loaded_values = row
+
+    def loaded_value(self, name, default=None):
+        return getattr(self, "_loaded_values", {}).get(name, default)
+
+    def has_loaded_value(self, name):
+        return name in getattr(self, "_loaded_values", {})
+
+
 # Soft-delete mixin
 class SoftDeleteModel(models.Model):
     deleted_at = models.DateTimeField(null=True, blank=True, db_index=True)
 
     def soft_delete(self):
         self.deleted_at = timezone.now()
-        self.save(update_fields=["deleted_at"])
+        # auto_now fields (updated_at) move too, so delta sync sees the delete
+        touched = [f.name for f in self._meta.concrete_fields if getattr(f, "auto_now", False)]
+        self.save(update_fields=["deleted_at", *touched])
 
     class Meta:
         abstract = True
@@ -43,6 +93,31 @@ class Project(models.Model):
         return self.name
 
 
+class ProjectStats(models.Model):
+    """Denormalized per-project counters, kept current by events.signals"""
+    project = models.OneToOneField(
+        Project, on_delete=models.CASCADE, primary_key=True, related_name="stats"
+    )
+    task_count = models.IntegerField(default=0)
+    todo_count = models.IntegerField(default=0)
+    in_progress_count = models.IntegerField(default=0)
+    done_count = models.IntegerField(default=0)
+    blocked_count = models.IntegerField(default=0)
+    subtask_count = models.IntegerField(default=0)
+    subtask_done_count = models.IntegerField(default=0)
+    comment_count = models.IntegerField(default=0)
+    attachment_count = models.IntegerField(default=0)
+    member_count = models.IntegerField(default=0)
+    label_count = models.IntegerField(default=0)
+    last_activity_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        verbose_name_plural = "Project stats"
+
+    def __str__(self):
+        return f"Stats({self.project_id})"
+
+
 class ProjectMember(models.Model):
     """User membership + role in a project"""
     class Role(models.TextChoices):
@@ -79,8 +154,11 @@ class Label(models.Model):
         return f"{self.name} ({self.project})"
 
 
-class Task(SoftDeleteModel):
+class Task(TrackedFieldsMixin, SoftDeleteModel):
     objects = SoftDeleteManager()
+    tracked_fields = ("status", "deleted_at", "title", "description")
+    locked_fields = ("status", "deleted_at")
+
     class Status(models.TextChoices):
         TODO = "TODO", "To Do"
         IN_PROGRESS = "IN_PROGRESS", "In Progress"
@@ -106,10 +184,13 @@ class Task(SoftDeleteModel):
     # deleted_at from SoftDeleteModel
 
     class Meta:
+        # Composite keys match the keyset pagination orderings (see pagination.py)
         indexes = [
             models.Index(fields=["project", "status"]),
-            models.Index(fields=["project", "priority"]),
-            models.Index(fields=["project", "due_date"]),
+            models.Index(fields=["project", "priority", "id"]),
+            models.Index(fields=["project", "due_date", "id"]),
+            models.Index(fields=["project", "created_at", "id"]),
+            models.Index(fields=["project", "updated_at", "id"]),  # delta sync (sync.py)
         ]
         ordering = ["-created_at"]
 
@@ -117,7 +198,10 @@ class Task(SoftDeleteModel):
         return f"{self.title} ({self.project})"
 
 
-class Subtask(models.Model):
+class Subtask(TrackedFieldsMixin, models.Model):
+    tracked_fields = ("is_done",)
+    locked_fields = ("is_done",)
+
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     task = models.ForeignKey(Task, on_delete=models.CASCADE, related_name="subtasks")
     title = models.CharField(max_length=255)
@@ -161,21 +245,37 @@ class Comment(models.Model):
     edited_at = models.DateTimeField(null=True, blank=True)
 
     class Meta:
-        indexes = [models.Index(fields=["task", "created_at"])]
+        indexes = [models.Index(fields=["task", "created_at", "id"])]
         ordering = ["created_at"]
 
     def __str__(self):
         return f"Comment by {self.author} on {self.task}"
 
 
+class Blob(models.Model):
+    """Stored file content, named by its SHA-256 and shared by every Attachment with those bytes"""
+    sha256 = models.CharField(max_length=64, primary_key=True)
+    file = models.FileField(max_length=255)
+    size = models.BigIntegerField()
+    ref_count = models.IntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return self.sha256
+
+
 class Attachment(models.Model):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     task = models.ForeignKey(Task, on_delete=models.CASCADE, related_name="attachments")
     uploader = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, related_name="attachments")
-    file = models.FileField(upload_to="attachments/%Y/%m/%d/")
+    file = models.FileField(upload_to="attachments/%Y/%m/%d/", max_length=255)
+    # Null for attachments stored before content addressing (see projects.uploads)
+    blob = models.ForeignKey(Blob, on_delete=models.PROTECT, null=True, blank=True, related_name="attachments")
     filename = models.CharField(max_length=512, blank=True)
     content_type = models.CharField(max_length=128, blank=True)
     size = models.BigIntegerField(null=True, blank=True)
+    # Resized previews of image files (see projects.thumbnails); empty while pending
+    thumbnails = models.JSONField(default=dict, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
 
     class Meta:
@@ -185,6 +285,26 @@ class Attachment(models.Model):
         return self.filename
 
 
+class UploadSession(models.Model):
+    """A resumable attachment upload: chunks are appended to a partial file until `size` bytes arrived"""
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    task = models.ForeignKey(Task, on_delete=models.CASCADE, related_name="upload_sessions")
+    uploader = models.ForeignKey(User, on_delete=models.CASCADE, related_name="upload_sessions")
+    filename = models.CharField(max_length=512)
+    content_type = models.CharField(max_length=128, blank=True)
+    size = models.BigIntegerField()
+    received = models.BigIntegerField(default=0)
+    sha256 = models.CharField(max_length=64, blank=True)  # expected digest, if the client sent one
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [models.Index(fields=["updated_at"])]
+
+    def __str__(self):
+        return f"{self.filename} ({self.received}/{self.size})"
+
+
 class ActivityLog(models.Model):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     project = models.ForeignKey(Project, on_delete=models.CASCADE, related_name="activity_logs")
@@ -0,0 +1,212 @@
+import base64
+import binascii
+import json
+
+from django.db import connections
+from django.db.models import F, Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """
+    Cursor pagination over a composite, unique sort key such as
+    (created_at, id). Each page is a range scan that starts right after the
+    last row of the previous one, so deep pages cost the same as the first
+    and no COUNT(*) is run unless the client asks for one.
+
+    Views configure it with:
+      cursor_ordering   default key, e.g. ("-created_at", "-id")
+      ordering_fields   fields a client may pick with ?ordering=; the
+                        primary key is appended as tie-breaker
+    ?count=exact adds the exact total, ?count=estimate a cheap estimate.
+    """
+    page_size = api_settings.PAGE_SIZE or 20
+    page_size_query_param = "page_size"
+    max_page_size = 100
+    cursor_query_param = "cursor"
+    ordering_query_param = "ordering"
+    count_query_param = "count"
+    estimate_cap = 10000
+    invalid_cursor_message = "Invalid cursor"
+
+    # --- configuration ---
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return max(1, min(size, self.max_page_size))
+
+    def get_ordering(self, request, view, model):
+        requested = request.query_params.get(self.ordering_query_param, "")
+        if requested.lstrip("-") in getattr(view, "ordering_fields", ()):
+            prefix = "-" if requested.startswith("-") else ""
+            return (requested, f"{prefix}{model._meta.pk.name}")
+        return tuple(getattr(view, "cursor_ordering", ("-created_at", "-id")))
+
+    # --- cursor encoding ---
+    def encode_cursor(self, ordering, values, reverse):
+        payload = {"o": ",".join(ordering), "v": values, "r": reverse}
+        raw = json.dumps(payload, separators=(",", ":"), default=str).encode()
+        return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+    def decode_cursor(self, request, ordering):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None, False
+        try:
+            raw = base64.urlsafe_b64decode(encoded + "=" * (-len(encoded) % 4))
+            payload = json.loads(raw)
+            values, reverse = payload["v"], bool(payload["r"])
+            if payload["o"] != ",".join(ordering) or len(values) != len(ordering):
+                raise ValueError
+        except (binascii.Error, ValueError, KeyError, TypeError):
+            raise NotFound(self.invalid_cursor_message)
+        return values, reverse
+
+    # --- query building ---
+    def keyset_filter(self, keys, values):
+        """
+        Rows strictly after `values` in the order given by `keys`, a list of
+        (model field, descending, nulls_last). Expands to
+        (k1 > v1) OR (k1 = v1 AND k2 > v2) OR ...
+        """
+        branches, equal = [], Q()
+        for (field, descending, nulls_last), raw in zip(keys, values):
+            name = field.name
+            value = field.to_python(raw) if raw is not None else None
+            if value is None:
+                after = Q(**{f"{name}__isnull": False}) if not nulls_last else None
+                same = Q(**{f"{name}__isnull": True})
+            else:
+                after = Q(**{f"{name}__{'lt' if descending else 'gt'}": value})
+                if field.null and nulls_last:
+                    after |= Q(**{f"{name}__isnull": True})
+                same = Q(**{name: value})
+            if after is not None:
+                branches.append(equal & after)
+            equal &= same
+        condition = Q()
+        for branch in branches:
+            condition |= branch
+        return condition if branches else Q(pk__in=[])
+
+    def paginate_queryset(self, queryset, request, view=None):
+        model = queryset.model
+        self.request = request
+        self.page_size_value = self.get_page_size(request)
+        self.ordering = self.get_ordering(request, view, model)
+        values, self.reverse = self.decode_cursor(request, self.ordering)
+        self.count = self.get_count(queryset, request)
+
+        keys, order_by = [], []
+        for item in self.ordering:
+            descending = item.startswith("-")
+            field = model._meta.get_field(item.lstrip("-"))
+            if self.reverse:
+                descending = not descending
+            nulls_last = not self.reverse
+            keys.append((field, descending, nulls_last))
+            nulls = {"nulls_last": True} if nulls_last else {"nulls_first": True}
+            expression = F(field.name)
+            order_by.append(expression.desc(**nulls) if descending else expression.asc(**nulls))
+        self.keys = keys
+
+        queryset = queryset.order_by(*order_by)
+        if values is not None:
+            queryset = queryset.filter(self.keyset_filter(keys, values))
+
+        rows = list(queryset[: self.page_size_value + 1])
+        has_more = len(rows) > self.page_size_value
+        rows = rows[: self.page_size_value]
+        if self.reverse:
+            rows.reverse()
+            self.has_next, self.has_previous = True, has_more
+        else:
+            self.has_next, self.has_previous = has_more, values is not None
+        self.page = rows
+        return rows
+
+    # --- counts ---
+    def get_count(self, queryset, request):
+        mode = request.query_params.get(self.count_query_param)
+        if mode == "exact":
+            return {"count": queryset.count(), "count_is_estimate": False}
+        if mode == "estimate":
+            count, is_estimate = self.estimate_count(queryset)
+            return {"count": count, "count_is_estimate": is_estimate}
+        return None
+
+    def estimate_count(self, queryset):
+        """
+        Planner row estimate on PostgreSQL; elsewhere an exact count capped
+        at `estimate_cap` rows (flagged as an estimate when the cap is hit).
+        """
+        queryset = queryset.order_by()
+        connection = connections[queryset.db]
+        if connection.vendor == "postgresql":
+            sql, params = queryset.query.sql_with_params()
+            with connection.cursor() as cursor:
+                cursor.execute(f"EXPLAIN (FORMAT JSON) {sql}", params)
+                plan = cursor.fetchone()[0]
+            if isinstance(plan, str):
+                plan = json.loads(plan)
+            return int(plan[0]["Plan"]["Plan Rows"]), True
+        count = queryset[: self.estimate_cap].count()
+        return count, count >= self.estimate_cap
+
+    # --- links ---
+    def row_values(self, row):
+        return [getattr(row, field.attname) for field, _, _ in self.keys]
+
+    def build_link(self, row, reverse):
+        url = self.request.build_absolute_uri()
+        cursor = self.encode_cursor(self.ordering, self.row_values(row), reverse)
+        return replace_query_param(url, self.cursor_query_param, cursor)
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.build_link(self.page[-1], reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        if not self.page:
+            return remove_query_param(self.request.build_absolute_uri(), self.cursor_query_param)
+        return self.build_link(self.page[0], reverse=True)
+
+    def get_paginated_response(self, data):
+        body = {"next": self.get_next_link(), "previous": self.get_previous_link()}
+        if self.count is not None:
+            body.update(self.count)
+        body["results"] = data
+        return Response(body)
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            "type": "object",
+            "required": ["results"],
+            "properties": {
+                "next": {"type": "string", "nullable": True, "format": "uri"},
+                "previous": {"type": "string", "nullable": True, "format": "uri"},
+                "count": {"type": "integer"},
+                "count_is_estimate": {"type": "boolean"},
+                "results": schema,
+            },
+        }
+
+    def get_schema_operation_parameters(self, view):
+        return [
+            {"name": self.cursor_query_param, "required": False, "in": "query",
+             "description": "Opaque pagination cursor.", "schema": {"type": "string"}},
+            {"name": self.page_size_query_param, "required": False, "in": "query",
+             "description": "Number of results per page.", "schema": {"type": "integer"}},
+            {"name": self.count_query_param, "required": False, "in": "query",
+             "description": "Include a total: 'exact' or 'estimate'.",
+             "schema": {"type": "string", "enum": ["exact", "estimate"]}},
+        ]
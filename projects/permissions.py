@@ -1,5 +1,34 @@
 from rest_framework import permissions
 from .models import ProjectMember, Project
+from .membership import membership_cache
+
+
+def get_view_project_id(view):
+    return view.kwargs.get("project_pk") or view.kwargs.get("pk")
+
+
+def get_project_role(request, project_id):
+    """
+    Role of the requesting user in a project, or None if not a member.
+    Looked up once per request and memoized on it, so every permission
+    class and the view share a single lookup; across requests the role is
+    served from the membership cache (see projects.membership).
+    """
+    if not project_id or not request.user.is_authenticated:
+        return None
+    roles = getattr(request, "_project_roles", None)
+    if roles is None:
+        roles = request._project_roles = {}
+    key = str(project_id)
+    if key not in roles:
+        roles[key] = membership_cache.get_role(
+            request.user.id,
+            project_id,
+            lambda: ProjectMember.objects.filter(project_id=project_id, user_id=request.user.id)
+            .values_list("role", flat=True)
+            .first(),
+        )
+    return roles[key]
 
 
 class IsProjectMember(permissions.BasePermission):
@@ -8,12 +37,7 @@ class IsProjectMember(permissions.BasePermission):
     """
 
     def has_permission(self, request, view):
-        project_id = view.kwargs.get("project_pk") or view.kwargs.get("pk")
-        if not project_id:
-            return False
-        return ProjectMember.objects.filter(
-            project_id=project_id, user=request.user
-        ).exists()
+        return get_project_role(request, get_view_project_id(view)) is not None
 
 
 class IsOwnerOrAdmin(permissions.BasePermission):
@@ -22,17 +46,12 @@ class IsOwnerOrAdmin(permissions.BasePermission):
     """
 
     def has_permission(self, request, view):
-        project_id = view.kwargs.get("project_pk") or view.kwargs.get("pk")
-        if not project_id:
-            return False
-        membership = ProjectMember.objects.filter(
-            project_id=project_id, user=request.user
-        ).first()
-        if not membership:
+        role = get_project_role(request, get_view_project_id(view))
+        if not role:
             return False
         if request.method in permissions.SAFE_METHODS:
             return True
-        return membership.role in ["OWNER", "ADMIN"]
+        return role in ["OWNER", "ADMIN"]
 
 
 class IsTaskAssigneeOrAdmin(permissions.BasePermission):
@@ -47,21 +66,21 @@ class IsTaskAssigneeOrAdmin(permissions.BasePermission):
             return True
 
         # Admins/owners always allowed
-        membership = ProjectMember.objects.filter(
-            project=obj.project, user=request.user
-        ).first()
-        if not membership:
+        role = get_project_role(request, obj.project_id)
+        if not role:
             return False
-        if membership.role in ["OWNER", "ADMIN"]:
+        if role in ["OWNER", "ADMIN"]:
             return True
 
-        # For non-admins: allow edit only if user is assignee or creator
-        return obj.creator == request.user or obj.assignees.filter(user=request.user).exists()
+        # For non-admins: allow edit only if user is assignee or creator.
+        # Iterating assignees reuses the view's prefetch when there is one.
+        if obj.creator_id == request.user.id:
+            return True
+        return any(a.user_id == request.user.id for a in obj.assignees.all())
 
 class IsNotViewer(permissions.BasePermission):
     def has_permission(self, request, view):
-        project_id = view.kwargs.get("project_pk")
         if request.method in permissions.SAFE_METHODS:
             return True
-        member = ProjectMember.objects.filter(project_id=project_id, user=request.user).first()
-        return member and member.role != "VIEWER"
\ No newline at end of file
+        role = get_project_role(request, view.kwargs.get("project_pk"))
+        return bool(role) and role != "VIEWER"
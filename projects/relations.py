@@ -0,0 +1,67 @@
+from collections import namedtuple
+
+
+SyncResult = namedtuple("SyncResult", ["added", "removed", "updated"])
+
+
+# --------------------------------------------------------------------
+# 🔹 Set-difference sync of link rows
+# --------------------------------------------------------------------
+def sync_relation(model, parent_field, target_field, wanted, allowed_targets=None):
+    """
+    Make the `model` rows linking each parent to its targets match `wanted`
+    exactly, touching only what differs.
+
+    `wanted` maps a parent id to an iterable of target ids, or to a dict
+    {target id: {field: value}} when the link rows carry data (a member's
+    role, say). Rows are diffed against one SELECT of the current links,
+    then written with at most one DELETE, one bulk INSERT and one bulk
+    UPDATE. `allowed_targets` (a queryset) silently drops unknown targets.
+
+    bulk_create/bulk_update send no signals, so callers apply the side
+    effects of `added` and `updated` themselves; deletions go through the
+    ORM and fire post_delete as usual.
+    """
+    wanted = {
+        parent: dict(targets) if isinstance(targets, dict) else dict.fromkeys(targets, {})
+        for parent, targets in wanted.items()
+    }
+    if not wanted:
+        return SyncResult([], [], [])
+
+    if allowed_targets is not None:
+        requested = {target for targets in wanted.values() for target in targets}
+        allowed = set(allowed_targets.filter(pk__in=requested).values_list("pk", flat=True))
+        wanted = {
+            parent: {t: values for t, values in targets.items() if t in allowed}
+            for parent, targets in wanted.items()
+        }
+
+    parent_attr, target_attr = f"{parent_field}_id", f"{target_field}_id"
+    value_fields = sorted({name for targets in wanted.values() for values in targets.values() for name in values})
+    current = {
+        (getattr(row, parent_attr), getattr(row, target_attr)): row
+        for row in model.objects.filter(**{f"{parent_attr}__in": wanted}).only(
+            "pk", parent_attr, target_attr, *value_fields
+        )
+    }
+
+    added, updated = [], []
+    for parent, targets in wanted.items():
+        for target, values in targets.items():
+            row = current.pop((parent, target), None)
+            if row is None:
+                added.append(model(**{parent_attr: parent, target_attr: target}, **values))
+            elif any(getattr(row, name) != value for name, value in values.items()):
+                for name, value in values.items():
+                    setattr(row, name, value)
+                updated.append(row)
+    removed = list(current.values())
+
+    if removed:
+        model.objects.filter(pk__in=[row.pk for row in removed]).delete()
+    if added:
+        model.objects.bulk_create(added)
+    if updated:
+        model.objects.bulk_update(updated, value_fields)
+    return SyncResult(added, removed, updated)
@@ -0,0 +1,336 @@
+import hashlib
+import logging
+import os
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
+from django.db.models import Count, Max
+from django.utils import timezone
+from reportlab.lib.pagesizes import A4
+from reportlab.pdfgen import canvas
+
+from events.models import ActivityLog
+
+from .models import Project, ProjectStats, Task
+from .stats import get_project_stats
+
+logger = logging.getLogger(__name__)
+
+
+# --------------------------------------------------------------------
+# 🔹 Settings
+# --------------------------------------------------------------------
+DEFAULTS = {
+    "ROOT": Path(settings.BASE_DIR) / "cache" / "reports",
+    "WORKERS": 2,          # render threads per process; 0 renders in the request
+    "WAIT_SECONDS": 5,     # a cold request waits this long before answering 202
+    "JOB_TTL": 3600,
+    "CHUNK_SIZE": 500,     # task rows fetched per query while writing the listing
+    # Keep rendered files across requests (ROOT may be per host: each one
+    # then renders its own copy once); off, each request renders anew.
+    "STORE": True,
+}
+
+
+def report_setting(name):
+    return getattr(settings, "PROJECT_REPORTS", {}).get(name, DEFAULTS[name])
+
+
+PENDING, RUNNING, DONE, FAILED = "pending", "running", "done", "failed"
+
+
+# --------------------------------------------------------------------
+# 🔹 Rendered reports on disk, one file per (project watermark, day)
+#
+# The watermark is read from the database, so every worker agrees on it
+# without a shared cache: the project and counter rows, and the newest
+# task write (soft deletes included) and activity entry. Any write the
+# report shows moves one of them, so a file is never stale while its
+# name is current; the day is part of the name because overdue counts
+# depend on it.
+# --------------------------------------------------------------------
+def report_key(project_id):
+    watermark = (
+        Project.objects.filter(pk=project_id).values_list("name", "description", "updated_at").first(),
+        ProjectStats.objects.filter(project_id=project_id).values().first(),
+        Task._base_manager.filter(project_id=project_id).aggregate(last=Max("updated_at"), count=Count("id")),
+        ActivityLog.objects.filter(project_id=project_id).aggregate(last=Max("id")),
+    )
+    digest = hashlib.sha1(repr(watermark).encode()).hexdigest()[:20]
+    return f"{timezone.localdate().isoformat()}-{digest}"
+
+
+def report_path(project_id, key):
+    return Path(report_setting("ROOT")) / str(project_id) / f"{key}.pdf"
+
+
+def job_id(project_id, key):
+    return hashlib.sha1(f"{project_id}:{key}".encode()).hexdigest()[:20]
+
+
+def _job_cache_key(job):
+    return f"report-job:{job}"
+
+
+def get_job(job):
+    return cache.get(_job_cache_key(job))
+
+
+def _set_job(job, **fields):
+    cache.set(_job_cache_key(job), fields, report_setting("JOB_TTL"))
+
+
+# --------------------------------------------------------------------
+# 🔹 Rendering
+# --------------------------------------------------------------------
+TOP, BOTTOM, LINE = 800, 60, 16
+TASK_COLUMNS = ((60, "Title"), (300, "Status"), (390, "Priority"), (460, "Due"))
+
+
+class ReportWriter:
+    """A canvas plus a cursor that starts a new page when the current one is full."""
+
+    def __init__(self, path, title):
+        # Compressed page streams keep what ReportLab holds until save() small
+        target = path if hasattr(path, "write") else str(path)
+        self.canvas = canvas.Canvas(target, pagesize=A4, pageCompression=1)
+        self.canvas.setTitle(title)
+        self.title = title
+        self.page = 1
+        self.y = TOP
+        self.on_new_page = None
+
+    def line(self, text, x=60, font=("Helvetica", 10), step=LINE):
+        if self.y < BOTTOM:
+            self.new_page()
+        self.canvas.setFont(*font)
+        self.canvas.drawString(x, self.y, text)
+        self.y -= step
+
+    def skip(self, step=LINE):
+        self.y -= step
+
+    def new_page(self):
+        self.footer()
+        self.canvas.showPage()
+        self.page += 1
+        self.y = TOP
+        if self.on_new_page:
+            self.on_new_page()
+
+    def footer(self):
+        self.canvas.setFont("Helvetica", 8)
+        self.canvas.drawString(60, 30, f"{self.title} — page {self.page}")
+
+    def save(self):
+        self.footer()
+        self.canvas.showPage()
+        self.canvas.save()
+
+
+def render_report(project_id, path):
+    """Write the report PDF of a project to `path` (a file name or a binary file)."""
+    project = Project.objects.get(pk=project_id)
+    writer = ReportWriter(path, f"{project.name} report")
+
+    # --- Header ---
+    writer.line("■ Project Report", x=200, font=("Helvetica-Bold", 18), step=30)
+    writer.line(f"Project: {project.name}", font=("Helvetica-Bold", 14), step=20)
+    writer.line(f"Description: {project.description or '-'}", font=("Helvetica", 12), step=20)
+    writer.line(f"Created at: {project.created_at.strftime('%Y-%m-%d')}", font=("Helvetica", 12), step=20)
+    writer.skip()
+
+    # --- Dashboard Stats (the ProjectStats row, no counting) ---
+    stats = get_project_stats(project)
+    total_tasks, total_subtasks = stats["total_tasks"], stats["total_subtasks"]
+    task_completion = (stats["completed_tasks"] / total_tasks * 100) if total_tasks else 0
+    subtask_completion = (stats["completed_subtasks"] / total_subtasks * 100) if total_subtasks else 0
+    for name, value in (
+        ("Total Tasks", total_tasks),
+        ("Completed Tasks", stats["completed_tasks"]),
+        ("Subtasks", total_subtasks),
+        ("Completed Subtasks", stats["completed_subtasks"]),
+        ("Task Completion", f"{task_completion:.0f}%"),
+        ("Subtask Completion", f"{subtask_completion:.0f}%"),
+        ("Members", stats["members_count"]),
+        ("Labels", stats["labels_count"]),
+        ("Comments", stats["comments_count"]),
+        ("Attachments", stats["attachments_count"]),
+        ("Overdue Tasks", stats["overdue_tasks"]),
+    ):
+        writer.line(f"{name}: {value}", font=("Helvetica", 12), step=20)
+
+    # --- Activity Logs ---
+    writer.skip()
+    writer.line("Recent Activity:", font=("Helvetica-Bold", 14), step=20)
+    logs = (
+        ActivityLog.objects.filter(project=project)
+        .order_by("-timestamp")
+        .values_list("timestamp", "user__username", "action", "object_type", "description")[:10]
+    )
+    for timestamp, username, action, object_type, description in logs:
+        writer.line(
+            f"- [{timestamp:%Y-%m-%d %H:%M}] {username or 'System'} {action or ''} "
+            f"{object_type or 'Object'}: {(description or '')[:60]}",
+            x=80,
+            font=("Helvetica", 12),
+            step=20,
+        )
+    if not logs:
+        writer.line("No recent activity recorded.", x=80, font=("Helvetica", 12), step=20)
+
+    # --- Tasks, streamed from the database a chunk at a time ---
+    writer.skip()
+    writer.line("Tasks:", font=("Helvetica-Bold", 14), step=20)
+
+    def column_headers():
+        for x, heading in TASK_COLUMNS:
+            writer.canvas.setFont("Helvetica-Bold", 10)
+            writer.canvas.drawString(x, writer.y, heading)
+        writer.y -= LINE
+
+    column_headers()
+    writer.on_new_page = column_headers
+    rows = (
+        Task.objects.filter(project=project)
+        .order_by("created_at", "id")
+        .values_list("title", "status", "priority", "due_date")
+        .iterator(chunk_size=report_setting("CHUNK_SIZE"))
+    )
+    for title, task_status, priority, due_date in rows:
+        if writer.y < BOTTOM:
+            writer.new_page()
+        writer.canvas.setFont("Helvetica", 10)
+        for (x, _), value in zip(TASK_COLUMNS, (title[:45], task_status, priority, due_date or "-")):
+            writer.canvas.drawString(x, writer.y, str(value))
+        writer.y -= LINE
+    writer.save()
+
+
+def build_report(project_id, key):
+    """Render into a temporary file and move it into place, dropping older reports."""
+    path = report_path(project_id, key)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+    os.close(fd)
+    started = time.time()
+    try:
+        render_report(project_id, tmp)
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+    # Only files written before this render started: a slow render must not
+    # delete a newer one
+    for old in path.parent.glob("*.pdf"):
+        try:
+            if old != path and old.stat().st_mtime < started:
+                old.unlink()
+        except FileNotFoundError:
+            pass
+    return path
+
+
+def render_report_file(project_id):
+    """A fresh render in an anonymous temporary file, gone once closed (STORE off)."""
+    file = tempfile.TemporaryFile(suffix=".pdf")
+    try:
+        render_report(project_id, file)
+        file.seek(0)
+    except BaseException:
+        file.close()
+        raise
+    return file
+
+
+# --------------------------------------------------------------------
+# 🔹 Jobs: cold renders run on a small thread pool
+# --------------------------------------------------------------------
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(report_setting("WORKERS"), thread_name_prefix="report")
+        return _executor
+
+
+def render_inline():
+    # A pool thread cannot see uncommitted rows, so render in the request
+    # inside a transaction (ATOMIC_REQUESTS, tests) or when there is no pool.
+    return connection.in_atomic_block or not report_setting("WORKERS")
+
+
+def run_job(job, project_id, key, in_worker=True):
+    _set_job(job, id=job, project=str(project_id), status=RUNNING)
+    try:
+        build_report(project_id, key)
+    except Exception:
+        logger.exception("Report %s of project %s failed", job, project_id)
+        _set_job(job, id=job, project=str(project_id), status=FAILED, error="Report rendering failed.")
+    else:
+        _set_job(job, id=job, project=str(project_id), status=DONE)
+    finally:
+        if in_worker:
+            # Pool threads outlive requests; give their connection back
+            connection.close()
+
+
+def request_report(project_id):
+    """
+    `(path, job)` for the current report of a project: where the file is
+    (or will be), and the id of the job rendering it, or None if it is
+    already on disk. One job per report across workers, since the job id
+    is derived from the report key; a failed job is retried.
+    """
+    key = report_key(project_id)
+    path = report_path(project_id, key)
+    if path.exists():
+        return path, None
+
+    job = job_id(project_id, key)
+    state = get_job(job)
+    if state and state["status"] == FAILED:
+        cache.delete(_job_cache_key(job))
+    pending = {"id": job, "project": str(project_id), "status": PENDING}
+    if cache.add(_job_cache_key(job), pending, report_setting("JOB_TTL")):
+        if render_inline():
+            run_job(job, project_id, key, in_worker=False)
+        else:
+            get_executor().submit(run_job, job, project_id, key)
+    return path, None if path.exists() else job
+
+
+def find_job(project_id, job):
+    """
+    The state of `job`, or None if it is unknown. Job states live in the
+    cache, which workers need not share: a job of the current report
+    that this worker has not seen is done if the file is on disk, and is
+    started again here otherwise.
+    """
+    state = get_job(job)
+    if state is not None or job != job_id(project_id, report_key(project_id)):
+        return state
+    path, running = request_report(project_id)
+    if running is None:
+        return {"id": job, "project": str(project_id), "status": DONE}
+    return get_job(running)
+
+
+def wait_for_job(job, timeout):
+    """Poll a job until it finishes or `timeout` seconds pass; its last state."""
+    deadline = time.monotonic() + timeout
+    state = get_job(job)
+    while state and state["status"] in (PENDING, RUNNING) and time.monotonic() < deadline:
+        time.sleep(0.1)
+        state = get_job(job)
+    return state
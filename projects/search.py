@@ -0,0 +1,404 @@
+import re
+from html import escape
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import Q
+from django.db.models.expressions import RawSQL
+from rest_framework.filters import BaseFilterBackend
+
+from .models import Task, Comment
+
+
+# --------------------------------------------------------------------
+# 🔹 Settings
+# --------------------------------------------------------------------
+DEFAULTS = {
+    "CONFIG": "english",    # PostgreSQL text search configuration
+    "MAX_TERMS": 8,         # words of a query that are matched, the rest is ignored
+    "MAX_RESULTS": 100,     # upper bound for ?limit= on the ranked search
+}
+
+TOKEN_RE = re.compile(r"\w+")
+MARK_START, MARK_END = "<mark>", "</mark>"
+# Private-use characters the database highlights with; the text around
+# them is escaped before they become <mark> tags, so task text never
+# reaches a client as markup.
+HIT_START, HIT_END = "\ue000", "\ue001"
+
+
+def search_setting(name):
+    return getattr(settings, "TASK_SEARCH", {}).get(name, DEFAULTS[name])
+
+
+def parse_terms(query):
+    """Words of a user query; punctuation never reaches the match syntax."""
+    return TOKEN_RE.findall(query or "")[: search_setting("MAX_TERMS")]
+
+
+def db_id(value):
+    return Task._meta.pk.get_db_prep_value(value, connection)
+
+
+# --------------------------------------------------------------------
+# 🔹 Backends
+#
+# Each backend keeps one row per live task holding its title,
+# description and the text of its comments, and answers two questions:
+# which task ids match (a subquery the task queryset filters on) and
+# the ranked, highlighted top hits.
+# --------------------------------------------------------------------
+class SQLiteTaskIndex:
+    """FTS5 virtual table; bm25 ranking with title > description > comments."""
+
+    table = "projects_task_fts"   # created by migration 0004
+
+    def match_query(self, terms):
+        # Every word must match, each as a prefix: "deplo serv" finds
+        # "deployment server".
+        return " ".join(f'"{term}"*' for term in terms)
+
+    def insert(self, cursor, rows):
+        cursor.executemany(
+            f"INSERT INTO {self.table} (task_id, project_id, title, description, comments) "
+            "VALUES (%s, %s, %s, %s, %s)",
+            rows,
+        )
+
+    def update_text(self, cursor, task_id, project_id, title, description):
+        cursor.execute(
+            f"UPDATE {self.table} SET project_id = %s, title = %s, description = %s "
+            "WHERE task_id = %s",
+            [project_id, title, description, task_id],
+        )
+        return cursor.rowcount
+
+    def update_comments(self, cursor, task_id, comments):
+        cursor.execute(
+            f"UPDATE {self.table} SET comments = %s WHERE task_id = %s", [comments, task_id]
+        )
+        return cursor.rowcount
+
+    def delete(self, cursor, task_ids):
+        cursor.executemany(f"DELETE FROM {self.table} WHERE task_id = %s", [[i] for i in task_ids])
+
+    def matching_ids(self, project_id, terms):
+        return (
+            f"SELECT task_id FROM {self.table} WHERE {self.table} MATCH %s AND project_id = %s",
+            [self.match_query(terms), project_id],
+        )
+
+    def search(self, cursor, project_id, terms, limit):
+        marks = f"'{HIT_START}', '{HIT_END}'"
+        cursor.execute(
+            f"SELECT task_id, -bm25({self.table}, 0, 0, 10.0, 4.0, 1.0), "
+            f"highlight({self.table}, 2, {marks}), "
+            f"snippet({self.table}, 3, {marks}, '…', 16), "
+            f"snippet({self.table}, 4, {marks}, '…', 16) "
+            f"FROM {self.table} WHERE {self.table} MATCH %s AND project_id = %s "
+            f"ORDER BY bm25({self.table}, 0, 0, 10.0, 4.0, 1.0) LIMIT %s",
+            [self.match_query(terms), project_id, limit],
+        )
+        return cursor.fetchall()
+
+
+class PostgresTaskIndex:
+    """
+    Side table with a weighted tsvector and a GIN index. Kept out of the
+    Task model so the app still imports without a PostgreSQL driver.
+    """
+
+    table = "projects_task_search"   # created by migration 0004
+
+    @property
+    def config(self):
+        return search_setting("CONFIG")
+
+    def document_sql(self, comments="%s"):
+        # Title weighs most, then description, then comment text.
+        return (
+            "setweight(to_tsvector(%s::regconfig, %s), 'A') || "
+            "setweight(to_tsvector(%s::regconfig, %s), 'B') || "
+            f"setweight(to_tsvector(%s::regconfig, {comments}), 'C')"
+        )
+
+    def match_query(self, terms):
+        return " & ".join(f"{term}:*" for term in terms)
+
+    def insert(self, cursor, rows):
+        cfg = self.config
+        cursor.executemany(
+            f"INSERT INTO {self.table} (task_id, project_id, comments, document) "
+            f"VALUES (%s, %s, %s, {self.document_sql()}) "
+            "ON CONFLICT (task_id) DO UPDATE SET project_id = EXCLUDED.project_id, "
+            "comments = EXCLUDED.comments, document = EXCLUDED.document",
+            [
+                [task_id, project_id, comments, cfg, title, cfg, description, cfg, comments]
+                for task_id, project_id, title, description, comments in rows
+            ],
+        )
+
+    def update_text(self, cursor, task_id, project_id, title, description):
+        cfg = self.config
+        cursor.execute(
+            f"UPDATE {self.table} SET project_id = %s, "
+            f"document = {self.document_sql(comments='comments')} WHERE task_id = %s",
+            [project_id, cfg, title, cfg, description, cfg, task_id],
+        )
+        return cursor.rowcount
+
+    def update_comments(self, cursor, task_id, comments):
+        cfg = self.config
+        cursor.execute(
+            f"UPDATE {self.table} s SET comments = %s, document = "
+            "setweight(to_tsvector(%s::regconfig, t.title), 'A') || "
+            "setweight(to_tsvector(%s::regconfig, t.description), 'B') || "
+            "setweight(to_tsvector(%s::regconfig, %s), 'C') "
+            "FROM projects_task t WHERE t.id = s.task_id AND s.task_id = %s",
+            [comments, cfg, cfg, cfg, comments, task_id],
+        )
+        return cursor.rowcount
+
+    def delete(self, cursor, task_ids):
+        cursor.execute(f"DELETE FROM {self.table} WHERE task_id = ANY(%s)", [list(task_ids)])
+
+    def matching_ids(self, project_id, terms):
+        return (
+            f"SELECT task_id FROM {self.table} "
+            "WHERE project_id = %s AND document @@ to_tsquery(%s::regconfig, %s)",
+            [project_id, self.config, self.match_query(terms)],
+        )
+
+    def search(self, cursor, project_id, terms, limit):
+        cfg = self.config
+        options = f"StartSel={HIT_START}, StopSel={HIT_END}"
+        cursor.execute(
+            "SELECT s.task_id, ts_rank_cd(s.document, q), "
+            "ts_headline(%s::regconfig, t.title, q, %s), "
+            "ts_headline(%s::regconfig, t.description, q, %s), "
+            "ts_headline(%s::regconfig, s.comments, q, %s) "
+            f"FROM {self.table} s JOIN projects_task t ON t.id = s.task_id, "
+            "to_tsquery(%s::regconfig, %s) q "
+            "WHERE s.project_id = %s AND s.document @@ q "
+            "ORDER BY 2 DESC, s.task_id LIMIT %s",
+            [
+                cfg, options + ", HighlightAll=true",
+                cfg, options + ", MaxFragments=2",
+                cfg, options + ", MaxFragments=2",
+                cfg, self.match_query(terms), project_id, limit,
+            ],
+        )
+        return cursor.fetchall()
+
+
+BACKENDS = {
+    "sqlite": SQLiteTaskIndex(),
+    "postgresql": PostgresTaskIndex(),
+}
+
+
+def get_backend():
+    """Index for the active database, or None where LIKE scans are the fallback."""
+    return BACKENDS.get(connection.vendor)
+
+
+# --------------------------------------------------------------------
+# 🔹 Keeping the index in sync (called from events.signals)
+# --------------------------------------------------------------------
+INDEXED_FIELDS = ("title", "description", "deleted_at")
+
+
+def comment_text(task_ids):
+    """task_id -> concatenated comment bodies, oldest first."""
+    texts = {}
+    rows = (
+        Comment.objects.filter(task_id__in=task_ids)
+        .order_by("task_id", "created_at")
+        .values_list("task_id", "body")
+    )
+    for task_id, body in rows:
+        texts.setdefault(task_id, []).append(body)
+    return {task_id: "\n".join(bodies) for task_id, bodies in texts.items()}
+
+
+def index_row(task, comments=""):
+    return (db_id(task.pk), db_id(task.project_id), task.title, task.description or "", comments)
+
+
+def index_task(task, created=False):
+    """Bring a task's index row up to date after it was saved."""
+    backend = get_backend()
+    if backend is None:
+        return
+    if not created and all(
+        task.has_loaded_value(name) and task.loaded_value(name) == getattr(task, name)
+        for name in INDEXED_FIELDS
+    ):
+        return  # nothing searchable changed (status, priority, ...)
+
+    with connection.cursor() as cursor:
+        if task.deleted_at is not None:
+            backend.delete(cursor, [db_id(task.pk)])
+        elif created:
+            backend.insert(cursor, [index_row(task)])
+        elif not backend.update_text(cursor, *index_row(task)[:4]):
+            # Restored from a soft delete (or never indexed): full row.
+            backend.insert(cursor, [index_row(task, comment_text([task.pk]).get(task.pk, ""))])
+
+
+def unindex_task(task_id):
+    backend = get_backend()
+    if backend is not None:
+        with connection.cursor() as cursor:
+            backend.delete(cursor, [db_id(task_id)])
+
+
+def reindex_comments(task_id):
+    """Refresh the comment text of one task after a comment changed."""
+    backend = get_backend()
+    if backend is not None:
+        with connection.cursor() as cursor:
+            backend.update_comments(cursor, db_id(task_id), comment_text([task_id]).get(task_id, ""))
+
+
+def reindex_tasks(task_ids):
+    """Re-create the rows of specific tasks, e.g. after bulk writes that skip signals."""
+    backend = get_backend()
+    if backend is None or not task_ids:
+        return
+    task_ids = list(task_ids)
+    tasks = list(Task.objects.filter(pk__in=task_ids).only("id", "project_id", "title", "description"))
+    with connection.cursor() as cursor:
+        backend.delete(cursor, [db_id(task_id) for task_id in task_ids])
+        if tasks:
+            _index_chunk(backend, cursor, tasks)
+
+
+def rebuild_index(project_ids=None, chunk_size=500):
+    """
+    Drop and re-create the rows of the given projects (all by default)
+    from the task and comment tables. Returns the number of tasks indexed.
+    """
+    backend = get_backend()
+    if backend is None:
+        return 0
+    tasks = Task.objects.only("id", "project_id", "title", "description").order_by("pk")
+    if project_ids:
+        tasks = tasks.filter(project_id__in=project_ids)
+
+    with connection.cursor() as cursor:
+        if project_ids:
+            cursor.execute(
+                f"DELETE FROM {backend.table} WHERE project_id IN ({', '.join(['%s'] * len(project_ids))})",
+                [db_id(pid) for pid in project_ids],
+            )
+        else:
+            cursor.execute(f"DELETE FROM {backend.table}")
+
+        count, chunk = 0, []
+        for task in tasks.iterator(chunk_size=chunk_size):
+            chunk.append(task)
+            if len(chunk) == chunk_size:
+                count += _index_chunk(backend, cursor, chunk)
+                chunk = []
+        if chunk:
+            count += _index_chunk(backend, cursor, chunk)
+    return count
+
+
+def _index_chunk(backend, cursor, tasks):
+    comments = comment_text([task.pk for task in tasks])
+    backend.insert(cursor, [index_row(task, comments.get(task.pk, "")) for task in tasks])
+    return len(tasks)
+
+
+# --------------------------------------------------------------------
+# 🔹 Querying
+# --------------------------------------------------------------------
+def _like_filter(terms):
+    """Fallback for databases without an index: every word somewhere."""
+    condition = Q()
+    for term in terms:
+        condition &= (
+            Q(title__icontains=term)
+            | Q(description__icontains=term)
+            | Q(comments__body__icontains=term)
+        )
+    return condition
+
+
+def filter_tasks(queryset, project_id, query):
+    """Restrict a task queryset to the tasks matching `query`."""
+    terms = parse_terms(query)
+    if not terms:
+        return queryset
+    backend = get_backend()
+    if backend is None:
+        return queryset.filter(pk__in=Task.objects.filter(_like_filter(terms)).values("pk"))
+    sql, params = backend.matching_ids(db_id(project_id), terms)
+    return queryset.filter(pk__in=RawSQL(sql, params))
+
+
+def highlight(text, terms):
+    """Python-side hit marking for the LIKE fallback (see render_marks)."""
+    pattern = re.compile("|".join(re.escape(term) for term in terms), re.IGNORECASE)
+    return pattern.sub(lambda m: f"{HIT_START}{m.group(0)}{HIT_END}", text or "")
+
+
+def render_marks(text):
+    """HTML-escaped `text` with its hit markers turned into <mark> tags."""
+    return escape(text or "").replace(HIT_START, MARK_START).replace(HIT_END, MARK_END)
+
+
+def search_tasks(project_id, query, limit):
+    """
+    Ranked hits for a project as a list of
+    (task_id, rank, {"title": ..., "description": ..., "comments": ...});
+    only fields that actually matched carry a highlight, as escaped HTML
+    whose only tags are <mark>.
+    """
+    terms = parse_terms(query)
+    if not terms:
+        return []
+    backend = get_backend()
+    if backend is None:
+        tasks = (
+            Task.objects.filter(project_id=project_id)
+            .filter(pk__in=Task.objects.filter(_like_filter(terms)).values("pk"))
+            .only("id", "title", "description")[:limit]
+        )
+        rows = [
+            (task.pk, 0.0, highlight(task.title, terms), highlight(task.description, terms), "")
+            for task in tasks
+        ]
+    else:
+        with connection.cursor() as cursor:
+            rows = backend.search(cursor, db_id(project_id), terms, limit)
+
+    pk_field = Task._meta.pk
+    hits = []
+    for task_id, rank, title, description, comments in rows:
+        fragments = {"title": title, "description": description, "comments": comments}
+        hits.append((
+            pk_field.to_python(task_id),
+            round(float(rank), 6),
+            {name: render_marks(text) for name, text in fragments.items() if text and HIT_START in text},
+        ))
+    return hits
+
+
+class TaskSearchFilter(BaseFilterBackend):
+    """`?search=` on task lists, answered from the full-text index."""
+
+    search_param = "search"
+
+    def filter_queryset(self, request, queryset, view):
+        query = request.query_params.get(self.search_param, "")
+        return filter_tasks(queryset, view.kwargs.get("project_pk"), query)
+
+    def get_schema_operation_parameters(self, view):
+        return [
+            {"name": self.search_param, "required": False, "in": "query",
+             "description": "Full-text search over title, description and comments.",
+             "schema": {"type": "string"}},
+        ]
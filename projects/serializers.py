@@ -1,13 +1,99 @@
 from rest_framework import serializers
 from django.contrib.auth import get_user_model
+from django.core.exceptions import FieldDoesNotExist
+from django.db import transaction
+from django.db.models import Prefetch
+from django.urls import reverse
 from django.utils import timezone
 from .models import (
     Project, ProjectMember, Label, Task, Subtask,
-    TaskAssignee, TaskLabel, Comment, Attachment
+    TaskAssignee, TaskLabel, Comment, Attachment, UploadSession
 )
+from .stats import count_subquery
+from .relations import sync_relation
+from .thumbnails import is_image, variant_urls
 
 User = get_user_model()
 
+
+# --- Response shape (?fields= / ?view=summary / ?expand=) ---
+def _split_param(value):
+    return {part.strip() for part in (value or "").split(",") if part.strip()}
+
+
+def get_response_shape(request):
+    """
+    Parse the shape a GET caller asked for:
+      ?fields=a,b      only render these fields
+      ?view=summary    nested collections become `<name>_count` integers
+      ?expand=a,b      keep these collections in full even in summary view
+    Writes always use the full shape.
+    """
+    if request is None or request.method not in ("GET", "HEAD"):
+        return None, set(), False
+    params = request.query_params
+    fields = _split_param(params.get("fields")) or None
+    return fields, _split_param(params.get("expand")), params.get("view") == "summary"
+
+
+class ShapedSerializerMixin:
+    """
+    Applies the requested response shape to the serializer fields and
+    builds the matching queryset: only the needed columns, eager loading
+    for rendered relations, and count annotations for summarized ones.
+    Subclasses list their collections in `summary_collections` as
+    {field: (child model, fk to this model)} and provide get_query_plan().
+    """
+    summary_collections = {}
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        fields, expand, summary = get_response_shape(self.context.get("request"))
+        self.summarized = set()
+        if summary:
+            for name in self.summary_collections:
+                if name in self.fields and name not in expand:
+                    self.fields.pop(name)
+                    self.fields[f"{name}_count"] = serializers.IntegerField(read_only=True)
+                    self.summarized.add(name)
+        if fields:
+            for name in list(self.fields):
+                if name not in fields and not self.fields[name].write_only:
+                    self.fields.pop(name)
+            self.summarized = {name for name in self.summarized if f"{name}_count" in self.fields}
+
+    def readable_field_names(self):
+        return [name for name, field in self.fields.items() if not field.write_only]
+
+    def shape_queryset(self, queryset):
+        readable = self.readable_field_names()
+        model = self.Meta.model
+        select_related, prefetches = self.get_query_plan(readable)
+
+        columns = {model._meta.pk.name}
+        for name in readable:
+            try:
+                field = model._meta.get_field(name)
+            except FieldDoesNotExist:
+                continue
+            if field.concrete and not field.many_to_many:
+                columns.add(name)
+        columns.update(select_related)
+
+        queryset = queryset.only(*columns)
+        if select_related:
+            queryset = queryset.select_related(*select_related)
+        if prefetches:
+            queryset = queryset.prefetch_related(*prefetches)
+        if self.summarized:
+            queryset = queryset.annotate(**{
+                f"{name}_count": count_subquery(child.objects.all(), fk)
+                for name, (child, fk) in self.summary_collections.items()
+                if name in self.summarized
+            })
+        return queryset
+
+
 # --- User ---
 class UserSerializer(serializers.ModelSerializer):
     class Meta:
@@ -23,6 +109,18 @@ class ProjectMemberSerializer(serializers.ModelSerializer):
         fields = ["id", "user", "role", "joined_at"]
         read_only_fields = ["id", "joined_at"]
 
+class MemberEntrySerializer(serializers.Serializer):
+    user_id = serializers.IntegerField()
+    role = serializers.ChoiceField(
+        choices=[r for r in ProjectMember.Role.values if r != ProjectMember.Role.OWNER],
+        default=ProjectMember.Role.MEMBER,
+    )
+
+
+class SetMembersSerializer(serializers.Serializer):
+    """Full member list for ProjectMemberViewSet.set_members; owners are always kept."""
+    members = MemberEntrySerializer(many=True)
+
 # --- Label ---
 class LabelSerializer(serializers.ModelSerializer):
     class Meta:
@@ -48,13 +146,46 @@ class CommentSerializer(serializers.ModelSerializer):
 # --- Attachment ---
 class AttachmentSerializer(serializers.ModelSerializer):
     uploader = UserSerializer(read_only=True)
+    sha256 = serializers.CharField(source="blob_id", read_only=True)
+    thumbnails = serializers.SerializerMethodField()
 
     class Meta:
         model = Attachment
         fields = [
             "id", "filename", "file", "content_type",
-            "size", "uploader", "created_at"
+            "size", "sha256", "thumbnails", "uploader", "created_at"
         ]
+        # The bytes come only from an upload (attach_uploaded_file), which
+        # keeps file, size and the blob reference in step; edits rename.
+        read_only_fields = ["file", "content_type", "size"]
+
+    def get_thumbnails(self, obj):
+        # {"status": "pending|ready|failed", "small": url, ...}; null for non-images.
+        # Served like the file itself, to members only (download view, ?variant=)
+        if not is_image(obj.content_type):
+            return None
+        view = self.context.get("view")
+        project_pk = view.kwargs["project_pk"] if view else obj.task.project_id
+        download = reverse("task-attachments-download", args=[project_pk, obj.task_id, obj.pk])
+        return variant_urls(
+            obj.file, obj.thumbnails, self.context.get("request"), url=lambda size: f"{download}?variant={size}"
+        )
+
+
+# --- Resumable upload session ---
+class UploadSessionSerializer(serializers.ModelSerializer):
+    offset = serializers.IntegerField(source="received", read_only=True)
+    sha256 = serializers.RegexField(r"^[0-9a-fA-F]{64}$", required=False, allow_blank=True)
+
+    class Meta:
+        model = UploadSession
+        fields = ["id", "filename", "content_type", "size", "sha256", "offset", "created_at", "updated_at"]
+        read_only_fields = ["id", "created_at", "updated_at"]
+
+    def validate_size(self, value):
+        if value < 0:
+            raise serializers.ValidationError("Ensure this value is greater than or equal to 0.")
+        return value
 
 # --- Subtask ---
 class SubtaskSerializer(serializers.ModelSerializer):
@@ -63,7 +194,7 @@ class SubtaskSerializer(serializers.ModelSerializer):
         fields = ["id", "title", "is_done", "created_at"]
 
 # --- Task ---
-class TaskSerializer(serializers.ModelSerializer):
+class TaskSerializer(ShapedSerializerMixin, serializers.ModelSerializer):
     creator = UserSerializer(read_only=True)
     assignees = TaskAssigneeSerializer(many=True, read_only=True)
     labels = serializers.SerializerMethodField()
@@ -97,6 +228,43 @@ class TaskSerializer(serializers.ModelSerializer):
         ]
         read_only_fields = ("project", "creator", "created_at", "updated_at", "deleted_at")
 
+    summary_collections = {
+        "assignees": (TaskAssignee, "task"),
+        "labels": (TaskLabel, "task"),
+        "subtasks": (Subtask, "task"),
+        "comments": (Comment, "task"),
+    }
+
+    # --- query plan ---
+    @classmethod
+    def get_query_plan(cls, field_names):
+        """
+        select_related/Prefetch lookups needed to render `field_names`
+        without per-row queries. Only relations that are actually being
+        serialized are loaded.
+        """
+        plan = {
+            "creator": ("select", "creator"),
+            "assignees": ("prefetch", Prefetch(
+                "assignees", queryset=TaskAssignee.objects.select_related("user")
+            )),
+            "labels": ("prefetch", Prefetch(
+                "task_labels", queryset=TaskLabel.objects.select_related("label")
+            )),
+            "subtasks": ("prefetch", Prefetch("subtasks")),
+            "comments": ("prefetch", Prefetch(
+                "comments", queryset=Comment.objects.select_related("author")
+            )),
+        }
+        select_related, prefetches = [], []
+        for name in field_names:
+            kind, lookup = plan.get(name, (None, None))
+            if kind == "select":
+                select_related.append(lookup)
+            elif kind == "prefetch":
+                prefetches.append(lookup)
+        return select_related, prefetches
+
     # --- labels getter (for output) ---
     def get_labels(self, obj):
         return LabelSerializer(
@@ -105,25 +273,21 @@ class TaskSerializer(serializers.ModelSerializer):
         ).data
 
     # --- helper: assign users ---
+    # Only the difference to the current rows is written (see relations.py)
     def _set_assignees(self, task, ids):
-        TaskAssignee.objects.filter(task=task).delete()
-        if not ids:
-            return
-        users = User.objects.filter(id__in=ids)
-        TaskAssignee.objects.bulk_create(
-            [TaskAssignee(task=task, user=u) for u in users]
-        )
+        sync_relation(TaskAssignee, "task", "user", {task.pk: ids}, User.objects.all())
 
     # --- helper: assign labels ---
     def _set_labels(self, task, label_ids):
-        TaskLabel.objects.filter(task=task).exclude(label_id__in=label_ids).delete()
-        if not label_ids:
-            return
-        labels = Label.objects.filter(id__in=label_ids)
-        for label in labels:
-            TaskLabel.objects.get_or_create(task=task, label=label)
+        sync_relation(
+            TaskLabel, "task", "label", {task.pk: label_ids},
+            Label.objects.filter(project_id=task.project_id),
+        )
 
     # --- create ---
+    # Task row + relations commit together, so their activity entries are
+    # flushed as one batch (see events.activity).
+    @transaction.atomic
     def create(self, validated_data):
         assignee_ids = validated_data.pop("assignee_ids", [])
         label_ids = validated_data.pop("label_ids", [])
@@ -133,6 +297,7 @@ class TaskSerializer(serializers.ModelSerializer):
         return task
 
     # --- update ---
+    @transaction.atomic
     def update(self, instance, validated_data):
         assignee_ids = validated_data.pop("assignee_ids", None)
         label_ids = validated_data.pop("label_ids", None)
@@ -143,12 +308,51 @@ class TaskSerializer(serializers.ModelSerializer):
             self._set_labels(task, label_ids)
         return task
 
+# --- Bulk task operations (see projects/bulk.py) ---
+class BulkTaskOperationSerializer(serializers.Serializer):
+    op = serializers.ChoiceField(choices=["create", "update", "delete"])
+    id = serializers.UUIDField(required=False)
+    data = serializers.DictField(required=False, default=dict)
+
+    def validate(self, attrs):
+        if attrs["op"] != "create" and not attrs.get("id"):
+            raise serializers.ValidationError({"id": "Required for update and delete."})
+        return attrs
+
+
+class BulkTaskSerializer(serializers.Serializer):
+    operations = serializers.ListField(
+        child=serializers.DictField(), allow_empty=False, max_length=500
+    )
+    # all-or-nothing: one invalid operation rejects the whole payload
+    atomic = serializers.BooleanField(default=False)
+
+
 # --- Project ---
-class ProjectSerializer(serializers.ModelSerializer):
+class ProjectSerializer(ShapedSerializerMixin, serializers.ModelSerializer):
     created_by = UserSerializer(read_only=True)  # ✅ now nested user info
     members = ProjectMemberSerializer(many=True, read_only=True)
     labels = LabelSerializer(many=True, read_only=True)
 
+    summary_collections = {
+        "members": (ProjectMember, "project"),
+        "labels": (Label, "project"),
+    }
+
+    @classmethod
+    def get_query_plan(cls, field_names):
+        """Same contract as TaskSerializer.get_query_plan."""
+        select_related, prefetches = [], []
+        if "created_by" in field_names:
+            select_related.append("created_by")
+        if "members" in field_names:
+            prefetches.append(Prefetch(
+                "members", queryset=ProjectMember.objects.select_related("user")
+            ))
+        if "labels" in field_names:
+            prefetches.append(Prefetch("labels"))
+        return select_related, prefetches
+
     class Meta:
         model = Project
         fields = [
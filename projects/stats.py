@@ -0,0 +1,232 @@
+from django.db.models import Count, F, IntegerField, Max, OuterRef, Q, Subquery, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .models import (
+    Project, ProjectStats, ProjectMember, Label, Task, Subtask, Comment, Attachment
+)
+
+
+OPEN_STATUSES = ["TODO", "IN_PROGRESS", "BLOCKED"]
+
+# Task.status -> ProjectStats counter column
+STATUS_COUNTERS = {
+    "TODO": "todo_count",
+    "IN_PROGRESS": "in_progress_count",
+    "DONE": "done_count",
+    "BLOCKED": "blocked_count",
+}
+
+
+# --------------------------------------------------------------------
+# 🔹 Helper: correlated aggregate over a child table
+# --------------------------------------------------------------------
+def _aggregate_subquery(queryset, outer_field, aggregate, output_field=None):
+    """
+    Wrap `aggregate` over `queryset` into a scalar subquery correlated on
+    the outer row's primary key through `outer_field` (e.g. "project" or
+    "task__project"). Grouping by that field keeps it a single row.
+    """
+    subquery = (
+        queryset.filter(**{outer_field: OuterRef("pk")})
+        .order_by()
+        .values(outer_field)
+        .annotate(value=aggregate)
+        .values("value")[:1]
+    )
+    return Subquery(subquery, output_field=output_field)
+
+
+def count_subquery(queryset, outer_field, **filters):
+    """Correlated COUNT(*) of `queryset` rows (optionally filtered), 0 if none."""
+    aggregate = Count("pk", filter=Q(**filters)) if filters else Count("pk")
+    return Coalesce(
+        _aggregate_subquery(queryset, outer_field, aggregate, IntegerField()),
+        Value(0),
+    )
+
+
+def annotate_project_stats(queryset, today=None):
+    """
+    Annotate every dashboard figure on a Project queryset so the whole set
+    is fetched with a single SELECT, whatever the size of the project.
+    """
+    today = today or timezone.now().date()
+    tasks = Task.objects.all()
+    return queryset.annotate(
+        stat_total_tasks=count_subquery(tasks, "project"),
+        stat_todo_tasks=count_subquery(tasks, "project", status="TODO"),
+        stat_in_progress_tasks=count_subquery(tasks, "project", status="IN_PROGRESS"),
+        stat_completed_tasks=count_subquery(tasks, "project", status="DONE"),
+        stat_blocked_tasks=count_subquery(tasks, "project", status="BLOCKED"),
+        stat_overdue_tasks=count_subquery(
+            tasks, "project", due_date__lt=today, status__in=OPEN_STATUSES
+        ),
+        stat_last_task_update=_aggregate_subquery(
+            tasks, "project", Max("updated_at")
+        ),
+        stat_total_subtasks=count_subquery(Subtask.objects.all(), "task__project"),
+        stat_completed_subtasks=count_subquery(
+            Subtask.objects.all(), "task__project", is_done=True
+        ),
+        stat_members=count_subquery(ProjectMember.objects.all(), "project"),
+        stat_labels=count_subquery(Label.objects.all(), "project"),
+        stat_comments=count_subquery(Comment.objects.all(), "task__project"),
+        stat_attachments=count_subquery(Attachment.objects.all(), "task__project"),
+    )
+
+
+def _overdue_subquery(today=None):
+    today = today or timezone.now().date()
+    return count_subquery(
+        Task.objects.all(), "project", due_date__lt=today, status__in=OPEN_STATUSES
+    )
+
+
+def stats_to_dict(stats, overdue_tasks):
+    """Build the dashboard dict from a ProjectStats row (with its project loaded)."""
+    project = stats.project
+    return {
+        "project_id": project.id,
+        "project_name": project.name,
+        "total_tasks": stats.task_count,
+        "completed_tasks": stats.done_count,
+        "pending_tasks": stats.task_count - stats.done_count,
+        "total_subtasks": stats.subtask_count,
+        "completed_subtasks": stats.subtask_done_count,
+        "members_count": stats.member_count,
+        "labels_count": stats.label_count,
+        "comments_count": stats.comment_count,
+        "attachments_count": stats.attachment_count,
+        "last_activity": stats.last_activity_at or project.updated_at,
+        "overdue_tasks": overdue_tasks,
+    }
+
+
+def recompute_project_stats(project_id):
+    """
+    Rebuild the ProjectStats row for one project from the source tables.
+    Used to create missing rows and by `manage.py recompute_project_stats`
+    to repair drift. Returns None if the project no longer exists.
+    """
+    project = annotate_project_stats(Project.objects.filter(pk=project_id)).first()
+    if project is None:
+        return None
+    stats, _ = ProjectStats.objects.update_or_create(
+        project=project,
+        defaults={
+            "task_count": project.stat_total_tasks,
+            "todo_count": project.stat_todo_tasks,
+            "in_progress_count": project.stat_in_progress_tasks,
+            "done_count": project.stat_completed_tasks,
+            "blocked_count": project.stat_blocked_tasks,
+            "subtask_count": project.stat_total_subtasks,
+            "subtask_done_count": project.stat_completed_subtasks,
+            "comment_count": project.stat_comments,
+            "attachment_count": project.stat_attachments,
+            "member_count": project.stat_members,
+            "label_count": project.stat_labels,
+            "last_activity_at": project.stat_last_task_update or project.updated_at,
+        },
+    )
+    return stats
+
+
+def get_project_stats(project):
+    """
+    Return dashboard metrics for `project` (instance or primary key).
+    Reads the ProjectStats row plus an indexed overdue count in one query,
+    so the cost does not depend on how many tasks the project holds.
+    """
+    project_id = getattr(project, "pk", project)
+    stats = (
+        ProjectStats.objects.filter(project_id=project_id)
+        .select_related("project")
+        .annotate(overdue_tasks=_overdue_subquery())
+        .first()
+    )
+    if stats is None:
+        # Cold path: projects created before the counters existed.
+        if recompute_project_stats(project_id) is None:
+            raise Project.DoesNotExist(f"Project {project_id} does not exist.")
+        return get_project_stats(project_id)
+    return stats_to_dict(stats, stats.overdue_tasks)
+
+
+# --------------------------------------------------------------------
+# 🔹 Incremental counter maintenance (called from events.signals)
+# --------------------------------------------------------------------
+def bump_project_stats(project_id, touch=True, **deltas):
+    """
+    Apply counter deltas with F() expressions so concurrent writers never
+    lose an update. A missing row is left alone; it is rebuilt on next read.
+    """
+    changes = {field: F(field) + delta for field, delta in deltas.items() if delta}
+    if touch:
+        changes["last_activity_at"] = timezone.now()
+    if changes:
+        ProjectStats.objects.filter(project_id=project_id).update(**changes)
+
+
+def refresh_label_count(project_id):
+    """Recount labels (a small table) where a bulk insert can't tell how many it added."""
+    ProjectStats.objects.filter(project_id=project_id).update(
+        label_count=count_subquery(Label.objects.all(), "project")
+    )
+
+
+def invalidate_project_stats(project_id):
+    """Drop the row when a delta can't be derived; the next read rebuilds it."""
+    ProjectStats.objects.filter(project_id=project_id).delete()
+
+
+def _merge(deltas, field, delta):
+    deltas[field] = deltas.get(field, 0) + delta
+
+
+def on_task_saved(task, created):
+    if created:
+        deltas = {}
+        if task.deleted_at is None:
+            _merge(deltas, "task_count", 1)
+            _merge(deltas, STATUS_COUNTERS[task.status], 1)
+        bump_project_stats(task.project_id, **deltas)
+    elif not (task.has_loaded_value("status") and task.has_loaded_value("deleted_at")):
+        invalidate_project_stats(task.project_id)
+    else:
+        deltas = {}
+        if task.loaded_value("deleted_at") is None:
+            _merge(deltas, "task_count", -1)
+            _merge(deltas, STATUS_COUNTERS[task.loaded_value("status")], -1)
+        if task.deleted_at is None:
+            _merge(deltas, "task_count", 1)
+            _merge(deltas, STATUS_COUNTERS[task.status], 1)
+        bump_project_stats(task.project_id, **deltas)
+    task.remember_tracked_fields()
+
+
+def on_task_deleted(task):
+    if task.deleted_at is None:
+        bump_project_stats(
+            task.project_id, task_count=-1, **{STATUS_COUNTERS[task.status]: -1}
+        )
+    else:
+        bump_project_stats(task.project_id)
+
+
+def on_subtask_saved(subtask, created):
+    project_id = subtask.task.project_id
+    if created:
+        bump_project_stats(project_id, subtask_count=1, subtask_done_count=int(subtask.is_done))
+    elif not subtask.has_loaded_value("is_done"):
+        invalidate_project_stats(project_id)
+    else:
+        delta = int(subtask.is_done) - int(subtask.loaded_value("is_done"))
+        bump_project_stats(project_id, subtask_done_count=delta)
+    subtask.remember_tracked_fields()
+
+
+def on_subtask_deleted(subtask):
+    bump_project_stats(
+        subtask.task.project_id, subtask_count=-1, subtask_done_count=-int(subtask.is_done)
+    )
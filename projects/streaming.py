@@ -0,0 +1,56 @@
+from asgiref.sync import sync_to_async
+from django.core.handlers.asgi import ASGIRequest
+
+
+# --------------------------------------------------------------------
+# 🔹 Streaming bodies under ASGI
+#
+# Django's ASGI handler turns a sync iterator body into a list before
+# sending its first byte, so exports, import progress and downloads
+# hand it an async iterator instead that pulls one chunk at a time.
+# WSGI servers iterate sync bodies as they send them: those are kept.
+# --------------------------------------------------------------------
+def is_asgi(request):
+    return isinstance(getattr(request, "_request", request), ASGIRequest)
+
+
+async def pull_chunks(chunks):
+    """
+    The items of the sync iterable `chunks`, each one produced by a
+    next() on the request's thread (database cursors stay with their
+    connection).
+    """
+    iterator = iter(chunks)
+    pull = sync_to_async(next)
+    done = object()
+    try:
+        while (chunk := await pull(iterator, done)) is not done:
+            yield chunk
+    finally:
+        if close := getattr(iterator, "close", None):
+            await sync_to_async(close)()
+
+
+def streaming_body(request, chunks):
+    """`chunks` as the body of a StreamingHttpResponse answering `request`."""
+    return pull_chunks(chunks) if is_asgi(request) else chunks
+
+
+class FileBlocks:
+    """
+    An open file as an async body of `block_size` reads, each on a worker
+    thread, so at most one block of it is in memory. close() (called
+    with the response's) closes the file.
+    """
+
+    def __init__(self, file, block_size):
+        self.file = file
+        self.block_size = block_size
+
+    async def __aiter__(self):
+        read = sync_to_async(self.file.read, thread_sensitive=False)
+        while data := await read(self.block_size):
+            yield data
+
+    def close(self):
+        self.file.close()
@@ -0,0 +1,100 @@
+import base64
+import binascii
+import json
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import ValidationError
+
+from .models import Task
+
+
+# --------------------------------------------------------------------
+# 🔹 Settings
+# --------------------------------------------------------------------
+DEFAULTS = {
+    "PAGE_SIZE": 100,
+    "MAX_PAGE_SIZE": 500,
+    # A row's updated_at is stamped before its transaction commits, so a
+    # slow transaction can surface "in the past". The final cursor of a
+    # sync never moves closer to now than this, and the overlap is simply
+    # sent again (clients apply changes as upserts).
+    "COMMIT_LAG_SECONDS": 5,
+}
+
+
+def sync_setting(name):
+    return getattr(settings, "TASK_SYNC", {}).get(name, DEFAULTS[name])
+
+
+# --------------------------------------------------------------------
+# 🔹 Cursor: the (updated_at, id) of the last change a client has seen
+# --------------------------------------------------------------------
+def encode_cursor(updated_at, task_id):
+    raw = json.dumps({"t": updated_at.isoformat(), "i": str(task_id)}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(value):
+    try:
+        raw = base64.urlsafe_b64decode(value + "=" * (-len(value) % 4))
+        payload = json.loads(raw)
+        updated_at = parse_datetime(payload["t"])
+        task_id = Task._meta.pk.to_python(payload["i"]) if payload["i"] else ""
+        if updated_at is None:
+            raise ValueError
+    except (binascii.Error, ValueError, KeyError, TypeError, AttributeError, DjangoValidationError):
+        raise ValidationError({"since": "Invalid cursor."})
+    return updated_at, task_id
+
+
+# --------------------------------------------------------------------
+# 🔹 Changes
+# --------------------------------------------------------------------
+def task_changes(project_id, since=None, limit=None):
+    """
+    Tasks of a project changed after cursor `since` (all tasks when None),
+    oldest change first, as `(rows, cursor, has_more)` where rows are
+    (id, updated_at, deleted_at) tuples. Soft-deleted tasks are included
+    as tombstones, except on a first sync.
+
+    An (updated_at, id) range scan on the (project, updated_at, id) index,
+    so the cost follows the number of changes, not the size of the project.
+    """
+    limit = limit or sync_setting("PAGE_SIZE")
+    queryset = Task._base_manager.filter(project_id=project_id)
+    if since is None:
+        queryset = queryset.filter(deleted_at__isnull=True)
+    else:
+        since_at, since_id = decode_cursor(since)
+        # An empty id (a held-back cursor) includes every row at that instant
+        same_instant = Q(updated_at=since_at, id__gt=since_id) if since_id else Q(updated_at=since_at)
+        queryset = queryset.filter(Q(updated_at__gt=since_at) | same_instant)
+
+    rows = list(
+        queryset.order_by("updated_at", "id").values_list("id", "updated_at", "deleted_at")[: limit + 1]
+    )
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
+    if has_more:
+        cursor = encode_cursor(rows[-1][1], rows[-1][0])
+    else:
+        # At the tail: hold the cursor back by the commit lag (see DEFAULTS).
+        horizon = timezone.now() - timedelta(seconds=sync_setting("COMMIT_LAG_SECONDS"))
+        if rows and rows[-1][1] <= horizon:
+            cursor = encode_cursor(rows[-1][1], rows[-1][0])
+        elif since is not None and since_at >= horizon:
+            cursor = since
+        else:
+            cursor = encode_cursor(horizon, "")
+    return rows, cursor, has_more
+
+
+def touch_task(task_id):
+    """Mark a task changed when one of its nested rows (subtask, comment) is."""
+    Task._base_manager.filter(pk=task_id).update(updated_at=timezone.now())
@@ -1,3 +1,1560 @@
-from django.test import TestCase
+import csv
+import gzip
+import hashlib
+import io
+import json
+import os
+import re
+import tempfile
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+from asgiref.sync import async_to_sync
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection
+from django.test import AsyncRequestFactory, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from django.utils.http import http_date
+from rest_framework.test import APIClient, force_authenticate
+
+from events.models import ActivityLog
+
+from .models import (
+    Project, ProjectStats, ProjectMember, Label, Task, Subtask, Comment,
+    TaskAssignee, TaskLabel, Attachment, Blob, UploadSession,
+)
+from .stats import get_project_stats, recompute_project_stats
+from .cache import cache_stats, reset_cache_stats
+from .membership import membership_cache
+from . import reports
+from .export import TASK_COLUMNS, export_response, task_rows
+from .downloads import serve_attachment
+from .search import highlight, render_marks
+
+User = get_user_model()
+
+
+def make_project(owner, name="Demo"):
+    project = Project.objects.create(name=name, created_by=owner)
+    ProjectMember.objects.create(project=project, user=owner, role=ProjectMember.Role.OWNER)
+    return project
+
+
+def fill_project(project, owner, tasks=3):
+    yesterday = timezone.now().date() - timedelta(days=1)
+    label = Label.objects.create(project=project, name=f"label-{tasks}")
+    for i in range(tasks):
+        task = Task.objects.create(
+            project=project,
+            creator=owner,
+            title=f"Task {i}",
+            status="DONE" if i % 2 else "TODO",
+            due_date=yesterday,
+        )
+        Subtask.objects.create(task=task, title="sub", is_done=bool(i % 2))
+        Comment.objects.create(task=task, author=owner, body="hi")
+    return label
+
+
+class ProjectStatsTests(TestCase):
+    def setUp(self):
+        self.owner = User.objects.create_user(username="owner", password="pw")
+        self.client = APIClient()
+        self.client.force_authenticate(self.owner)
+
+    def test_stats_values(self):
+        project = make_project(self.owner)
+        fill_project(project, self.owner, tasks=4)
+        Task.objects.filter(project=project).first().soft_delete()
+
+        stats = get_project_stats(project)
+
+        self.assertEqual(stats["total_subtasks"], 4)
+        self.assertEqual(stats["completed_subtasks"], 2)
+        self.assertEqual(stats["comments_count"], 4)
+        self.assertEqual(stats["members_count"], 1)
+        self.assertEqual(stats["labels_count"], 1)
+        self.assertEqual(stats["total_tasks"], 3)
+        self.assertEqual(
+            stats["completed_tasks"] + stats["pending_tasks"], stats["total_tasks"]
+        )
+        self.assertEqual(stats["overdue_tasks"], stats["pending_tasks"])
+
+    def test_stats_single_query(self):
+        project = make_project(self.owner)
+        fill_project(project, self.owner, tasks=5)
+        with self.assertNumQueries(1):
+            get_project_stats(project)
+
+    def test_dashboard_query_count_is_constant(self):
+        small = make_project(self.owner, name="Small")
+        big = make_project(self.owner, name="Big")
+        fill_project(small, self.owner, tasks=1)
+        fill_project(big, self.owner, tasks=25)
+
+        for project in (small, big):
+            # membership-scoped object lookup + one stats query (no response cache / ETag
+            # role lookup: both are off without a shared cache)
+            with self.assertNumQueries(2):
+                response = self.client.get(f"/api/v1/projects/{project.id}/dashboard/")
+            self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["total_tasks"], 25)
+
+    def test_report_uses_shared_stats(self):
+        project = make_project(self.owner)
+        fill_project(project, self.owner, tasks=2)
+        with tempfile.TemporaryDirectory() as root, self.settings(PROJECT_REPORTS={"ROOT": root}):
+            response = self.client.get(f"/api/v1/projects/{project.id}/report/")
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response["Content-Type"], "application/pdf")
+            response.close()
+
+
+class ProjectStatsCounterTests(TestCase):
+    COUNTERS = [
+        "task_count", "todo_count", "in_progress_count", "done_count", "blocked_count",
+        "subtask_count", "subtask_done_count", "comment_count", "attachment_count",
+        "member_count", "label_count",
+    ]
+
+    def setUp(self):
+        self.owner = User.objects.create_user(username="owner", password="pw")
+        self.project = make_project(self.owner)
+
+    def counters(self):
+        stats = ProjectStats.objects.get(project=self.project)
+        return {name: getattr(stats, name) for name in self.COUNTERS}
+
+    def assertCountersMatchSource(self):
+        incremental = self.counters()
+        recompute_project_stats(self.project.pk)
+        self.assertEqual(incremental, self.counters())
+
+    def test_counters_follow_writes(self):
+        label = fill_project(self.project, self.owner, tasks=4)
+        task = Task.objects.filter(project=self.project).first()
+        task.status = "BLOCKED"
+        task.save()
+        task.save()
+
+        subtask = Subtask.objects.filter(task__project=self.project).first()
+        subtask.is_done = not subtask.is_done
+        subtask.save()
+
+        Task.objects.filter(project=self.project).last().soft_delete()
+        Comment.objects.filter(task__project=self.project).first().delete()
+        label.delete()
+        self.assertCountersMatchSource()
+        self.assertEqual(self.counters()["task_count"], 3)
+
+    def test_concurrent_saves_apply_a_transition_once(self):
+        fill_project(self.project, self.owner, tasks=1)
+        first, second = Task.objects.get(project=self.project), Task.objects.get(project=self.project)
+        subtask_a, subtask_b = Subtask.objects.get(task=first), Subtask.objects.get(task=first)
+        for task in (first, second):  # both loaded as TODO
+            task.status = "DONE"
+            task.save()
+        for subtask in (subtask_a, subtask_b):
+            subtask.is_done = not subtask.is_done
+            subtask.save(update_fields=["is_done"])
+        self.assertEqual(self.counters()["done_count"], 1)
+        self.assertCountersMatchSource()
+
+    def test_hard_delete_cascades_counters(self):
+        fill_project(self.project, self.owner, tasks=3)
+        Task.objects.filter(project=self.project).first().delete()
+        self.assertEqual(self.counters()["subtask_count"], 2)
+        self.assertCountersMatchSource()
+
+    def test_dashboard_reads_counters(self):
+        fill_project(self.project, self.owner, tasks=2)
+        ProjectStats.objects.filter(project=self.project).update(task_count=99)
+        self.assertEqual(get_project_stats(self.project)["total_tasks"], 99)
+
+        call_command("recompute_project_stats", stdout=StringIO())
+        self.assertEqual(get_project_stats(self.project)["total_tasks"], 2)
+
+    def test_missing_row_is_rebuilt_on_read(self):
+        fill_project(self.project, self.owner, tasks=2)
+        ProjectStats.objects.all().delete()
+        self.assertEqual(get_project_stats(self.project)["total_tasks"], 2)
+
+
+@override_settings(PROJECT_RESPONSE_CACHE={"ENABLED": True}, MEMBERSHIP_CACHE={"ENABLED": True})
+class ProjectResponseCacheTests(TestCase):
+    def setUp(self):
+        self.owner = User.objects.create_user(username="owner", password="pw")
+        self.viewer = User.objects.create_user(username="viewer", password="pw")
+        self.project = make_project(self.owner)
+        ProjectMember.objects.create(project=self.project, user=self.viewer, role="VIEWER")
+        fill_project(self.project, self.owner, tasks=3)
+        self.client = APIClient()
+        self.client.force_authenticate(self.owner)
+        self.tasks_url = f"/api/v1/projects/{self.project.id}/tasks/"
+        reset_cache_stats()
+
+    def test_second_read_is_served_from_cache(self):
+        first = self.client.get(self.tasks_url)
+        self.assertEqual(first["X-Cache"], "MISS")
+        with self.assertNumQueries(0):  # role from the membership cache, body from the response cache
+            second = self.client.get(self.tasks_url)
+        self.assertEqual(second["X-Cache"], "HIT")
+        self.assertEqual(first.data, second.data)
+        self.assertEqual(cache_stats()["hits"], 1)
+
+    def test_write_bumps_version(self):
+        self.client.get(self.tasks_url)
+        Task.objects.create(project=self.project, creator=self.owner, title="New")
+        response = self.client.get(self.tasks_url)
+        self.assertEqual(response["X-Cache"], "MISS")
+        self.assertEqual(len(response.data["results"]), 4)
+
+    def test_query_string_and_role_are_part_of_key(self):
+        self.client.get(self.tasks_url)
+        self.assertEqual(self.client.get(self.tasks_url, {"status": "DONE"})["X-Cache"], "MISS")
+
+        viewer_client = APIClient()
+        viewer_client.force_authenticate(self.viewer)
+        self.assertEqual(viewer_client.get(self.tasks_url)["X-Cache"], "MISS")
+
+    def test_non_member_is_not_served_from_cache(self):
+        self.client.get(self.tasks_url)
+        outsider = User.objects.create_user(username="outsider", password="pw")
+        client = APIClient()
+        client.force_authenticate(outsider)
+        self.assertEqual(client.get(self.tasks_url).status_code, 403)
+
+
+@override_settings(
+    PROJECT_RESPONSE_CACHE={"ENABLED": True, "CONDITIONAL": True}, MEMBERSHIP_CACHE={"ENABLED": True}
+)
+class ConditionalGetTests(TestCase):
+    def setUp(self):
+        self.owner = User.objects.create_user(username="owner", password="pw")
+        self.project = make_project(self.owner)
+        fill_project(self.project, self.owner, tasks=2)
+        self.client = APIClient()
+        self.client.force_authenticate(self.owner)
+        base = f"/api/v1/projects/{self.project.id}/"
+        self.urls = [base, f"{base}tasks/", f"{base}dashboard/"]
+        reset_cache_stats()
+
+    def test_matching_etag_answers_304_without_queries(self):
+        for url in self.urls:
+            first = self.client.get(url)
+            self.assertEqual(first.status_code, 200, url)
+            with self.assertNumQueries(0):
+                again = self.client.get(url, HTTP_IF_NONE_MATCH=first["ETag"])
+            self.assertEqual(again.status_code, 304, url)
+            self.assertEqual(again["ETag"], first["ETag"])
+        self.assertEqual(cache_stats()["not_modified"], 3)
+
+    def test_writes_change_the_validators(self):
+        url = self.urls[1]
+        etag = self.client.get(url)["ETag"]
+        Comment.objects.create(task=Task.objects.first(), author=self.owner, body="new")
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+        self.assertNotEqual(self.client.get(url, {"status": "DONE"})["ETag"], response["ETag"])
+
+    def test_if_modified_since(self):
+        url = self.urls[0]
+        future = http_date(timezone.now().timestamp() + 60)
+        self.assertEqual(self.client.get(url, HTTP_IF_MODIFIED_SINCE=future).status_code, 304)
+        past = http_date(timezone.now().timestamp() - 3600)
+        self.assertEqual(self.client.get(url, HTTP_IF_MODIFIED_SINCE=past).status_code, 200)
+
+    @override_settings(PROJECT_RESPONSE_CACHE={"ENABLED": False, "CONDITIONAL": True})
+    def test_works_without_response_cache(self):
+        url = self.urls[1]
+        etag = self.client.get(url)["ETag"]
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+
+class MembershipResolutionTests(TestCase):
+    def setUp(self):
+        self.owner = User.objects.create_user(username="owner", password="pw")
+        self.member = User.objects.create_user(username="member", password="pw")
+        self.project = make_project(self.owner)
+        ProjectMember.objects.create(project=self.project, user=self.member, role="MEMBER")
+        self.task = Task.objects.create(project=self.project, creator=self.member, title="Mine")
+        self.subtask = Subtask.objects.create(task=self.task, title="sub")
+        self.client = APIClient()
+        self.client.force_authenticate(self.member)
+
+    def membership_queries(self, method, url, data):
+        with CaptureQueriesContext(connection) as ctx:
+            response = getattr(self.client, method)(url, data, format="json")
+        lookups = [q for q in ctx.captured_queries if 'FROM "projects_projectmember"' in q["sql"]]
+        return response, len(lookups)
+
+    def test_task_patch_resolves_membership_once(self):
+        url = f"/api/v1/projects/{self.project.id}/tasks/{self.task.id}/"
+        response, lookups = self.membership_queries("patch", url, {"title": "Renamed"})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(lookups, 1)
+
+    def test_subtask_patch_resolves_membership_once(self):
+        url = f"/api/v1/projects/{self.project.id}/tasks/{self.task.id}/subtasks/{self.subtask.id}/"
+        response, lookups = self.membership_queries("patch", url, {"is_done": True})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(lookups, 1)
+
+    def test_member_cannot_edit_others_task(self):
+        other = Task.objects.create(project=self.project, creator=self.owner, title="Theirs")
+        url = f"/api/v1/projects/{self.project.id}/tasks/{other.id}/"
+        self.assertEqual(self.client.patch(url, {"title": "x"}, format="json").status_code, 403)
+
+
+@override_settings(MEMBERSHIP_CACHE={"ENABLED": True})
+class MembershipCacheTests(TestCase):
+    def setUp(self):
+        self.owner = User.objects.create_user(username="owner", password="pw")
+        self.member = User.objects.create_user(username="member", password="pw")
+        self.project = make_project(self.owner)
+        self.membership = ProjectMember.objects.create(
+            project=self.project, user=self.member, role="VIEWER"
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.member)
+        self.url = f"/api/v1/projects/{self.project.id}/labels/"
+        membership_cache.clear()
+
+    def member_lookups(self):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.post(self.url, {"name": "bug"}, format="json")
+        lookups = [q for q in ctx.captured_queries if 'FROM "projects_projectmember"' in q["sql"]]
+        return response.status_code, len(lookups)
+
+    def test_role_is_reused_across_requests(self):
+        self.assertEqual(self.member_lookups(), (403, 1))
+        self.assertEqual(self.member_lookups(), (403, 0))
+        self.assertEqual(membership_cache.stats()["hits"], 1)
+
+    def test_role_change_invalidates_entry(self):
+        self.member_lookups()
+        self.membership.role = "ADMIN"
+        self.membership.save()
+        self.assertEqual(self.member_lookups(), (201, 1))
+
+        self.membership.delete()
+        self.assertEqual(self.member_lookups(), (403, 1))
+
+    @override_settings(MEMBERSHIP_CACHE={"ENABLED": True, "MAX_ENTRIES": 1})
+    def test_lru_evicts_oldest_entry(self):
+        other = make_project(self.owner, name="Other")
+        ProjectMember.objects.create(project=other, user=self.member, role="VIEWER")
+        membership_cache.get_role(self.member.id, self.project.id, lambda: "VIEWER")
+        membership_cache.get_role(self.member.id, other.id, lambda: "VIEWER")
+        self.assertEqual(membership_cache.stats()["evictions"], 1)
+        self.assertEqual(membership_cache.stats()["size"], 1)
+
+    def test_local_backend_does_not_keep_non_members(self):
+        self.membership.delete()
+        self.assertEqual(self.member_lookups(), (403, 1))
+        # Added through another worker: no invalidation reaches this one
+        ProjectMember.objects.bulk_create([ProjectMember(project=self.project, user=self.member, role="ADMIN")])
+        self.assertEqual(self.member_lookups(), (201, 1))
+
+    @override_settings(MEMBERSHIP_CACHE={"ENABLED": False})
+    def test_bypass_setting(self):
+        self.assertEqual(self.member_lookups(), (403, 1))
+        self.assertEqual(self.member_lookups(), (403, 1))
+
+    @override_settings(MEMBERSHIP_CACHE={"ENABLED": True, "BACKEND": "shared"})
+    def test_shared_backend(self):
+        self.assertEqual(self.member_lookups(), (403, 1))
+        self.assertEqual(self.member_lookups(), (403, 0))
+        self.membership.role = "ADMIN"
+        self.membership.save()
+        self.assertEqual(self.member_lookups(), (201, 1))
+
+
+@override_settings(PROJECT_RESPONSE_CACHE={"ENABLED": False}, MEMBERSHIP_CACHE={"ENABLED": True})
+class TaskQueryPlanTests(TestCase):
+    def setUp(self):
+        self.owner = User.objects.create_user(username="owner", password="pw")
+        self.helpers = [
+            User.objects.create_user(username=f"helper{i}", password="pw") for i in range(3)
+        ]
+        self.client = APIClient()
+        self.client.force_authenticate(self.owner)
+
+    def build_project(self, name, tasks, depth):
+        project = make_project(self.owner, name=name)
+        labels = [Label.objects.create(project=project, name=f"l{i}") for i in range(depth)]
+        for i in range(tasks):
+            task = Task.objects.create(project=project, creator=self.owner, title=f"T{i}")
+            for n in range(depth):
+                TaskAssignee.objects.create(task=task, user=self.helpers[n])
+                TaskLabel.objects.create(task=task, label=labels[n])
+                Subtask.objects.create(task=task, title=f"s{n}")
+                Comment.objects.create(task=task, author=self.helpers[n], body="c")
+        return project
+
+    def list_queries(self, project):
+        url = f"/api/v1/projects/{project.id}/tasks/"
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(ctx.captured_queries), response
+
+    def test_list_query_count_is_constant(self):
+        small = self.build_project("Small", tasks=1, depth=1)
+        big = self.build_project("Big", tasks=20, depth=3)
+
+        small_count, _ = self.list_queries(small)
+        big_count, response = self.list_queries(big)
+
+        self.assertEqual(small_count, big_count)
+        self.assertEqual(len(response.data["results"]), 20)
+        first = response.data["results"][0]
+        self.assertEqual(len(first["comments"]), 3)
+        self.assertEqual(len(first["labels"]), 3)
+
+    def test_detail_is_eager_loaded(self):
+        project = self.build_project("Detail", tasks=1, depth=3)
+        task = Task.objects.get(project=project)
+        url = f"/api/v1/projects/{project.id}/tasks/{task.id}/"
+        self.client.get(url)  # warm the membership cache
+        # task + assignees + labels + subtasks + comments
+        with self.assertNumQueries(5):
+            self.client.get(url)
+
+
+@override_settings(PROJECT_RESPONSE_CACHE={"ENABLED": False}, MEMBERSHIP_CACHE={"ENABLED": True})
+class ResponseShapeTests(TestCase):
+    def setUp(self):
+        self.owner = User.objects.create_user(username="owner", password="pw")
+        self.project = make_project(self.owner)
+        fill_project(self.project, self.owner, tasks=3)
+        self.client = APIClient()
+        self.client.force_authenticate(self.owner)
+        self.tasks_url = f"/api/v1/projects/{self.project.id}/tasks/"
+
+    def test_sparse_fields(self):
+        response = self.client.get(self.tasks_url, {"fields": "id,title,status"})
+        self.assertEqual(set(response.data["results"][0]), {"id", "title", "status"})
+
+    def test_summary_turns_collections_into_counts(self):
+        response = self.client.get(self.tasks_url, {"view": "summary"})
+        task = response.data["results"][0]
+        self.assertNotIn("comments", task)
+        self.assertEqual(task["comments_count"], 1)
+        self.assertEqual(task["subtasks_count"], 1)
+        self.assertEqual(task["labels_count"], 0)
+
+    def test_summary_expand_keeps_collection(self):
+        response = self.client.get(self.tasks_url, {"view": "summary", "expand": "comments"})
+        task = response.data["results"][0]
+        self.assertEqual(len(task["comments"]), 1)
+        self.assertNotIn("comments_count", task)
+        self.assertIn("subtasks_count", task)
+
+    def test_summary_does_not_prefetch_collections(self):
+        self.client.get(self.tasks_url)  # warm the membership cache
+        # a single page query: creator joined, counts as subqueries, no COUNT(*)
+        with self.assertNumQueries(1):
+            self.client.get(self.tasks_url, {"view": "summary"})
+
+    def test_project_summary(self):
+        response = self.client.get("/api/v1/projects/", {"view": "summary", "fields": "id,name,members_count"})
+        self.assertEqual(response.data["results"][0], {
+            "id": str(self.project.id), "name": "Demo", "members_count": 1,
+        })
+
+    def test_writes_ignore_shape(self):
+        url = f"{self.tasks_url}?fields=id"
+        response = self.client.post(url, {"title": "New"}, format="json")
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data["title"], "New")
+
+
+@override_settings(PROJECT_RESPONSE_CACHE={"ENABLED": False})
+class KeysetPaginationTests(TestCase):
+    def setUp(self):
+        self.owner = User.objects.create_user(username="owner", password="pw")
+        self.project = make_project(self.owner)
+        today = timezone.now().date()
+        for i in range(7):
+            Task.objects.create(
+                project=self.project, creator=self.owner, title=f"T{i}",
+                priority=["LOW", "HIGH"][i % 2],
+                due_date=None if i % 3 == 0 else today + timedelta(days=i % 2),
+            )
+        # identical timestamps exercise the id tie-breaker
+        Task.objects.filter(project=self.project).update(created_at=timezone.now())
+        self.client = APIClient()
+        self.client.force_authenticate(self.owner)
+        self.url = f"/api/v1/projects/{self.project.id}/tasks/"
+
+    def walk(self, params):
+        seen, url = [], self.url
+        response = self.client.get(url, params)
+        while True:
+            self.assertEqual(response.status_code, 200)
+            seen += [task["id"] for task in response.data["results"]]
+            if not response.data["next"]:
+                return seen, response
+            response = self.client.get(response.data["next"])
+
+    def test_pages_cover_every_task_once(self):
+        for ordering in ("", "priority", "-priority", "due_date", "-due_date", "created_at"):
+            seen, _ = self.walk({"page_size": 2, "ordering": ordering})
+            self.assertEqual(len(seen), 7, ordering)
+            self.assertEqual(len(set(seen)), 7, ordering)
+
+    def test_previous_link_returns_prior_page(self):
+        first = self.client.get(self.url, {"page_size": 3})
+        second = self.client.get(first.data["next"])
+        back = self.client.get(second.data["previous"])
+        self.assertEqual(
+            [t["id"] for t in back.data["results"]],
+            [t["id"] for t in first.data["results"]],
+        )
+
+    def test_counts_are_opt_in(self):
+        self.assertNotIn("count", self.client.get(self.url).data)
+        exact = self.client.get(self.url, {"count": "exact"}).data
+        self.assertEqual((exact["count"], exact["count_is_estimate"]), (7, False))
+        self.assertEqual(self.client.get(self.url, {"count": "estimate"}).data["count"], 7)
+
+    def test_invalid_cursor(self):
+        self.assertEqual(self.client.get(self.url, {"cursor": "garbage"}).status_code, 404)
+        first = self.client.get(self.url, {"page_size": 2})
+        cursor = first.data["next"].split("cursor=")[1]
+        response = self.client.get(self.url, {"cursor": cursor, "ordering": "priority"})
+        self.assertEqual(response.status_code, 404)
+
+    def test_activity_log_is_keyset_paginated(self):
+        for i in range(5):
+            ActivityLog.objects.create(
+                project=self.project, user=self.owner, action="UPDATE", object_type="Task"
+            )
+        url = f"/api/v1/projects/{self.project.id}/activity/"
+        response = self.client.get(url, {"page_size": 2})
+        self.assertEqual(len(response.data["results"]), 2)
+        self.assertIsNotNone(response.data["next"])
+
+
+@override_settings(PROJECT_RESPONSE_CACHE={"ENABLED": False})
+class TaskSearchTests(TestCase):
+    def setUp(self):
+        self.owner = User.objects.create_user(username="owner", password="pw")
+        self.project = make_project(self.owner)
+        self.deploy = Task.objects.create(
+            project=self.project, creator=self.owner, title="Deploy server",
+            description="Roll out the new build",
+        )
+        self.docs = Task.objects.create(
+            project=self.project, creator=self.owner, title="Write docs",
+            description="Mention the deployment checklist",
+        )
+        self.other = Task.objects.create(
+            project=self.project, creator=self.owner, title="Unrelated",
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.owner)
+        self.url = f"/api/v1/projects/{self.project.id}/tasks/"
+
+    def search_ids(self, query):
+        response = self.client.get(self.url, {"search": query})
+        self.assertEqual(response.status_code, 200)
+        return {task["id"] for task in response.data["results"]}
+
+    def test_search_filter_uses_index(self):
+        self.assertEqual(self.search_ids("deploy"), {str(self.deploy.id), str(self.docs.id)})
+        self.assertEqual(self.search_ids("serv deplo"), {str(self.deploy.id)})
+        self.assertEqual(self.search_ids('"unbalanced (quote'), set())
+
+    def test_index_follows_saves_and_comments(self):
+        self.other.title = "Server migration"
+        self.other.save()
+        self.assertIn(str(self.other.id), self.search_ids("migration"))
+
+        comment = Comment.objects.create(task=self.docs, author=self.owner, body="needs kubernetes")
+        self.assertEqual(self.search_ids("kubernetes"), {str(self.docs.id)})
+        comment.delete()
+        self.assertEqual(self.search_ids("kubernetes"), set())
+
+        self.deploy.soft_delete()
+        self.assertEqual(self.search_ids("roll"), set())
+
+    def test_ranked_search_with_highlights(self):
+        response = self.client.get(f"{self.url}search/", {"q": "deploy"})
+        self.assertEqual(response.status_code, 200)
+        results = response.data["results"]
+        # A title match outranks a description match
+        self.assertEqual([r["id"] for r in results], [str(self.deploy.id), str(self.docs.id)])
+        self.assertEqual(results[0]["highlights"]["title"], "<mark>Deploy</mark> server")
+        self.assertIn("<mark>deployment</mark>", results[1]["highlights"]["description"])
+        self.assertNotIn("title", results[1]["highlights"])
+
+    def test_highlights_escape_task_text(self):
+        Task.objects.create(
+            project=self.project, creator=self.owner,
+            title="<script>alert(1)</script> rollback", description='<img src=x onerror="x()"> rollback',
+        )
+        hits = self.client.get(f"{self.url}search/", {"q": "rollback"}).data["results"]
+        self.assertEqual(
+            hits[0]["highlights"]["title"], "&lt;script&gt;alert(1)&lt;/script&gt; <mark>rollback</mark>"
+        )
+        self.assertNotIn("<img", hits[0]["highlights"]["description"])
+        self.assertEqual(
+            render_marks(highlight("a <b> & deploy", ["deploy"])), "a &lt;b&gt; &amp; <mark>deploy</mark>"
+        )
+
+    def test_rebuild_command_backfills(self):
+        with connection.cursor() as cursor:
+            cursor.execute("DELETE FROM projects_task_fts")
+        self.assertEqual(self.search_ids("deploy"), set())
+
+        out = StringIO()
+        call_command("rebuild_search_index", stdout=out)
+        self.assertIn("Indexed 3 task(s)", out.getvalue())
+        self.assertEqual(self.search_ids("deploy"), {str(self.deploy.id), str(self.docs.id)})
+
+
+@override_settings(PROJECT_RESPONSE_CACHE={"ENABLED": False})
+class BulkTaskOperationTests(TestCase):
+    def setUp(self):
+        self.owner = User.objects.create_user(username="owner", password="pw")
+        self.member = User.objects.create_user(username="member", password="pw")
+        self.project = make_project(self.owner)
+        ProjectMember.objects.create(project=self.project, user=self.member, role="MEMBER")
+        self.label = Label.objects.create(project=self.project, name="bug")
+        self.tasks = [
+            Task.objects.create(project=self.project, creator=self.owner, title=f"T{i}")
+            for i in range(3)
+        ]
+        self.client = APIClient()
+        self.client.force_authenticate(self.owner)
+        self.url = f"/api/v1/projects/{self.project.id}/tasks/bulk/"
+
+    def post(self, operations, **extra):
+        return self.client.post(self.url, {"operations": operations, **extra}, format="json")
+
+    def test_mixed_operations(self):
+        ops = [{"op": "create", "data": {"title": "New", "assignee_ids": [self.member.id],
+                                         "label_ids": [str(self.label.id)]}}]
+        ops += [{"op": "update", "id": str(t.id), "data": {"status": "DONE"}} for t in self.tasks[:2]]
+        ops += [{"op": "delete", "id": str(self.tasks[2].id)}]
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.post(ops)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([r["status"] for r in response.data["results"]], [201, 200, 200, 204])
+        created = Task.objects.get(title="New")
+        self.assertEqual(list(created.assignees.values_list("user_id", flat=True)), [self.member.id])
+        self.assertEqual(created.task_labels.count(), 1)
+        self.assertEqual(Task.objects.filter(project=self.project, status="DONE").count(), 2)
+        self.assertIsNotNone(Task._base_manager.get(pk=self.tasks[2].pk).deleted_at)
+
+        stats = get_project_stats(self.project)
+        self.assertEqual((stats["total_tasks"], stats["completed_tasks"]), (3, 2))
+        counters = ProjectStats.objects.get(project=self.project)
+        self.assertEqual((counters.todo_count, counters.done_count), (1, 2))
+        self.assertEqual(ActivityLog.objects.filter(project=self.project, action="BULK").count(), 1)
+
+    def test_stats_are_not_recounted(self):
+        ops = [{"op": "update", "id": str(t.id), "data": {"status": "DONE"}} for t in self.tasks]
+        with CaptureQueriesContext(connection) as ctx:
+            self.post(ops)
+        self.assertFalse([q for q in ctx.captured_queries if "COUNT(" in q["sql"]])
+        self.assertEqual(ProjectStats.objects.get(project=self.project).done_count, 3)
+
+    def test_query_count_does_not_grow_with_batch(self):
+        def run(count):
+            ops = [{"op": "create", "data": {"title": f"N{i}"}} for i in range(count)]
+            with CaptureQueriesContext(connection) as ctx:
+                self.assertEqual(self.post(ops).status_code, 200)
+            return len(ctx.captured_queries)
+
+        run(1)  # warm the membership cache
+        self.assertEqual(run(2), run(20))
+
+    def test_per_item_errors_and_member_permissions(self):
+        mine = Task.objects.create(project=self.project, creator=self.member, title="Mine")
+        self.client.force_authenticate(self.member)
+        response = self.post([
+            {"op": "update", "id": str(mine.id), "data": {"priority": "HIGH"}},
+            {"op": "update", "id": str(self.tasks[0].id), "data": {"priority": "HIGH"}},
+            {"op": "update", "id": str(mine.id), "data": {"status": "NOPE"}},
+            {"op": "delete"},
+        ])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([r["status"] for r in response.data["results"]], [200, 403, 400, 400])
+        mine.refresh_from_db()
+        self.assertEqual(mine.priority, "HIGH")
+
+    def test_atomic_rejects_whole_batch(self):
+        response = self.post(
+            [{"op": "create", "data": {"title": "ok"}}, {"op": "create", "data": {}}],
+            atomic=True,
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(response.data["applied"])
+        self.assertFalse(Task.objects.filter(title="ok").exists())
+
+
+@override_settings(PROJECT_RESPONSE_CACHE={"ENABLED": False})
+class RelationSyncTests(TestCase):
+    def setUp(self):
+        self.owner = User.objects.create_user(username="owner", password="pw")
+        self.users = [User.objects.create_user(username=f"u{i}", password="pw") for i in range(3)]
+        self.project = make_project(self.owner)
+        self.labels = [Label.objects.create(project=self.project, name=f"l{i}") for i in range(3)]
+        self.task = Task.objects.create(project=self.project, creator=self.owner, title="T")
+        self.client = APIClient()
+        self.client.force_authenticate(self.owner)
+        self.url = f"/api/v1/projects/{self.project.id}/tasks/{self.task.id}/"
+
+    def patch(self, data):
+        response = self.client.patch(self.url, data, format="json")
+        self.assertEqual(response.status_code, 200)
+        return response
+
+    def test_only_the_difference_is_written(self):
+        self.patch({"assignee_ids": [self.users[0].id, self.users[1].id],
+                    "label_ids": [str(self.labels[0].id)]})
+        kept = TaskAssignee.objects.get(task=self.task, user=self.users[0])
+
+        self.patch({"assignee_ids": [self.users[0].id, self.users[2].id],
+                    "label_ids": [str(self.labels[0].id), str(self.labels[1].id)]})
+        self.assertEqual(
+            set(self.task.assignees.values_list("user_id", flat=True)),
+            {self.users[0].id, self.users[2].id},
+        )
+        self.assertTrue(TaskAssignee.objects.filter(pk=kept.pk).exists())
+        self.assertEqual(self.task.task_labels.count(), 2)
+
+        with CaptureQueriesContext(connection) as ctx:
+            self.patch({"assignee_ids": [self.users[0].id, self.users[2].id]})
+        writes = [q["sql"] for q in ctx.captured_queries if "projects_taskassignee" in q["sql"]
+                  and not q["sql"].startswith("SELECT")]
+        self.assertEqual(writes, [])
+
+    def test_labels_of_other_projects_are_ignored(self):
+        foreign = Label.objects.create(project=make_project(self.owner, "Other"), name="x")
+        self.patch({"label_ids": [str(foreign.id), str(self.labels[2].id)]})
+        self.assertEqual(list(self.task.task_labels.values_list("label_id", flat=True)), [self.labels[2].id])
+
+    def test_set_members(self):
+        ProjectMember.objects.create(project=self.project, user=self.users[0], role="MEMBER")
+        ProjectMember.objects.create(project=self.project, user=self.users[1], role="MEMBER")
+        url = f"/api/v1/projects/{self.project.id}/members/set/"
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.put(url, {"members": [
+                {"user_id": self.users[0].id, "role": "ADMIN"},
+                {"user_id": self.users[2].id},
+                {"user_id": self.owner.id, "role": "VIEWER"},
+            ]}, format="json")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual((response.data["added"], response.data["updated"], response.data["removed"]), (1, 1, 1))
+        roles = dict(ProjectMember.objects.filter(project=self.project).values_list("user__username", "role"))
+        self.assertEqual(roles, {"owner": "OWNER", "u0": "ADMIN", "u2": "MEMBER"})
+        self.assertEqual(get_project_stats(self.project)["members_count"], 3)
+
+        # The role change is visible to permission checks right away
+        self.client.force_authenticate(self.users[0])
+        self.assertEqual(self.client.delete(f"/api/v1/projects/{self.project.id}/labels/{self.labels[0].id}/").status_code, 204)
+
+        self.client.force_authenticate(self.users[2])
+        self.assertEqual(self.client.put(url, {"members": []}, format="json").status_code, 403)
+
+
+@override_settings(
+    PROJECT_RESPONSE_CACHE={"ENABLED": False, "CONDITIONAL": False},
+    TASK_SYNC={"COMMIT_LAG_SECONDS": 0},
+)
+class TaskDeltaSyncTests(TestCase):
+    def setUp(self):
+        self.owner = User.objects.create_user(username="owner", password="pw")
+        self.project = make_project(self.owner)
+        self.tasks = [
+            Task.objects.create(project=self.project, creator=self.owner, title=f"T{i}")
+            for i in range(4)
+        ]
+        self.client = APIClient()
+        self.client.force_authenticate(self.owner)
+        self.url = f"/api/v1/projects/{self.project.id}/tasks/changes/"
+
+    def sync(self, since=None, **params):
+        if since:
+            params["since"] = since
+        response = self.client.get(self.url, params)
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def test_first_sync_then_only_changes(self):
+        first = self.sync()
+        self.assertEqual(len(first["results"]), 4)
+        self.assertFalse(first["has_more"])
+        self.assertEqual(self.sync(first["cursor"])["results"], [])
+
+        self.tasks[0].status = "DONE"
+        self.tasks[0].save()
+        self.tasks[1].soft_delete()
+        Comment.objects.create(task=self.tasks[2], author=self.owner, body="ping")
+        delta = self.sync(first["cursor"])
+        self.assertEqual(
+            [t["id"] for t in delta["results"]], [str(self.tasks[0].id), str(self.tasks[2].id)]
+        )
+        self.assertEqual([d["id"] for d in delta["deleted"]], [str(self.tasks[1].id)])
+
+    def test_paging_with_limit(self):
+        seen, cursor = [], None
+        while True:
+            page = self.sync(cursor, limit=3)
+            seen += [t["id"] for t in page["results"]]
+            cursor = page["cursor"]
+            if not page["has_more"]:
+                break
+        self.assertEqual(sorted(seen), sorted(str(t.id) for t in self.tasks))
+
+    def test_cost_follows_changes_not_project_size(self):
+        cursor = self.sync()["cursor"]
+        for i in range(30):
+            Task.objects.create(project=self.project, creator=self.owner, title=f"X{i}")
+        cursor = self.sync(cursor)["cursor"]
+        Task.objects.filter(pk=self.tasks[3].pk).update(title="changed", updated_at=timezone.now())
+        self.assertEqual(len(self.sync(cursor)["results"]), 1)
+
+        plan = (
+            Task._base_manager.filter(project=self.project, updated_at__gt=timezone.now())
+            .order_by("updated_at", "id").explain()
+        )
+        self.assertIn("projects_ta_project_152dcc_idx", plan)
+
+    def test_invalid_cursor(self):
+        self.assertEqual(self.client.get(self.url, {"since": "nope"}).status_code, 400)
+
+
+class ProjectReportTests(TestCase):
+    def setUp(self):
+        root = tempfile.TemporaryDirectory()
+        self.addCleanup(root.cleanup)
+        override = self.settings(PROJECT_REPORTS={"ROOT": root.name, "WAIT_SECONDS": 0, "STORE": True})
+        override.enable()
+        self.addCleanup(override.disable)
+        self.root = root.name
+
+        self.owner = User.objects.create_user(username="owner", password="pw")
+        self.client = APIClient()
+        self.client.force_authenticate(self.owner)
+        self.project = make_project(self.owner)
+        self.url = f"/api/v1/projects/{self.project.id}/report/"
+
+    def download(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        content = b"".join(response.streaming_content)
+        response.close()
+        return content
+
+    def rendered_files(self):
+        return sorted(p.name for p in reports.report_path(self.project.id, "x").parent.glob("*.pdf"))
+
+    def test_rendered_once_per_project_version(self):
+        with mock.patch.object(reports, "render_report", wraps=reports.render_report) as render:
+            first = self.download()
+            self.assertEqual(self.download(), first)
+            self.assertEqual(render.call_count, 1)
+
+            Task.objects.create(project=self.project, creator=self.owner, title="new")
+            self.download()
+            self.assertEqual(render.call_count, 2)
+        self.assertEqual(len(self.rendered_files()), 1)
+
+    def test_task_listing_is_written_page_by_page(self):
+        Task.objects.bulk_create(
+            Task(project=self.project, creator=self.owner, title=f"Task {i}") for i in range(150)
+        )
+        with self.settings(PROJECT_REPORTS={"ROOT": self.root, "CHUNK_SIZE": 40, "STORE": True}):
+            content = self.download()
+        self.assertGreaterEqual(len(re.findall(rb"/Type /Page\b(?!s)", content)), 4)
+
+    def test_cold_render_in_the_pool_returns_a_job(self):
+        with mock.patch.object(reports, "render_inline", return_value=False), \
+                mock.patch.object(reports, "get_executor") as executor:
+            response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(response.data["status"], "pending")
+        self.assertEqual(response["Location"], response.data["status_url"])
+        self.assertEqual(self.client.get(response.data["status_url"]).status_code, 202)
+
+        job, project_id, key = executor.return_value.submit.call_args.args[1:]
+        reports.run_job(job, project_id, key, in_worker=False)
+        status = self.client.get(response.data["status_url"])
+        self.assertEqual(status.status_code, 200)
+        self.assertEqual(status.data["status"], "done")
+        self.assertEqual(status.data["download_url"], f"http://testserver{self.url}")
+        self.download()
+
+    def test_files_are_found_without_the_cache(self):
+        with mock.patch.object(reports, "render_report", wraps=reports.render_report) as render:
+            self.download()
+            cache.clear()  # another worker, or an evicted entry: same watermark
+            self.download()
+        self.assertEqual(render.call_count, 1)
+
+    def test_job_unknown_to_this_worker(self):
+        with mock.patch.object(reports, "render_inline", return_value=False), \
+                mock.patch.object(reports, "get_executor") as executor:
+            response = self.client.get(self.url)
+            cache.clear()
+            # Started again here, then found on disk
+            self.assertEqual(self.client.get(response.data["status_url"]).status_code, 202)
+        reports.run_job(*executor.return_value.submit.call_args.args[1:], in_worker=False)
+        cache.clear()
+        self.assertEqual(self.client.get(response.data["status_url"]).data["status"], "done")
+
+    def test_lost_job_state_asks_to_retry(self):
+        with mock.patch.object(reports, "render_inline", return_value=False), \
+                mock.patch.object(reports, "get_executor"), \
+                mock.patch.object(reports, "get_job", return_value=None):
+            response = self.client.get(self.url)
+        self.assertEqual((response.status_code, response["Retry-After"]), (503, "2"))
+
+    def test_report_removed_before_open_is_requested_again(self):
+        self.download()
+        real_open = open
+        opened = []
+
+        def open_once_missing(path, *args, **kwargs):
+            if str(path).endswith(".pdf") and not opened:
+                opened.append(path)
+                raise FileNotFoundError(path)
+            return real_open(path, *args, **kwargs)
+
+        with mock.patch("builtins.open", open_once_missing):
+            self.assertTrue(self.download().startswith(b"%PDF"))
+        self.assertEqual(len(opened), 1)
+
+    def test_without_store_every_request_renders(self):
+        with self.settings(PROJECT_REPORTS={"ROOT": self.root, "STORE": False}), \
+                mock.patch.object(reports, "render_report", wraps=reports.render_report) as render:
+            self.assertTrue(self.download().startswith(b"%PDF"))
+            self.download()
+        self.assertEqual(render.call_count, 2)
+        self.assertEqual(self.rendered_files(), [])
+
+    def test_members_only(self):
+        stranger = User.objects.create_user(username="stranger", password="pw")
+        self.client.force_authenticate(stranger)
+        self.assertEqual(self.client.get(self.url).status_code, 403)
+
+
+class ExportTests(TestCase):
+    def setUp(self):
+        self.owner = User.objects.create_user(username="owner", password="pw")
+        self.client = APIClient()
+        self.client.force_authenticate(self.owner)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.project = make_project(self.owner)
+        self.label = fill_project(self.project, self.owner, tasks=4)
+        self.first = Task.objects.filter(project=self.project).order_by("created_at", "id").first()
+        TaskAssignee.objects.create(task=self.first, user=self.owner)
+        TaskLabel.objects.create(task=self.first, label=self.label)
+        self.base = f"/api/v1/projects/{self.project.id}"
+
+    def fetch(self, path, params=None):
+        response = self.client.get(f"{self.base}/{path}", params or {})
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        content = b"".join(response.streaming_content)
+        return response, content
+
+    def test_tasks_csv_uses_list_filters(self):
+        response, content = self.fetch("tasks/export/csv/", {"status": "TODO"})
+        self.assertEqual(response["Content-Type"], "text/csv; charset=utf-8")
+        self.assertIn('filename="tasks-', response["Content-Disposition"])
+        rows = list(csv.DictReader(content.decode().splitlines()))
+        self.assertEqual([row["title"] for row in rows], ["Task 0", "Task 2"])
+        self.assertEqual(rows[0]["assignees"], "owner")
+        self.assertEqual(rows[0]["labels"], self.label.name)
+        self.assertEqual(rows[1]["assignees"], "")
+
+        _, content = self.fetch("tasks/export/csv/", {"assignee": self.owner.id})
+        self.assertEqual(len(content.decode().splitlines()), 2)
+
+    def test_tasks_ndjson_gzip(self):
+        response, content = self.fetch("tasks/export/ndjson/", {"gzip": "1"})
+        self.assertEqual(response["Content-Type"], "application/gzip")
+        self.assertTrue(response["Content-Disposition"].endswith('.ndjson.gz"'))
+        lines = gzip.decompress(content).decode().splitlines()
+        tasks = [json.loads(line) for line in lines]
+        self.assertEqual([t["title"] for t in tasks], [f"Task {i}" for i in range(4)])
+        self.assertEqual(tasks[0]["id"], str(self.first.id))
+        self.assertEqual(tasks[0]["assignees"], ["owner"])
+
+    def test_query_count_follows_chunks_not_rows(self):
+        def export_queries():
+            with CaptureQueriesContext(connection) as ctx:
+                self.fetch("tasks/export/csv/")
+            return len(ctx.captured_queries)
+
+        export_queries()  # warm the membership cache
+        with self.settings(EXPORTS={"CHUNK_SIZE": 100}):
+            small = export_queries()
+            fill_project(self.project, self.owner, tasks=30)
+            self.assertEqual(export_queries(), small)
+        with self.settings(EXPORTS={"CHUNK_SIZE": 10}):
+            # 34 tasks: four chunks, each with one assignee and one label lookup
+            self.assertEqual(export_queries(), small + 3 * 2)
+
+    def test_activity_csv(self):
+        _, content = self.fetch("activity/export/csv/")
+        rows = list(csv.DictReader(content.decode().splitlines()))
+        self.assertEqual(len(rows), ActivityLog.objects.filter(project=self.project).count())
+        self.assertEqual(rows[0]["object_type"], "Project")
+        self.assertEqual(rows[0]["user"], "owner")
+
+    def test_empty_export_has_header(self):
+        _, content = self.fetch("tasks/export/csv/", {"status": "BLOCKED"})
+        self.assertEqual(content.decode().strip().split(","), list(TASK_COLUMNS))
+
+    @override_settings(EXPORTS={"CHUNK_SIZE": 10, "FLUSH_ROWS": 1})
+    def test_asgi_body_is_pulled_a_chunk_at_a_time(self):
+        read = []
+
+        def rows():
+            for row in task_rows(Task.objects.filter(project=self.project)):
+                read.append(row["title"])
+                yield row
+
+        request = AsyncRequestFactory().get(f"{self.base}/tasks/export/csv/")
+        response = export_response(request, rows(), TASK_COLUMNS, "csv", "tasks")
+        self.assertTrue(response.is_async)
+
+        async def first_chunk():
+            body = aiter(response)
+            chunk = await anext(body)
+            await body.aclose()
+            return chunk
+
+        self.assertIn(b"Task 0", async_to_sync(first_chunk)())
+        self.assertEqual(read, ["Task 0"])  # the other rows were never read
+
+
+class TaskImportTests(TestCase):
+    CSV = (
+        "title,description,status,priority,due_date,assignees,labels,subtasks\n"
+        "Alpha,first,TODO,HIGH,2030-01-02,owner;ghost,backend;api,write spec;review\n"
+        "Beta,,done,,,,backend,\n"
+        ",missing title,TODO,LOW,,,,\n"
+        "Gamma,,BOGUS,LOW,not-a-date,,,\n"
+        "Delta,,IN_PROGRESS,URGENT,,owner,,\n"
+    )
+
+    def setUp(self):
+        self.owner = User.objects.create_user(username="owner", password="pw")
+        self.client = APIClient()
+        self.client.force_authenticate(self.owner)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.project = make_project(self.owner)
+        Label.objects.create(project=self.project, name="backend")
+        self.url = f"/api/v1/projects/{self.project.id}/tasks/import/"
+
+    def upload(self, content, kind="csv", params="", name="tasks.csv"):
+        return self.client.post(
+            f"{self.url}{kind}/{params}",
+            {"file": SimpleUploadedFile(name, content)},
+            format="multipart",
+        )
+
+    def test_csv_upload_creates_tasks_and_relations(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.upload(self.CSV.encode())
+        self.assertEqual(response.status_code, 201)
+        summary = response.data
+        self.assertEqual((summary["rows"], summary["created"], summary["invalid"]), (5, 3, 2))
+        self.assertEqual([e["row"] for e in summary["errors"]], [3, 4])
+        self.assertEqual(set(summary["errors"][1]["errors"]), {"status", "due_date"})
+        self.assertEqual(summary["unknown_users"], ["ghost"])
+        self.assertEqual((summary["subtasks"], summary["assignees"], summary["labels_created"]), (2, 2, 1))
+
+        alpha = Task.objects.get(project=self.project, title="Alpha")
+        self.assertEqual((alpha.priority, str(alpha.due_date)), ("HIGH", "2030-01-02"))
+        self.assertEqual(sorted(alpha.task_labels.values_list("label__name", flat=True)), ["api", "backend"])
+        self.assertEqual(list(alpha.assignees.values_list("user__username", flat=True)), ["owner"])
+        self.assertEqual(alpha.subtasks.count(), 2)
+        self.assertEqual(Task.objects.get(title="Beta").status, "DONE")
+
+        stats = get_project_stats(self.project)
+        self.assertEqual((stats["total_tasks"], stats["completed_tasks"], stats["total_subtasks"]), (3, 1, 2))
+        self.assertEqual(stats["labels_count"], 2)
+        self.assertEqual(ProjectStats.objects.get(project=self.project).in_progress_count, 1)
+        bulk = ActivityLog.objects.filter(project=self.project, action="BULK")
+        self.assertEqual(bulk.count(), 1)
+        self.assertIn("imported 3 task(s)", bulk.get().description)
+        search = self.client.get(f"/api/v1/projects/{self.project.id}/tasks/search/", {"q": "delta"})
+        self.assertEqual([t["title"] for t in search.data["results"]], ["Delta"])
+
+    def test_export_round_trip(self):
+        fill_project(self.project, self.owner, tasks=3)
+        exported = b"".join(self.client.get(
+            f"/api/v1/projects/{self.project.id}/tasks/export/ndjson/"
+        ).streaming_content)
+        target = make_project(self.owner, name="Target")
+        url = f"/api/v1/projects/{target.id}/tasks/import/ndjson/"
+        response = self.client.post(url, exported, content_type="application/x-ndjson")
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(
+            sorted(Task.objects.filter(project=target).values_list("title", "status")),
+            sorted(Task.objects.filter(project=self.project).values_list("title", "status")),
+        )
+
+    def test_dry_run_writes_nothing(self):
+        body = gzip.compress(b'{"title": "A", "labels": ["new"]}\n{"title": 5}\nnot json\n')
+        response = self.client.post(
+            f"{self.url}ndjson/?dry_run=1&gzip=1", body, content_type="application/x-ndjson"
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.data["dry_run"])
+        self.assertEqual((response.data["created"], response.data["invalid"]), (2, 1))
+        self.assertEqual(response.data["labels_created"], 1)
+        self.assertFalse(Task.objects.filter(project=self.project).exists())
+        self.assertFalse(Label.objects.filter(name="new").exists())
+
+    def test_queries_follow_chunks_not_rows(self):
+        def run(count):
+            body = "".join(
+                json.dumps({"title": f"T{i}", "assignees": ["owner"], "labels": ["backend"], "subtasks": ["s"]}) + "\n"
+                for i in range(count)
+            ).encode()
+            with CaptureQueriesContext(connection) as ctx:
+                self.upload(body, "ndjson", name="t.ndjson")
+            return len(ctx.captured_queries)
+
+        run(1)  # warm the membership cache
+        self.assertEqual(run(10), run(60))
+
+    def test_progress_stream(self):
+        with self.settings(IMPORTS={"CHUNK_SIZE": 2}):
+            response = self.upload(self.CSV.encode(), params="?progress=1")
+            lines = [json.loads(line) for line in b"".join(response.streaming_content).splitlines()]
+        self.assertEqual([line["type"] for line in lines], ["progress"] * 3 + ["summary"])
+        self.assertEqual([line["rows"] for line in lines[:3]], [2, 4, 5])
+        self.assertEqual(lines[-1]["created"], 3)
+
+    @override_settings(IMPORTS={"CHUNK_SIZE": 2})
+    def test_progress_is_sent_per_chunk_under_asgi(self):
+        from .views import TaskViewSet
+
+        request = AsyncRequestFactory().post(
+            f"{self.url}csv/?progress=1", {"file": SimpleUploadedFile("tasks.csv", self.CSV.encode())}
+        )
+        force_authenticate(request, self.owner)
+        view = TaskViewSet.as_view({"post": "import_tasks"})
+        response = view(request, project_pk=str(self.project.id), kind="csv")
+        self.assertTrue(response.is_async)
+
+        async def first_line():
+            body = aiter(response)
+            line = await anext(body)
+            await body.aclose()
+            return json.loads(line)
+
+        self.assertEqual(async_to_sync(first_line)()["rows"], 2)
+        self.assertEqual(Task.objects.filter(project=self.project).count(), 2)  # Delta was never read
+
+    def test_members_cannot_import(self):
+        member = User.objects.create_user(username="member", password="pw")
+        ProjectMember.objects.create(project=self.project, user=member, role="MEMBER")
+        self.client.force_authenticate(member)
+        self.assertEqual(self.upload(self.CSV.encode()).status_code, 403)
+
+    def test_management_command(self):
+        with tempfile.NamedTemporaryFile("wb", suffix=".csv.gz", delete=False) as handle:
+            handle.write(gzip.compress(self.CSV.encode()))
+        self.addCleanup(os.unlink, handle.name)
+        out = StringIO()
+        call_command("import_tasks", str(self.project.id), handle.name, "--chunk-size", "2", stdout=out)
+        output = out.getvalue()
+        self.assertEqual(output.count("row(s) read"), 3)
+        self.assertIn("Row 3:", output)
+        self.assertIn("✅ Imported 3 task(s), 2 subtask(s)", output)
+        self.assertEqual(Task.objects.filter(project=self.project).count(), 3)
+
+
+class AttachmentUploadTests(TestCase):
+    DATA = b"0123456789" * 10
+
+    def setUp(self):
+        root = tempfile.TemporaryDirectory()
+        self.addCleanup(root.cleanup)
+        override = self.settings(
+            MEDIA_ROOT=os.path.join(root.name, "media"),
+            ATTACHMENT_UPLOADS={"ROOT": os.path.join(root.name, "partial"), "MAX_CHUNK_SIZE": 40},
+        )
+        override.enable()
+        self.addCleanup(override.disable)
+
+        self.owner = User.objects.create_user(username="owner", password="pw")
+        self.client = APIClient()
+        self.client.force_authenticate(self.owner)
+        self.project = make_project(self.owner)
+        self.task = Task.objects.create(project=self.project, creator=self.owner, title="T")
+        self.url = f"/api/v1/projects/{self.project.id}/tasks/{self.task.id}/"
+
+    def start(self, data=None, **extra):
+        data = self.DATA if data is None else data
+        return self.client.post(
+            f"{self.url}uploads/", {"filename": "notes.txt", "size": len(data), **extra}, format="json"
+        )
+
+    def send(self, upload_id, offset, chunk):
+        return self.client.generic(
+            "PATCH", f"{self.url}uploads/{upload_id}/", chunk,
+            content_type="application/offset+octet-stream", HTTP_UPLOAD_OFFSET=str(offset),
+        )
+
+    def upload(self, data=None):
+        data = self.DATA if data is None else data
+        upload_id = self.start(data).data["id"]
+        for offset in range(0, len(data), 40):
+            response = self.send(upload_id, offset, data[offset:offset + 40])
+        return response
+
+    def test_chunked_upload_resumes_from_offset(self):
+        response = self.start()
+        self.assertEqual((response.status_code, response.data["offset"]), (201, 0))
+        upload_id = response.data["id"]
+
+        self.assertEqual(self.send(upload_id, 0, self.DATA[:40])["Upload-Offset"], "40")
+        conflict = self.send(upload_id, 0, self.DATA[:40])
+        self.assertEqual(conflict.status_code, 409)
+        self.assertEqual(self.client.get(f"{self.url}uploads/{upload_id}/")["Upload-Offset"], "40")
+        self.assertEqual(self.send(upload_id, 40, self.DATA[40:41] * 41).status_code, 400)  # over chunk size
+
+        self.send(upload_id, 40, self.DATA[40:80])
+        response = self.send(upload_id, 80, self.DATA[80:])
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data["sha256"], hashlib.sha256(self.DATA).hexdigest())
+        attachment = Attachment.objects.get(pk=response.data["id"])
+        with attachment.file.open("rb") as handle:
+            self.assertEqual(handle.read(), self.DATA)
+        self.assertFalse(UploadSession.objects.exists())
+
+    def test_offset_is_checked_again_under_the_row_lock(self):
+        from .uploads import append_chunk, UploadConflict
+
+        upload_id = self.start().data["id"]
+        stale = UploadSession.objects.get(pk=upload_id)
+        self.send(upload_id, 0, self.DATA[:40])  # another worker's chunk for the same offset
+        with self.assertRaises(UploadConflict):
+            append_chunk(stale, 0, io.BytesIO(self.DATA[:40]), 40)
+        self.assertEqual(UploadSession.objects.get(pk=upload_id).received, 40)
+
+    def test_resume_rebuilds_hash_state(self):
+        from .uploads import hashers
+
+        upload_id = self.start(sha256=hashlib.sha256(self.DATA).hexdigest()).data["id"]
+        self.send(upload_id, 0, self.DATA[:40])
+        hashers.pop(upload_id, 40)  # as if the next chunk reached another worker
+        self.send(upload_id, 40, self.DATA[40:80])
+        self.assertEqual(self.send(upload_id, 80, self.DATA[80:]).status_code, 201)
+
+    def test_digest_mismatch_is_rejected(self):
+        upload_id = self.start(sha256="0" * 64).data["id"]
+        self.send(upload_id, 0, self.DATA[:40])
+        self.send(upload_id, 40, self.DATA[40:80])
+        response = self.send(upload_id, 80, self.DATA[80:])
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(Attachment.objects.exists())
+        self.assertFalse(UploadSession.objects.exists())
+
+    def test_identical_uploads_share_one_blob(self):
+        first = self.upload()
+        legacy = self.client.post(
+            f"{self.url}attachments/", {"file": SimpleUploadedFile("copy.txt", self.DATA)}, format="multipart"
+        )
+        self.assertEqual(legacy.status_code, 201)
+        self.assertEqual(legacy.data["filename"], "copy.txt")
+        self.assertEqual(legacy.data["sha256"], first.data["sha256"])
+        blob = Blob.objects.get()
+        self.assertEqual(blob.ref_count, 2)
+        self.assertEqual(set(Attachment.objects.values_list("file", flat=True)), {blob.file.name})
+
+        path = blob.file.path
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.delete(f"{self.url}attachments/{first.data['id']}/")
+        self.assertEqual(Blob.objects.get().ref_count, 1)
+        self.assertTrue(os.path.exists(path))
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.delete(f"{self.url}attachments/{legacy.data['id']}/")
+        self.assertFalse(Blob.objects.exists())
+        self.assertFalse(os.path.exists(path))
+
+    def test_edits_cannot_replace_the_stored_file(self):
+        first = self.upload()
+        url = f"{self.url}attachments/{first.data['id']}/"
+        response = self.client.patch(
+            url, {"file": SimpleUploadedFile("evil.txt", b"other"), "size": 5, "filename": "renamed.txt"},
+            format="multipart",
+        )
+        self.assertEqual(response.status_code, 200)
+        attachment = Attachment.objects.get(pk=first.data["id"])
+        self.assertEqual((attachment.filename, attachment.size), ("renamed.txt", len(self.DATA)))
+        self.assertEqual(attachment.file.name, Blob.objects.get().file.name)
+        with attachment.file.open("rb") as handle:
+            self.assertEqual(handle.read(), self.DATA)
+
+    def test_declared_digest_skips_the_transfer_within_a_project(self):
+        digest = self.upload().data["sha256"]
+        response = self.start(sha256=digest)
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data["sha256"], digest)
+        self.assertFalse(UploadSession.objects.exists())
+        self.assertEqual(Blob.objects.get().ref_count, 2)
+
+        # Knowing the digest is not enough to get another project's file
+        other = make_project(self.owner, name="Other")
+        other_task = Task.objects.create(project=other, creator=self.owner, title="T")
+        response = self.client.post(
+            f"/api/v1/projects/{other.id}/tasks/{other_task.id}/uploads/",
+            {"filename": "x.txt", "size": len(self.DATA), "sha256": digest},
+            format="json",
+        )
+        self.assertIn("offset", response.data)
+
+    def test_sessions_are_private_and_abortable(self):
+        upload_id = self.start().data["id"]
+        member = User.objects.create_user(username="member", password="pw")
+        ProjectMember.objects.create(project=self.project, user=member, role="MEMBER")
+        other = APIClient()
+        other.force_authenticate(member)
+        self.assertEqual(other.get(f"{self.url}uploads/{upload_id}/").status_code, 404)
+
+        self.assertEqual(self.client.delete(f"{self.url}uploads/{upload_id}/").status_code, 204)
+        self.assertFalse(UploadSession.objects.exists())
+
+    def test_purge_stale_uploads(self):
+        self.start()
+        UploadSession.objects.update(updated_at=timezone.now() - timedelta(days=2))
+        out = StringIO()
+        call_command("purge_stale_uploads", stdout=out)
+        self.assertIn("Purged 1 upload(s)", out.getvalue())
+        self.assertFalse(UploadSession.objects.exists())
+
+
+class AttachmentDownloadTests(TestCase):
+    DATA = bytes(range(256)) * 4
+
+    def setUp(self):
+        root = tempfile.TemporaryDirectory()
+        self.addCleanup(root.cleanup)
+        override = self.settings(MEDIA_ROOT=root.name)
+        override.enable()
+        self.addCleanup(override.disable)
+
+        self.owner = User.objects.create_user(username="owner", password="pw")
+        self.client = APIClient()
+        self.client.force_authenticate(self.owner)
+        self.project = make_project(self.owner)
+        task = Task.objects.create(project=self.project, creator=self.owner, title="T")
+        base = f"/api/v1/projects/{self.project.id}/tasks/{task.id}/attachments/"
+        response = self.client.post(
+            base, {"file": SimpleUploadedFile("data.bin", self.DATA)}, format="multipart"
+        )
+        self.url = f"{base}{response.data['id']}/download/"
+        self.etag = f'"{response.data["sha256"]}"'
+
+    def test_full_download_with_validators(self):
+        response = self.client.get(self.url, HTTP_ACCEPT="application/octet-stream")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b"".join(response.streaming_content), self.DATA)
+        self.assertEqual(response["Content-Length"], str(len(self.DATA)))
+        self.assertEqual(response["ETag"], self.etag)
+        self.assertEqual(response["Accept-Ranges"], "bytes")
+        self.assertIn('filename="data.bin"', response["Content-Disposition"])
+
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=self.etag).status_code, 304)
+
+    def test_ranges(self):
+        response = self.client.get(self.url, HTTP_RANGE="bytes=10-19")
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(b"".join(response.streaming_content), self.DATA[10:20])
+        self.assertEqual(response["Content-Range"], f"bytes 10-19/{len(self.DATA)}")
+        self.assertEqual(response["Content-Length"], "10")
+
+        suffix = self.client.get(self.url, HTTP_RANGE="bytes=-5")
+        self.assertEqual(b"".join(suffix.streaming_content), self.DATA[-5:])
+        open_ended = self.client.get(self.url, HTTP_RANGE="bytes=1020-")
+        self.assertEqual(b"".join(open_ended.streaming_content), self.DATA[1020:])
+
+        unsatisfiable = self.client.get(self.url, HTTP_RANGE=f"bytes={len(self.DATA)}-")
+        self.assertEqual(unsatisfiable.status_code, 416)
+        self.assertEqual(unsatisfiable["Content-Range"], f"bytes */{len(self.DATA)}")
+
+        stale = self.client.get(self.url, HTTP_RANGE="bytes=0-9", HTTP_IF_RANGE='"old"')
+        self.assertEqual(stale.status_code, 200)
+        self.assertEqual(b"".join(stale.streaming_content), self.DATA)
+
+    @override_settings(ATTACHMENT_DOWNLOADS={"BLOCK_SIZE": 100})
+    def test_asgi_reads_a_block_at_a_time(self):
+        attachment = Attachment.objects.get()
+
+        async def download(range_header=""):
+            request = AsyncRequestFactory().get(self.url, headers={"Range": range_header})
+            response = serve_attachment(request, attachment)
+            self.assertTrue(response.is_async)
+            chunks = [chunk async for chunk in response]  # one per read of the file
+            response.close()
+            return response, chunks
+
+        response, chunks = async_to_sync(download)()
+        self.assertEqual(response["Content-Length"], str(len(self.DATA)))
+        self.assertEqual([len(chunk) for chunk in chunks], [100] * 10 + [24])
+        self.assertEqual(b"".join(chunks), self.DATA)
+
+        response, chunks = async_to_sync(download)("bytes=10-259")
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual([len(chunk) for chunk in chunks], [100, 100, 50])
+        self.assertEqual(b"".join(chunks), self.DATA[10:260])
+
+    def test_proxy_offload(self):
+        with self.settings(ATTACHMENT_DOWNLOADS={"MODE": "x-accel-redirect"}):
+            response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response["X-Accel-Redirect"].startswith("/protected-media/blobs/"))
+        self.assertEqual(response.content, b"")
+
+        with self.settings(ATTACHMENT_DOWNLOADS={"MODE": "x-sendfile"}):
+            response = self.client.get(self.url)
+        self.assertTrue(os.path.isfile(response["X-Sendfile"]))
+
+    def test_members_only(self):
+        outsider = User.objects.create_user(username="outsider", password="pw")
+        self.client.force_authenticate(outsider)
+        self.assertEqual(self.client.get(self.url).status_code, 403)
+
+        # An attachment id is not reachable through another project's URL
+        other = make_project(outsider, name="Other")
+        foreign = self.url.replace(str(self.project.id), str(other.id))
+        self.assertEqual(self.client.get(foreign).status_code, 404)
+
+
+def image_file(name="photo.png", size=(800, 600), mode="RGB", fmt="PNG"):
+    from PIL import Image
+
+    buffer = io.BytesIO()
+    Image.new(mode, size, "red").save(buffer, fmt)
+    return SimpleUploadedFile(name, buffer.getvalue(), content_type=f"image/{fmt.lower()}")
+
+
+class ThumbnailTests(TestCase):
+    def setUp(self):
+        root = tempfile.TemporaryDirectory()
+        self.addCleanup(root.cleanup)
+        override = self.settings(MEDIA_ROOT=root.name)
+        override.enable()
+        self.addCleanup(override.disable)
+
+        self.owner = User.objects.create_user(username="owner", password="pw")
+        self.client = APIClient()
+        self.client.force_authenticate(self.owner)
+        self.project = make_project(self.owner)
+        task = Task.objects.create(project=self.project, creator=self.owner, title="T")
+        self.url = f"/api/v1/projects/{self.project.id}/tasks/{task.id}/attachments/"
+
+    def upload(self, file):
+        return self.client.post(self.url, {"file": file}, format="multipart")
+
+    def test_image_attachment_gets_variants(self):
+        from PIL import Image
+
+        with self.captureOnCommitCallbacks(execute=False) as callbacks:
+            response = self.upload(image_file())
+        # Pending until the job ran: every size falls back to the original
+        download = f"http://testserver{self.url}{response.data['id']}/download/"
+        self.assertEqual(response.data["thumbnails"]["status"], "pending")
+        self.assertEqual(response.data["thumbnails"]["small"], f"{download}?variant=small")
+        original = self.client.get(response.data["thumbnails"]["small"])
+        self.assertEqual(original["Content-Type"], "image/png")
+
+        for callback in callbacks:
+            callback()
+        data = self.client.get(f"{self.url}{response.data['id']}/").data["thumbnails"]
+        self.assertEqual(data["status"], "ready")
+        self.assertEqual(data["medium"], f"{download}?variant=medium")
+
+        small = self.client.get(data["small"])
+        self.assertEqual(small["Content-Type"], "image/webp")
+        self.assertNotEqual(small["ETag"], original["ETag"])
+        self.assertEqual(Image.open(io.BytesIO(b"".join(small.streaming_content))).size, (64, 48))
+        large = self.client.get(data["large"])  # never upscaled: the original
+        self.assertEqual((large["Content-Type"], large["ETag"]), ("image/png", original["ETag"]))
+
+        attachment = Attachment.objects.get(pk=response.data["id"])
+        self.assertTrue(attachment.thumbnails["variants"]["small"].endswith(".small.webp"))
+
+    def test_variants_are_for_members_only(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            small = self.upload(image_file()).data["thumbnails"]["small"]
+        self.assertEqual(self.client.get(small.replace("small", "huge")).status_code, 400)
+
+        self.client.force_authenticate(User.objects.create_user(username="outsider", password="pw"))
+        self.assertEqual(self.client.get(small).status_code, 403)
+
+    def test_small_original_shared_is_not_decoded_again(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            first = self.upload(image_file("a.png", size=(40, 30))).data
+        self.assertEqual(Attachment.objects.get(pk=first["id"]).thumbnails["status"], "ready")
+
+        with mock.patch("projects.thumbnails.build_variants") as build:
+            with self.captureOnCommitCallbacks(execute=True):
+                second = self.upload(image_file("b.png", size=(40, 30))).data
+        build.assert_not_called()
+        attachment = Attachment.objects.get(pk=second["id"])
+        self.assertEqual(attachment.thumbnails["variants"], {size: attachment.file.name for size in ("small", "medium", "large")})
+
+    def test_shared_blob_reuses_variants_and_deletes_them_last(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            first = self.upload(image_file("a.png")).data
+            second = self.upload(image_file("b.png")).data
+        attachment = Attachment.objects.get(pk=second["id"])
+        self.assertEqual(attachment.thumbnails["status"], "ready")
+        small = attachment.thumbnails["variants"]["small"]
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.delete(f"{self.url}{first['id']}/")
+        self.assertTrue(default_storage.exists(small))
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.delete(f"{self.url}{second['id']}/")
+        self.assertFalse(default_storage.exists(small))
+
+    def test_resume_thumbnails_runs_lost_jobs(self):
+        from accounts.models import Profile
+
+        with self.captureOnCommitCallbacks(execute=False):  # jobs lost, e.g. to a restart
+            response = self.upload(image_file())
+            self.client.patch("/api/v1/auth/profile/", {"avatar": image_file("me.png")}, format="multipart")
+        profile = Profile.objects.get(user=self.owner)
+        self.assertEqual(profile.thumbnails["status"], "pending")
+
+        call_command("resume_thumbnails", stdout=StringIO())  # not stale yet
+        self.assertEqual(Attachment.objects.get(pk=response.data["id"]).thumbnails, {})
+
+        out = StringIO()
+        call_command("resume_thumbnails", "--older-than", "-60", stdout=out)
+        self.assertIn("2 file(s)", out.getvalue())
+        self.assertEqual(Attachment.objects.get(pk=response.data["id"]).thumbnails["status"], "ready")
+        self.assertEqual(Profile.objects.get(user=self.owner).thumbnails["status"], "ready")
+
+    def test_non_images_and_broken_images(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            text = self.upload(SimpleUploadedFile("a.txt", b"hello", content_type="text/plain")).data
+            broken = self.upload(SimpleUploadedFile("b.png", b"not a png", content_type="image/png")).data
+        self.assertIsNone(text["thumbnails"])
+        data = self.client.get(f"{self.url}{broken['id']}/").data["thumbnails"]
+        self.assertEqual(data["status"], "failed")
+        self.assertEqual(b"".join(self.client.get(data["small"]).streaming_content), b"not a png")
@@ -0,0 +1,166 @@
+import io
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import connection, transaction
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+logger = logging.getLogger(__name__)
+
+
+# --------------------------------------------------------------------
+# 🔹 Settings
+# --------------------------------------------------------------------
+DEFAULTS = {
+    "SIZES": {"small": 64, "medium": 256, "large": 1024},   # longest side, in pixels
+    "FORMAT": "WEBP",
+    "QUALITY": 80,
+    "MAX_PIXELS": 50_000_000,   # larger originals are not decoded at all
+    "WORKERS": 2,               # resize threads per process; 0 resizes in the request
+}
+
+
+def thumbnail_setting(name):
+    return getattr(settings, "THUMBNAILS", {}).get(name, DEFAULTS[name])
+
+
+PENDING, READY, FAILED = "pending", "ready", "failed"
+
+
+def pending_state():
+    """State of a row whose job is queued; `queued_at` lets resume_thumbnails spot lost jobs."""
+    return {"status": PENDING, "queued_at": time.time()}
+
+
+# --------------------------------------------------------------------
+# 🔹 Variants, stored next to the original as "<name>.<size>.<ext>"
+#
+# Names depend only on the original's name, so attachments sharing a
+# blob (projects.uploads) share its variants as well.
+# --------------------------------------------------------------------
+def is_image(content_type):
+    return (content_type or "").startswith("image/") and content_type != "image/svg+xml"
+
+
+def variant_name(name, size):
+    return f"{name}.{size}.{thumbnail_setting('FORMAT').lower()}"
+
+
+def variant_names(name):
+    return [variant_name(name, size) for size in thumbnail_setting("SIZES")]
+
+
+def build_variants(name):
+    """Resize the stored image `name` into every size; the thumbnails state to save."""
+    sizes = thumbnail_setting("SIZES")
+    variants = {size: variant_name(name, size) for size in sizes}
+    if all(default_storage.exists(variant) for variant in variants.values()):
+        return {"status": READY, "variants": variants}  # same bytes seen before
+
+    with default_storage.open(name, "rb") as original:
+        image = Image.open(original)
+        if image.width * image.height > thumbnail_setting("MAX_PIXELS"):
+            return {"status": FAILED, "error": "Image is too large to preview."}
+        image = ImageOps.exif_transpose(image)
+        image.load()
+    if image.mode not in ("RGB", "RGBA"):
+        image = image.convert("RGBA" if "A" in image.getbands() or "transparency" in image.info else "RGB")
+
+    for size, pixels in sorted(sizes.items(), key=lambda item: -item[1]):
+        if max(image.size) <= pixels:
+            variants[size] = name  # never upscale: the original is small enough
+            continue
+        image.thumbnail((pixels, pixels), Image.LANCZOS)  # largest first, each from the last
+        buffer = io.BytesIO()
+        image.save(buffer, thumbnail_setting("FORMAT"), quality=thumbnail_setting("QUALITY"))
+        default_storage.delete(variants[size])  # a leftover of a crashed run
+        default_storage.save(variants[size], ContentFile(buffer.getvalue()))
+    return {"status": READY, "variants": variants}
+
+
+def delete_variants(name):
+    for variant in variant_names(name):
+        default_storage.delete(variant)
+
+
+def variant_urls(field_file, thumbnails, request=None, url=None):
+    """
+    `{"status", <size>: url, ...}` for a serializer. `url(size)` gives
+    the path of a size (e.g. through an authenticated download view);
+    by default it is the storage URL of the variant. Until the variants
+    are ready (or when they failed) those point at the original, so
+    clients always have something to show.
+    """
+    if not field_file:
+        return None
+    thumbnails = thumbnails or {}
+    status = thumbnails.get("status", PENDING)
+    variants = thumbnails.get("variants", {})
+    urls = {"status": status}
+    for size in thumbnail_setting("SIZES"):
+        path = url(size) if url else field_file.storage.url(variants.get(size, field_file.name))
+        urls[size] = request.build_absolute_uri(path) if request else path
+    return urls
+
+
+# --------------------------------------------------------------------
+# 🔹 Jobs: resizing runs on a small thread pool after the upload commits
+#
+# Queued jobs live in this process only; rows whose job was lost to a
+# restart stay pending until `manage.py resume_thumbnails` runs them.
+# --------------------------------------------------------------------
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(thumbnail_setting("WORKERS"), thread_name_prefix="thumbnail")
+        return _executor
+
+
+def make_state(name):
+    try:
+        return build_variants(name)
+    except (UnidentifiedImageError, Image.DecompressionBombError):
+        # Not an image Pillow can decode: a normal outcome for user uploads
+        return {"status": FAILED, "error": "Image could not be read."}
+    except Exception:
+        logger.exception("Thumbnails of %s failed", name)
+        return {"status": FAILED, "error": "Image could not be read."}
+
+
+def run_job(model, field, name, in_worker=True):
+    try:
+        # Every row pointing at this file; a row whose file changed meanwhile is left alone
+        rows = model.objects.filter(**{field: name})
+        # A row sharing the file (projects.uploads) already has its state,
+        # including sizes the original fits and so have no file to probe
+        state = rows.filter(thumbnails__status=READY).values_list("thumbnails", flat=True).first()
+        rows.update(thumbnails=state or make_state(name))
+    finally:
+        if in_worker:
+            connection.close()
+
+
+def queue_thumbnails(instance, field):
+    """Generate the variants of `instance.<field>` once the current transaction commits."""
+    model, name = type(instance), getattr(instance, field).name
+    if not name:
+        return
+
+    def submit():
+        # A pool thread cannot see uncommitted rows (tests run inside one)
+        if connection.in_atomic_block or not thumbnail_setting("WORKERS"):
+            run_job(model, field, name, in_worker=False)
+        else:
+            get_executor().submit(run_job, model, field, name)
+
+    transaction.on_commit(submit)
@@ -0,0 +1,282 @@
+import hashlib
+import mimetypes
+import threading
+from collections import OrderedDict
+from datetime import timedelta
+from pathlib import Path
+
+from django.conf import settings
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.db import DatabaseError, IntegrityError, transaction
+from django.db.models import F
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.exceptions import APIException, NotFound, ValidationError
+
+from .models import Attachment, Blob, UploadSession
+from .thumbnails import delete_variants
+
+
+# --------------------------------------------------------------------
+# 🔹 Settings
+# --------------------------------------------------------------------
+DEFAULTS = {
+    # Partial files, outside MEDIA_ROOT; must be storage every host sees
+    # when chunks of one upload can reach different machines
+    "ROOT": Path(settings.BASE_DIR) / "cache" / "uploads",
+    "MAX_SIZE": 2 * 1024 ** 3,
+    "MAX_CHUNK_SIZE": 8 * 1024 ** 2,   # bounds how long one request holds a worker
+    "READ_SIZE": 64 * 1024,
+    "TTL": 24 * 3600,                  # seconds an idle session may be resumed
+    "HASHERS": 1000,                   # in-progress SHA-256 states kept per process
+}
+
+
+def upload_setting(name):
+    return getattr(settings, "ATTACHMENT_UPLOADS", {}).get(name, DEFAULTS[name])
+
+
+class UploadConflict(APIException):
+    status_code = status.HTTP_409_CONFLICT
+    default_detail = "Upload offset does not match."
+    default_code = "conflict"
+
+
+# --------------------------------------------------------------------
+# 🔹 Content-addressed blobs, reference-counted by Attachment rows
+# --------------------------------------------------------------------
+def blob_name(sha256):
+    return f"blobs/{sha256[:2]}/{sha256[2:4]}/{sha256}"
+
+
+class LocalFile(File):
+    """A finished partial file; FileSystemStorage moves it instead of copying."""
+
+    def temporary_file_path(self):
+        return self.file.name
+
+
+def hash_file(file, read_size=None):
+    """`(sha256, size)` of a file-like object, read from its current position."""
+    hasher, size = hashlib.sha256(), 0
+    for chunk in iter(lambda: file.read(read_size or upload_setting("READ_SIZE")), b""):
+        hasher.update(chunk)
+        size += len(chunk)
+    return hasher.hexdigest(), size
+
+
+def acquire_blob(sha256, size, content):
+    """
+    The Blob of `sha256` with one more reference, storing `content` (a
+    File) only if no blob has those bytes yet. Call inside a transaction.
+    """
+    if Blob.objects.filter(pk=sha256).update(ref_count=F("ref_count") + 1):
+        return Blob.objects.get(pk=sha256)
+    name = default_storage.save(blob_name(sha256), content)
+    try:
+        with transaction.atomic():
+            return Blob.objects.create(sha256=sha256, file=name, size=size, ref_count=1)
+    except IntegrityError:
+        # Another upload of the same bytes won the race; share its copy
+        default_storage.delete(name)
+        Blob.objects.filter(pk=sha256).update(ref_count=F("ref_count") + 1)
+        return Blob.objects.get(pk=sha256)
+
+
+def release_blob(sha256):
+    """Drop one reference; the last one deletes the blob and, once committed, its file."""
+    Blob.objects.filter(pk=sha256).update(ref_count=F("ref_count") - 1)
+    unused = Blob.objects.filter(pk=sha256, ref_count__lte=0)
+    name = unused.values_list("file", flat=True).first()
+    # Conditional delete: a concurrent acquire_blob may have re-referenced it
+    if name is not None and unused.delete()[0]:
+        transaction.on_commit(lambda: delete_blob_files(name))
+
+
+def delete_blob_files(name):
+    default_storage.delete(name)
+    delete_variants(name)
+
+
+def create_attachment(task_id, uploader, blob, filename, content_type):
+    return Attachment.objects.create(
+        task_id=task_id,
+        uploader=uploader,
+        blob=blob,
+        file=blob.file.name,
+        filename=filename,
+        content_type=content_type or mimetypes.guess_type(filename)[0] or "",
+        size=blob.size,
+    )
+
+
+def attach_uploaded_file(task_id, uploader, uploaded):
+    """Single-request upload (multipart "file"), stored through the same blob store."""
+    uploaded.seek(0)
+    sha256, size = hash_file(uploaded)
+    uploaded.seek(0)
+    with transaction.atomic():
+        blob = acquire_blob(sha256, size, uploaded)
+        return create_attachment(task_id, uploader, blob, uploaded.name, uploaded.content_type)
+
+
+# --------------------------------------------------------------------
+# 🔹 Resumable sessions
+#
+# Chunks are written straight to a partial file while a SHA-256 is fed
+# with the same bytes. The hash state lives in process memory; when a
+# chunk lands on another worker (or after a restart) it is rebuilt from
+# the partial file, so only a resume pays for re-reading.
+# --------------------------------------------------------------------
+class HasherCache:
+    def __init__(self):
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def pop(self, session_id, offset):
+        with self._lock:
+            entry = self._entries.pop(session_id, None)
+        return entry[1] if entry and entry[0] == offset else None
+
+    def put(self, session_id, offset, hasher):
+        with self._lock:
+            self._entries[session_id] = (offset, hasher)
+            while len(self._entries) > upload_setting("HASHERS"):
+                self._entries.popitem(last=False)
+
+
+hashers = HasherCache()
+
+
+def partial_path(session_id):
+    return Path(upload_setting("ROOT")) / f"{session_id}.part"
+
+
+def start_upload(task, uploader, filename, size, content_type="", sha256=""):
+    """
+    `(session, attachment)`: a new upload session, or — when the client
+    sent the digest of bytes already attached in this project — the
+    attachment, right away. Knowing a digest is no proof of having the
+    bytes, so blobs of other projects are only shared after a full upload.
+    """
+    if size > upload_setting("MAX_SIZE"):
+        raise ValidationError({"size": [f"Ensure this value is at most {upload_setting('MAX_SIZE')}."]})
+    sha256 = sha256.lower()
+    if sha256 and Attachment.objects.filter(blob_id=sha256, blob__size=size, task__project_id=task.project_id).exists():
+        with transaction.atomic():
+            if Blob.objects.filter(pk=sha256).update(ref_count=F("ref_count") + 1):
+                blob = Blob.objects.get(pk=sha256)
+                return None, create_attachment(task.pk, uploader, blob, filename, content_type)
+
+    session = UploadSession.objects.create(
+        task=task, uploader=uploader, filename=filename,
+        content_type=content_type, size=size, sha256=sha256,
+    )
+    path = partial_path(session.pk)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.touch()
+    if size == 0:
+        return None, finish_upload(session, hashlib.sha256())
+    return session, None
+
+
+def append_chunk(session, offset, stream, length):
+    """
+    Write `length` bytes of `stream` at `offset` (which must be where the
+    upload stands). Returns the new offset, or the Attachment when that
+    chunk completed the upload.
+
+    The session row stays locked (SELECT ... FOR UPDATE NOWAIT) while the
+    chunk is written, so a second chunk for the same offset, from any
+    process, gets 409 instead of writing into the same partial file.
+    SQLite has no row locks: there, run a single worker process.
+    """
+    if offset != session.received:
+        raise UploadConflict(f"Upload is at offset {session.received}.")
+    if length is None or length <= 0:
+        raise ValidationError({"detail": "Send the chunk with a Content-Length."})
+    if length > upload_setting("MAX_CHUNK_SIZE"):
+        raise ValidationError({"detail": f"Chunks are limited to {upload_setting('MAX_CHUNK_SIZE')} bytes."})
+    if offset + length > session.size:
+        raise ValidationError({"detail": "Chunk goes past the declared size."})
+
+    with transaction.atomic():
+        try:
+            current = UploadSession.objects.select_for_update(nowait=True).values_list(
+                "received", flat=True
+            ).get(pk=session.pk)
+        except UploadSession.DoesNotExist:
+            raise NotFound("Upload was aborted.")
+        except DatabaseError:
+            raise UploadConflict("Another chunk of this upload is in progress.")
+        if offset != current:  # another chunk got in first
+            raise UploadConflict(f"Upload is at offset {current}.")
+
+        hasher = hashers.pop(session.pk, offset) or rehash(session.pk, offset)
+        written = 0
+        with open(partial_path(session.pk), "r+b") as partial:
+            partial.seek(offset)
+            partial.truncate()  # drop whatever a broken earlier attempt left behind
+            read_size = upload_setting("READ_SIZE")
+            while written < length:
+                data = stream.read(min(read_size, length - written))
+                if not data:
+                    break
+                partial.write(data)
+                hasher.update(data)
+                written += len(data)
+
+        # A dropped connection keeps what arrived; the client resumes from there
+        session.received = offset + written
+        session.save(update_fields=["received", "updated_at"])
+
+    # Only the chunk that reached `size` gets here with it: no lock needed
+    if session.received == session.size:
+        return finish_upload(session, hasher)
+    hashers.put(session.pk, session.received, hasher)
+    return session.received
+
+
+def rehash(session_id, offset):
+    hasher = hashlib.sha256()
+    with open(partial_path(session_id), "rb") as partial:
+        remaining, read_size = offset, upload_setting("READ_SIZE")
+        while remaining:
+            data = partial.read(min(read_size, remaining))
+            hasher.update(data)
+            remaining -= len(data)
+    return hasher
+
+
+def finish_upload(session, hasher):
+    sha256 = hasher.hexdigest()
+    path = partial_path(session.pk)
+    if session.sha256 and session.sha256 != sha256:
+        abort_upload(session)
+        raise ValidationError({"sha256": ["Uploaded content does not match the declared digest."]})
+
+    with transaction.atomic():
+        with open(path, "rb") as partial:
+            blob = acquire_blob(sha256, session.size, LocalFile(partial, name=session.filename))
+        attachment = create_attachment(
+            session.task_id, session.uploader, blob, session.filename, session.content_type
+        )
+        session.delete()
+    path.unlink(missing_ok=True)  # still there when the blob already existed
+    return attachment
+
+
+def abort_upload(session):
+    hashers.pop(session.pk, None)
+    partial_path(session.pk).unlink(missing_ok=True)
+    session.delete()
+
+
+def purge_stale_uploads():
+    """Abort sessions idle for longer than TTL; returns how many."""
+    cutoff = timezone.now() - timedelta(seconds=upload_setting("TTL"))
+    stale = list(UploadSession.objects.filter(updated_at__lt=cutoff))
+    for session in stale:
+        abort_upload(session)
+    return len(stale)
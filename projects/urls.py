@@ -3,10 +3,11 @@ from rest_framework_nested import routers
 
 from .views import (
     ProjectViewSet, ProjectMemberViewSet, LabelViewSet,
-    TaskViewSet, SubtaskViewSet, CommentViewSet, AttachmentViewSet
+    TaskViewSet, SubtaskViewSet, CommentViewSet, AttachmentViewSet, AttachmentUploadViewSet
 )
 from events.views import ActivityLogViewSet  # 👈 import the ActivityLog viewset
-from .views import project_report
+from events.stream import activity_stream
+from .views import project_report, project_report_job, response_cache_stats, membership_cache_stats
 
 # Base router
 router = routers.DefaultRouter()
@@ -28,11 +29,17 @@ tasks_router = routers.NestedDefaultRouter(projects_router, r'tasks', lookup='ta
 tasks_router.register(r'subtasks', SubtaskViewSet, basename='task-subtasks')
 tasks_router.register(r'comments', CommentViewSet, basename='task-comments')
 tasks_router.register(r'attachments', AttachmentViewSet, basename='task-attachments')
+tasks_router.register(r'uploads', AttachmentUploadViewSet, basename='task-uploads')
 
 
 urlpatterns = [
+    # Ahead of the routers, whose activity/<pk>/ route would swallow it
+    path("projects/<uuid:project_pk>/activity/stream/", activity_stream, name="project-activity-stream"),
     path('', include(router.urls)),
     path('', include(projects_router.urls)),
     path('', include(tasks_router.urls)),
     path("projects/<uuid:pk>/report/", project_report, name="project-report"),
+    path("projects/<uuid:pk>/report/jobs/<str:job>/", project_report_job, name="project-report-job"),
+    path("cache/stats/", response_cache_stats, name="response-cache-stats"),
+    path("cache/membership/", membership_cache_stats, name="membership-cache-stats"),
 ]
@@ -1,33 +1,53 @@
-from rest_framework import viewsets, permissions, filters
+from rest_framework import viewsets, permissions
 from rest_framework.decorators import action
 from rest_framework.response import Response
-from django.db.models import Count, Q, Max
-from django.utils import timezone
+from django.db import transaction
+from django.db.models import Exists, OuterRef
 from django.shortcuts import get_object_or_404
 from rest_framework import serializers
 from .models import (
     Project, ProjectMember, Label, Task, Subtask,
-    Comment, Attachment
+    TaskAssignee, TaskLabel, Comment, Attachment, UploadSession
 )
 from .serializers import (
     ProjectSerializer, ProjectMemberSerializer, LabelSerializer,
     TaskSerializer, SubtaskSerializer,
-    CommentSerializer, AttachmentSerializer,
-    ProjectDashboardSerializer
+    CommentSerializer, AttachmentSerializer, UploadSessionSerializer,
+    ProjectDashboardSerializer, BulkTaskSerializer, SetMembersSerializer
 )
 from .permissions import (
-    IsProjectMember, IsOwnerOrAdmin, IsTaskAssigneeOrAdmin, IsNotViewer
+    IsProjectMember, IsOwnerOrAdmin, IsTaskAssigneeOrAdmin, IsNotViewer,
+    get_project_role,
+)
+from .stats import get_project_stats, bump_project_stats
+from .cache import ProjectCacheMixin, cache_stats, bump_project_version_on_commit
+from .membership import membership_cache, invalidate_membership_on_commit
+from .relations import sync_relation
+from .pagination import KeysetPagination
+from .search import TaskSearchFilter, search_tasks, search_setting
+from .bulk import apply_bulk_operations
+from .sync import task_changes, sync_setting
+from .export import TASK_COLUMNS, export_response, query_flag, task_rows, wants_gzip
+from .imports import TaskImporter, open_records
+from .streaming import streaming_body
+from .downloads import DownloadNegotiation, serve_attachment
+from .thumbnails import thumbnail_setting
+from .uploads import (
+    abort_upload, append_chunk, attach_uploaded_file, start_upload, upload_setting,
+)
+from .reports import (
+    request_report, wait_for_job, report_setting, render_report_file, find_job as find_report_job,
 )
 from rest_framework import status
 from django.contrib.auth import get_user_model
 
-from io import BytesIO
-from django.http import FileResponse
-from reportlab.lib.pagesizes import A4
-from reportlab.pdfgen import canvas
+import json
+
+from django.http import FileResponse, StreamingHttpResponse
+from django.urls import reverse
 from rest_framework.decorators import api_view, permission_classes
-from rest_framework.permissions import IsAuthenticated
-from events.models import ActivityLog
+from rest_framework.permissions import IsAuthenticated, IsAdminUser
+from events.activity import log_activity
 User = get_user_model()
 
 
@@ -35,12 +55,15 @@ User = get_user_model()
 # 🧩 Projects
 # Everyone in a project can view. Only OWNER or ADMIN can modify.
 # --------------------------------------------------------------------
-class ProjectViewSet(viewsets.ModelViewSet):
+class ProjectViewSet(ProjectCacheMixin, viewsets.ModelViewSet):
     serializer_class = ProjectSerializer
     permission_classes = [permissions.IsAuthenticated]
 
     def get_queryset(self):
-        return Project.objects.filter(members__user=self.request.user).distinct()
+        qs = Project.objects.filter(members__user_id=self.request.user.id).distinct()
+        if self.action in ["list", "retrieve"]:
+            qs = self.get_serializer().shape_queryset(qs)
+        return qs
 
     def get_permissions(self):
         if self.action in ["update", "partial_update", "destroy"]:
@@ -60,55 +83,13 @@ class ProjectViewSet(viewsets.ModelViewSet):
         permission_classes=[permissions.IsAuthenticated, IsProjectMember],
     )
     def dashboard(self, request, pk=None):
-        project = self.get_object()
+        def build(request):
+            project = self.get_object()
+            data = get_project_stats(project)
+            serializer = ProjectDashboardSerializer(data)
+            return Response(serializer.data)
 
-        # ---- Basic counts ----
-        total_tasks = Task.objects.filter(project=project, deleted_at__isnull=True).count()
-        completed_tasks = Task.objects.filter(project=project, status="DONE").count()
-        pending_tasks = total_tasks - completed_tasks
-
-        total_subtasks = Subtask.objects.filter(task__project=project).count()
-        completed_subtasks = Subtask.objects.filter(task__project=project, is_done=True).count()
-
-        members_count = ProjectMember.objects.filter(project=project).count()
-        labels_count = Label.objects.filter(project=project).count()
-        comments_count = Comment.objects.filter(task__project=project).count()
-        attachments_count = Attachment.objects.filter(task__project=project).count()
-
-        # ---- Overdue tasks ----
-        today = timezone.now().date()
-        overdue_tasks = Task.objects.filter(
-            project=project,
-            due_date__lt=today,
-            status__in=["TODO", "IN_PROGRESS", "BLOCKED"],
-            deleted_at__isnull=True
-        ).count()
-
-        # ---- Last activity ----
-        last_activity = (
-            Task.objects.filter(project=project).aggregate(last=Max("updated_at"))["last"]
-            or project.updated_at
-        )
-
-        # ---- Combine all ----
-        data = {
-            "project_id": project.id,
-            "project_name": project.name,
-            "total_tasks": total_tasks,
-            "completed_tasks": completed_tasks,
-            "pending_tasks": pending_tasks,
-            "total_subtasks": total_subtasks,
-            "completed_subtasks": completed_subtasks,
-            "members_count": members_count,
-            "labels_count": labels_count,
-            "comments_count": comments_count,
-            "attachments_count": attachments_count,
-            "last_activity": last_activity,
-            "overdue_tasks": overdue_tasks,
-        }
-
-        serializer = ProjectDashboardSerializer(data)
-        return Response(serializer.data)
+        return self.cached_response(request, build)
 
     # ✅ NEW: Archive / Unarchive project
     @action(
@@ -124,7 +105,7 @@ class ProjectViewSet(viewsets.ModelViewSet):
         project.save()
 
         # Optional: log the action
-        ActivityLog.objects.create(
+        log_activity(
             project=project,
             user=request.user,
             action="archived" if project.is_archived else "unarchived",
@@ -145,7 +126,7 @@ class ProjectViewSet(viewsets.ModelViewSet):
 # 🧩 Project Members
 # Visible to all members, editable only by OWNER/ADMIN
 # --------------------------------------------------------------------
-class ProjectMemberViewSet(viewsets.ModelViewSet):
+class ProjectMemberViewSet(ProjectCacheMixin, viewsets.ModelViewSet):
     serializer_class = ProjectMemberSerializer
     permission_classes = [permissions.IsAuthenticated, IsProjectMember]
 
@@ -169,12 +150,65 @@ class ProjectMemberViewSet(viewsets.ModelViewSet):
         role = self.request.data.get("role", ProjectMember.Role.MEMBER)
         serializer.save(project=project, user=user, role=role)
 
+    @action(
+        detail=False,
+        methods=["put"],
+        url_path="set",
+        permission_classes=[permissions.IsAuthenticated, IsOwnerOrAdmin],
+    )
+    def set_members(self, request, project_pk=None):
+        """
+        Replace the member list in one call: {"members": [{"user_id": 1, "role": "ADMIN"}, ...]}.
+        Only the difference is written; owners can't be removed or demoted here.
+        """
+        payload = SetMembersSerializer(data=request.data)
+        payload.is_valid(raise_exception=True)
+        project = get_object_or_404(Project, id=project_pk)
+
+        owners = set(
+            ProjectMember.objects.filter(project=project, role=ProjectMember.Role.OWNER)
+            .values_list("user_id", flat=True)
+        )
+        wanted = {user_id: {"role": ProjectMember.Role.OWNER} for user_id in owners}
+        for entry in payload.validated_data["members"]:
+            if entry["user_id"] not in owners:
+                wanted[entry["user_id"]] = {"role": entry["role"]}
+
+        with transaction.atomic():
+            # Removals fire the usual post_delete hooks; bulk inserts and
+            # role updates don't, so their side effects are applied here.
+            result = sync_relation(
+                ProjectMember, "project", "user", {project.pk: wanted}, User.objects.all()
+            )
+            for member in result.added + result.updated:
+                invalidate_membership_on_commit(member.user_id, project.pk)
+            if result.added or result.updated:
+                bump_project_stats(project.pk, member_count=len(result.added))
+                bump_project_version_on_commit(project.pk)
+                log_activity(
+                    project=project,
+                    user=request.user,
+                    action="BULK",
+                    object_type="ProjectMember",
+                    description=f"{request.user.username} updated the member list: "
+                                f"{len(result.added)} added, {len(result.updated)} role change(s), "
+                                f"{len(result.removed)} removed.",
+                )
+
+        members = ProjectMember.objects.filter(project=project).select_related("user")
+        return Response({
+            "added": len(result.added),
+            "updated": len(result.updated),
+            "removed": len(result.removed),
+            "members": ProjectMemberSerializer(members, many=True).data,
+        })
+
 
 # --------------------------------------------------------------------
 # 🧩 Labels
 # All members can view; only OWNER/ADMIN can modify
 # --------------------------------------------------------------------
-class LabelViewSet(viewsets.ModelViewSet):
+class LabelViewSet(ProjectCacheMixin, viewsets.ModelViewSet):
     serializer_class = LabelSerializer
 
     def get_queryset(self):
@@ -194,7 +228,7 @@ class LabelViewSet(viewsets.ModelViewSet):
 # Everyone can read; OWNER/ADMIN can edit all;
 # Members can manage their own; Viewers are read-only.
 # --------------------------------------------------------------------
-class TaskViewSet(viewsets.ModelViewSet):
+class TaskViewSet(ProjectCacheMixin, viewsets.ModelViewSet):
     serializer_class = TaskSerializer
     permission_classes = [
         permissions.IsAuthenticated,
@@ -202,11 +236,18 @@ class TaskViewSet(viewsets.ModelViewSet):
         IsNotViewer,
         IsTaskAssigneeOrAdmin,
     ]
-    filter_backends = [filters.SearchFilter, filters.OrderingFilter]
-    search_fields = ["title", "description"]
+    # ?search= matches title, description and comments through the full-text index
+    filter_backends = [TaskSearchFilter]
+    # ?ordering= is applied by the keyset paginator, with id as tie-breaker
+    pagination_class = KeysetPagination
+    cursor_ordering = ("-created_at", "-id")
     ordering_fields = ["priority", "due_date", "created_at"]
 
     def get_queryset(self):
+        return self.apply_query_plan(self.get_filtered_queryset())
+
+    def get_filtered_queryset(self):
+        """Live tasks of the project narrowed by the list filters (shared with export)."""
         project_id = self.kwargs.get("project_pk")
         qs = Task.objects.filter(project_id=project_id, deleted_at__isnull=True)
 
@@ -214,14 +255,153 @@ class TaskViewSet(viewsets.ModelViewSet):
         params = self.request.query_params
         if "status" in params:
             qs = qs.filter(status=params["status"])
+        # EXISTS instead of joins, so rows never multiply and need no DISTINCT
         if "assignee" in params:
-            qs = qs.filter(assignees__user__id=params["assignee"])
+            qs = qs.filter(Exists(TaskAssignee.objects.filter(
+                task=OuterRef("pk"), user_id=params["assignee"]
+            )))
         if "label" in params:
-            qs = qs.filter(task_labels__label__id=params["label"])
+            qs = qs.filter(Exists(TaskLabel.objects.filter(
+                task=OuterRef("pk"), label_id=params["label"]
+            )))
         if "due_before" in params:
             qs = qs.filter(due_date__lte=params["due_before"])
+        return qs
+
+    def apply_query_plan(self, queryset):
+        """Load exactly the columns and relations the serializer will render."""
+        return self.get_serializer().shape_queryset(queryset)
+
+    @action(detail=False, methods=["get"], url_path="search")
+    def search(self, request, project_pk=None):
+        """Best matches for ?q=, ranked, with <mark>-highlighted fragments."""
+        def build(request):
+            query = request.query_params.get("q", "")
+            try:
+                limit = int(request.query_params.get("limit", 20))
+            except ValueError:
+                limit = 20
+            limit = max(1, min(limit, search_setting("MAX_RESULTS")))
+
+            hits = search_tasks(project_pk, query, limit)
+            tasks = self.get_queryset().in_bulk([task_id for task_id, _, _ in hits])
+            results = []
+            for task_id, rank, highlights in hits:
+                if task_id not in tasks:
+                    continue  # filtered out by ?status= etc.
+                data = self.get_serializer(tasks[task_id]).data
+                data["search_rank"] = rank
+                data["highlights"] = highlights
+                results.append(data)
+            return Response({"query": query, "results": results})
+
+        return self.cached_response(request, build)
+
+    @action(detail=False, methods=["get"], url_path=r"export/(?P<kind>csv|ndjson)")
+    def export(self, request, project_pk=None, kind=None):
+        """
+        Every task matching the list filters (?status=, ?assignee=, ?label=,
+        ?due_before=, ?search=) as a CSV or NDJSON download, streamed;
+        ?gzip=1 compresses it on the fly.
+        """
+        queryset = self.filter_queryset(self.get_filtered_queryset())
+        return export_response(
+            request, task_rows(queryset), TASK_COLUMNS, kind, f"tasks-{project_pk}", wants_gzip(request)
+        )
 
-        return qs.distinct()
+    @action(
+        detail=False,
+        methods=["post"],
+        url_path=r"import/(?P<kind>csv|ndjson)",
+        permission_classes=[permissions.IsAuthenticated, IsOwnerOrAdmin],
+    )
+    def import_tasks(self, request, project_pk=None, kind=None):
+        """
+        Create tasks (with subtasks, labels and assignees) from a CSV or
+        NDJSON upload, sent as multipart "file" or as the raw body. The
+        input is parsed while it is read and written in chunks; ?gzip=1
+        for compressed input, ?dry_run=1 to only validate, ?progress=1 to
+        stream NDJSON progress lines ending with the summary.
+        """
+        project = get_object_or_404(Project, pk=project_pk)
+        if request.content_type.startswith("multipart/"):
+            if "file" not in request.FILES:
+                return Response({"file": ["No file was submitted."]}, status=status.HTTP_400_BAD_REQUEST)
+            stream = request.FILES["file"]
+        else:
+            stream = request._request  # the body, unread, as a file
+        dry_run = query_flag(request, "dry_run")
+        importer = TaskImporter(project, request.user, dry_run=dry_run)
+        records = open_records(stream, kind, compressed=wants_gzip(request))
+
+        if query_flag(request, "progress"):
+            def lines():
+                for summary in importer.iter_run(records):
+                    progress = {key: summary[key] for key in ("rows", "created", "invalid")}
+                    yield json.dumps({"type": "progress", **progress}) + "\n"
+                yield json.dumps({"type": "summary", **importer.summary}) + "\n"
+
+            return StreamingHttpResponse(streaming_body(request, lines()), content_type="application/x-ndjson")
+
+        summary = importer.run(records)
+        if summary["aborted"] and not summary["created"]:
+            code = status.HTTP_400_BAD_REQUEST
+        else:
+            code = status.HTTP_200_OK if dry_run else status.HTTP_201_CREATED
+        return Response(summary, status=code)
+
+    @action(detail=False, methods=["get"], url_path="changes")
+    def changes(self, request, project_pk=None):
+        """
+        Tasks created, updated or deleted since ?since=<cursor> (everything
+        on a first sync). Keep the returned cursor for the next call and
+        repeat while has_more is true; results are upserts, deleted are ids.
+        """
+        def build(request):
+            try:
+                limit = int(request.query_params.get("limit", sync_setting("PAGE_SIZE")))
+            except ValueError:
+                limit = sync_setting("PAGE_SIZE")
+            limit = max(1, min(limit, sync_setting("MAX_PAGE_SIZE")))
+
+            rows, cursor, has_more = task_changes(
+                project_pk, request.query_params.get("since"), limit
+            )
+            live = [task_id for task_id, _, deleted_at in rows if deleted_at is None]
+            tasks = self.apply_query_plan(Task.objects.filter(pk__in=live)).in_bulk() if live else {}
+            return Response({
+                "cursor": cursor,
+                "has_more": has_more,
+                "results": [self.get_serializer(tasks[task_id]).data for task_id in live if task_id in tasks],
+                "deleted": [
+                    {"id": str(task_id), "deleted_at": deleted_at}
+                    for task_id, _, deleted_at in rows if deleted_at is not None
+                ],
+            })
+
+        return self.cached_response(request, build)
+
+    @action(detail=False, methods=["post"], url_path="bulk")
+    def bulk(self, request, project_pk=None):
+        """
+        Create/update/delete many tasks in one request:
+        {"operations": [{"op": "update", "id": ..., "data": {...}}, ...], "atomic": false}
+        Permissions are checked once for the whole batch.
+        """
+        payload = BulkTaskSerializer(data=request.data)
+        payload.is_valid(raise_exception=True)
+        project = get_object_or_404(Project, id=project_pk)
+        results, applied = apply_bulk_operations(
+            project,
+            request.user,
+            get_project_role(request, project_pk),
+            payload.validated_data["operations"],
+            atomic=payload.validated_data["atomic"],
+        )
+        return Response(
+            {"applied": applied, "results": results},
+            status=status.HTTP_200_OK if applied else status.HTTP_400_BAD_REQUEST,
+        )
 
     def perform_create(self, serializer):
         project = get_object_or_404(Project, id=self.kwargs["project_pk"])
@@ -236,9 +416,8 @@ class TaskViewSet(viewsets.ModelViewSet):
         return super().update(request, *args, **kwargs)
 
     def perform_destroy(self, instance):
-        if hasattr(instance, "deleted_at"):
-            instance.deleted_at = timezone.now()
-            instance.save()
+        if hasattr(instance, "soft_delete"):
+            instance.soft_delete()
         else:
             instance.delete()
 
@@ -254,23 +433,24 @@ class SubtaskViewSet(viewsets.ModelViewSet):
     permission_classes = [permissions.IsAuthenticated, IsProjectMember]
 
     def get_queryset(self):
-        return Subtask.objects.filter(task_id=self.kwargs["task_pk"])
+        return Subtask.objects.filter(
+            task_id=self.kwargs["task_pk"], task__project_id=self.kwargs["project_pk"]
+        )
 
     def perform_create(self, serializer):
         serializer.save(task_id=self.kwargs["task_pk"])
 
     def update(self, request, *args, **kwargs):
         # Members can only toggle is_done, admins/owners full update
-        subtask = self.get_object()
-        member = ProjectMember.objects.filter(project=subtask.task.project, user=request.user).first()
+        role = get_project_role(request, self.kwargs["project_pk"])
 
-        if not member:
+        if not role:
             return Response({"detail": "Not a member."}, status=403)
 
-        if member.role in ["OWNER", "ADMIN"]:
+        if role in ["OWNER", "ADMIN"]:
             return super().update(request, *args, **kwargs)
 
-        if member.role == "MEMBER":
+        if role == "MEMBER":
             allowed = set(request.data.keys())
             if not allowed.issubset({"is_done"}):
                 return Response({"detail": "You may only toggle completion status."}, status=403)
@@ -286,9 +466,11 @@ class SubtaskViewSet(viewsets.ModelViewSet):
 class CommentViewSet(viewsets.ModelViewSet):
     serializer_class = CommentSerializer
     permission_classes = [permissions.IsAuthenticated, IsProjectMember, IsNotViewer]
+    pagination_class = KeysetPagination
+    cursor_ordering = ("created_at", "id")
 
     def get_queryset(self):
-        return Comment.objects.filter(task_id=self.kwargs["task_pk"])
+        return Comment.objects.filter(task_id=self.kwargs["task_pk"]).select_related("author")
 
     def perform_create(self, serializer):
         serializer.save(task_id=self.kwargs["task_pk"], author=self.request.user)
@@ -303,108 +485,163 @@ class AttachmentViewSet(viewsets.ModelViewSet):
     permission_classes = [permissions.IsAuthenticated, IsProjectMember, IsNotViewer]
 
     def get_queryset(self):
-        return Attachment.objects.filter(task_id=self.kwargs["task_pk"])
+        return Attachment.objects.filter(
+            task_id=self.kwargs["task_pk"], task__project_id=self.kwargs["project_pk"]
+        )
 
-    def perform_create(self, serializer):
-        file_obj = self.request.FILES.get("file")
-        serializer.save(
+    @action(detail=True, methods=["get"], url_path="download", content_negotiation_class=DownloadNegotiation)
+    def download(self, request, project_pk=None, task_pk=None, pk=None):
+        """
+        The file itself, for project members only: Range requests, ETag
+        revalidation, and (with ATTACHMENT_DOWNLOADS["MODE"]) hand-off to
+        the front proxy via X-Accel-Redirect / X-Sendfile. ?variant=<size>
+        sends a thumbnail instead (the original until it is ready).
+        """
+        variant = request.query_params.get("variant")
+        if variant is not None and variant not in thumbnail_setting("SIZES"):
+            raise serializers.ValidationError({"variant": "Unknown thumbnail size."})
+        return serve_attachment(request, self.get_object(), variant)
+
+    def create(self, request, *args, **kwargs):
+        """Single-request upload (multipart "file"); identical bytes are stored once."""
+        file_obj = request.FILES.get("file")
+        if file_obj is None:
+            return Response({"file": ["No file was submitted."]}, status=status.HTTP_400_BAD_REQUEST)
+        task = get_object_or_404(Task, pk=self.kwargs["task_pk"], project_id=self.kwargs["project_pk"])
+        attachment = attach_uploaded_file(task.pk, request.user, file_obj)
+        return Response(self.get_serializer(attachment).data, status=status.HTTP_201_CREATED)
+
+
+# --------------------------------------------------------------------
+# 🧩 Resumable attachment uploads
+# POST declares the file (filename, size, optional sha256); each PATCH
+# appends the raw body at the Upload-Offset header; HEAD/GET tell where
+# to resume after a broken connection. The last chunk (or a declared
+# sha256 already stored in the project) answers 201 with the attachment.
+# --------------------------------------------------------------------
+class AttachmentUploadViewSet(viewsets.GenericViewSet):
+    serializer_class = UploadSessionSerializer
+    permission_classes = [permissions.IsAuthenticated, IsProjectMember, IsNotViewer]
+
+    def get_queryset(self):
+        # Sessions are private to whoever started them
+        return UploadSession.objects.filter(
             task_id=self.kwargs["task_pk"],
-            uploader=self.request.user,
-            filename=file_obj.name if file_obj else "",
-            size=file_obj.size if file_obj else 0,
+            task__project_id=self.kwargs["project_pk"],
+            uploader_id=self.request.user.id,
         )
 
+    def session_response(self, session, code=status.HTTP_200_OK):
+        data = self.get_serializer(session).data
+        data["chunk_size"] = upload_setting("MAX_CHUNK_SIZE")
+        headers = {"Upload-Offset": str(session.received), "Upload-Length": str(session.size)}
+        return Response(data, status=code, headers=headers)
+
+    def attachment_response(self, attachment):
+        data = AttachmentSerializer(attachment, context=self.get_serializer_context()).data
+        return Response(data, status=status.HTTP_201_CREATED)
+
+    def create(self, request, project_pk=None, task_pk=None):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        task = get_object_or_404(Task, pk=task_pk, project_id=project_pk)
+        session, attachment = start_upload(task, request.user, **serializer.validated_data)
+        if attachment is not None:
+            return self.attachment_response(attachment)
+        return self.session_response(session, status.HTTP_201_CREATED)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.session_response(self.get_object())
+
+    def partial_update(self, request, *args, **kwargs):
+        session = self.get_object()
+        try:
+            offset = int(request.headers["Upload-Offset"])
+            length = int(request.META.get("CONTENT_LENGTH") or 0)
+        except (KeyError, ValueError):
+            return Response(
+                {"detail": "Upload-Offset and Content-Length headers are required."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        # The raw body, read as it arrives; request.data would buffer it whole
+        result = append_chunk(session, offset, request._request, length)
+        if isinstance(result, Attachment):
+            return self.attachment_response(result)
+        return Response(status=status.HTTP_204_NO_CONTENT, headers={"Upload-Offset": str(result)})
+
+    def destroy(self, request, *args, **kwargs):
+        abort_upload(self.get_object())
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
 
 # projects/views.py
 
 @api_view(["GET"])
-@permission_classes([IsAuthenticated])
+@permission_classes([IsAuthenticated, IsProjectMember])
 def project_report(request, pk):
-    """Generate a simple text-style project summary PDF that matches dashboard."""
-    try:
-        project = Project.objects.get(pk=pk)
-    except Project.DoesNotExist:
-        return Response({"error": "Project not found"}, status=404)
-
-    buffer = BytesIO()
-    p = canvas.Canvas(buffer, pagesize=A4)
-
-    # --- Header ---
-    p.setFont("Helvetica-Bold", 18)
-    p.drawString(200, 800, "■ Project Report")
-
-    p.setFont("Helvetica-Bold", 14)
-    p.drawString(60, 770, f"Project: {project.name}")
-    p.setFont("Helvetica", 12)
-    p.drawString(60, 750, f"Description: {project.description or '-'}")
-    p.drawString(60, 730, f"Created at: {project.created_at.strftime('%Y-%m-%d')}")
-
-    # --- Dashboard Stats ---
-    total_tasks = Task.objects.filter(project=project, deleted_at__isnull=True).count()
-    completed_tasks = Task.objects.filter(project=project, status="DONE").count()
-    total_subtasks = Subtask.objects.filter(task__project=project).count()
-    completed_subtasks = Subtask.objects.filter(task__project=project, is_done=True).count()
-    members_count = ProjectMember.objects.filter(project=project).count()
-    labels_count = Label.objects.filter(project=project).count()
-    comments_count = Comment.objects.filter(task__project=project).count()
-    attachments_count = Attachment.objects.filter(task__project=project).count()
-    today = timezone.now().date()
-    overdue_tasks = Task.objects.filter(
-        project=project,
-        due_date__lt=today,
-        status__in=["TODO", "IN_PROGRESS", "BLOCKED"],
-        deleted_at__isnull=True,
-    ).count()
-
-    # Completion %
-    task_completion = (completed_tasks / total_tasks * 100) if total_tasks else 0
-    subtask_completion = (completed_subtasks / total_subtasks * 100) if total_subtasks else 0
-
-    y = 700
-    p.setFont("Helvetica", 12)
-    stats = [
-        ("Total Tasks", total_tasks),
-        ("Completed Tasks", completed_tasks),
-        ("Subtasks", total_subtasks),
-        ("Completed Subtasks", completed_subtasks),
-        ("Task Completion", f"{task_completion:.0f}%"),
-        ("Subtask Completion", f"{subtask_completion:.0f}%"),
-        ("Members", members_count),
-        ("Labels", labels_count),
-        ("Comments", comments_count),
-        ("Attachments", attachments_count),
-        ("Overdue Tasks", overdue_tasks),
-    ]
-    for name, val in stats:
-        p.drawString(60, y, f"{name}: {val}")
-        y -= 20
-
-    # --- Activity Logs ---
-    y -= 20
-    p.setFont("Helvetica-Bold", 14)
-    p.drawString(60, y, "Recent Activity:")
-    p.setFont("Helvetica", 12)
-    y -= 20
-
-    logs = ActivityLog.objects.filter(project=project).order_by("-timestamp")[:10]
-    if not logs:
-        p.drawString(80, y, "No recent activity recorded.")
-    else:
-        for log in logs:
-            username = log.user.username if log.user else "System"
-            obj = log.object_type or "Object"
-            action = log.action or ""
-            desc = log.description or ""
-            time = log.timestamp.strftime("%Y-%m-%d %H:%M")
-            p.drawString(80, y, f"- [{time}] {username} {action} {obj}: {desc[:60]}")
-            y -= 20
-            if y < 60:
-                p.showPage()
-                y = 780
-
-    p.showPage()
-    p.save()
-    buffer.seek(0)
-
-    filename = f"{project.name.replace(' ', '_')}_Report.pdf"
-    return FileResponse(buffer, as_attachment=True, filename=filename)
\ No newline at end of file
+    """
+    Project summary + full task listing as PDF, rendered once per project
+    watermark and served from disk; a cold render runs on the report pool
+    and answers 202 with a job to poll if it takes longer than
+    WAIT_SECONDS. With STORE off, every request renders its own copy.
+    """
+    if not report_setting("STORE"):
+        return report_file_response(pk, render_report_file(pk))
+
+    for _ in range(2):
+        path, job = request_report(pk)
+        if job is not None:
+            state = wait_for_job(job, report_setting("WAIT_SECONDS"))
+            if not path.exists():
+                return report_job_response(request, pk, state)
+        try:
+            return report_file_response(pk, open(path, "rb"))
+        except FileNotFoundError:
+            continue  # replaced by a newer version between the check and the open
+    return report_job_response(request, pk, None)
+
+
+def report_file_response(pk, file):
+    name = Project.objects.filter(pk=pk).values_list("name", flat=True).first() or "Project"
+    filename = f"{name.replace(' ', '_')}_Report.pdf"
+    return FileResponse(file, as_attachment=True, filename=filename)
+
+
+@api_view(["GET"])
+@permission_classes([IsAuthenticated, IsProjectMember])
+def project_report_job(request, pk, job):
+    """Status of a report render started by project_report."""
+    state = find_report_job(pk, job)
+    if not state or state["project"] != str(pk):
+        return Response({"detail": "Not found."}, status=404)
+    return report_job_response(request, pk, state)
+
+
+def report_job_response(request, pk, state):
+    if state is None:
+        # The job's state expired or was evicted before its file appeared
+        return Response(
+            {"detail": "The report is not ready yet, retry shortly."}, status=503, headers={"Retry-After": "2"}
+        )
+    data = dict(state)
+    data["status_url"] = request.build_absolute_uri(reverse("project-report-job", args=[pk, state["id"]]))
+    if state["status"] == "done":
+        data["download_url"] = request.build_absolute_uri(reverse("project-report", args=[pk]))
+        return Response(data)
+    if state["status"] == "failed":
+        return Response(data, status=500)
+    return Response(data, status=202, headers={"Location": data["status_url"]})
+
+
+@api_view(["GET"])
+@permission_classes([IsAdminUser])
+def response_cache_stats(request):
+    """Hit/miss counters of the project response cache (staff only)."""
+    return Response(cache_stats())
+
+
+@api_view(["GET"])
+@permission_classes([IsAdminUser])
+def membership_cache_stats(request):
+    """Hit/miss/eviction counters of this worker's membership cache (staff only)."""
+    return Response(membership_cache.stats())
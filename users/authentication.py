@@ -0,0 +1,141 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.utils.functional import SimpleLazyObject, empty
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.serializers import (
+    TokenObtainPairSerializer as BaseTokenObtainPairSerializer,
+    TokenRefreshSerializer as BaseTokenRefreshSerializer,
+)
+from rest_framework_simplejwt.settings import api_settings
+
+User = get_user_model()
+
+
+# --------------------------------------------------------------------
+# 🔹 Settings
+# --------------------------------------------------------------------
+DEFAULTS = {
+    "STATELESS": True,   # request.user from token claims; False loads the AppUser every request
+    "TTL": 60,           # seconds a (token version, is_active) pair is cached
+}
+
+USERNAME_CLAIM = "username"
+VERSION_CLAIM = "ver"
+
+
+def token_auth_setting(name):
+    return getattr(settings, "TOKEN_AUTH", {}).get(name, DEFAULTS[name])
+
+
+# --------------------------------------------------------------------
+# 🔹 Revocation state: (token_version, is_active) per user
+#
+# A password change (AppUser.change_password) or a deactivation bumps
+# AppUser.token_version (users/models.py) and drops the cached pair, so
+# older tokens fail from the next request on this cache; workers with a
+# per-process cache (LocMem) see it within TTL.
+# --------------------------------------------------------------------
+def _state_key(user_id):
+    return f"token-state:{user_id}"
+
+
+def token_state(user_id):
+    key = _state_key(user_id)
+    state = cache.get(key)
+    if state is None:
+        row = User.objects.filter(pk=user_id).values_list("token_version", "is_active").first()
+        state = tuple(row) if row else (None, False)  # deleted users count as inactive
+        cache.set(key, state, token_auth_setting("TTL"))
+    return state
+
+
+def forget_token_state(user_id):
+    cache.delete(_state_key(user_id))
+    transaction.on_commit(lambda: cache.delete(_state_key(user_id)))
+
+
+def check_token(token):
+    """
+    Reject a (validated) token of an inactive user or from before a
+    revocation; otherwise the user's pk, as the model's type (simplejwt
+    stores it as a string, which would miss pk-keyed cache entries).
+    """
+    try:
+        user_id = User._meta.pk.to_python(token[api_settings.USER_ID_CLAIM])
+    except (KeyError, ValidationError) as exc:
+        raise InvalidToken("Token contained no recognizable user identification") from exc
+    version, is_active = token_state(user_id)
+    if not is_active:
+        raise AuthenticationFailed("User is inactive", code="user_inactive")
+    # Tokens issued before versions existed carry none; they match version 0
+    if token.get(VERSION_CLAIM, 0) != version:
+        raise AuthenticationFailed("Token has been revoked.", code="token_revoked")
+    return user_id
+
+
+# --------------------------------------------------------------------
+# 🔹 Lightweight request.user
+# --------------------------------------------------------------------
+class ClaimsUser(SimpleLazyObject):
+    """
+    The signed-in user as far as the token tells: id, username (as of
+    sign-in) and the authentication flags answer without a query. Any
+    other attribute, an isinstance() check (assigning it to a foreign
+    key) or a comparison loads the AppUser row once.
+    """
+
+    def __init__(self, user_id, username=None):
+        super().__init__(lambda: User.objects.get(pk=user_id))
+        self.__dict__["_claims"] = {
+            "id": user_id,
+            "pk": user_id,
+            "username": username,
+            "is_active": True,
+            "is_authenticated": True,
+            "is_anonymous": False,
+        }
+
+    def __bool__(self):
+        return True  # `request.user and request.user.is_authenticated` (IsAuthenticated)
+
+    def __getattr__(self, name):
+        if self._wrapped is empty:
+            value = self.__dict__["_claims"].get(name)
+            if value is not None:
+                return value
+            self._setup()
+        return getattr(self._wrapped, name)
+
+
+class StatelessJWTAuthentication(JWTAuthentication):
+    """JWTAuthentication without the per-request AppUser query (see ClaimsUser)."""
+
+    def get_user(self, validated_token):
+        user_id = check_token(validated_token)
+        if not token_auth_setting("STATELESS"):
+            return super().get_user(validated_token)
+        return ClaimsUser(user_id, validated_token.get(USERNAME_CLAIM))
+
+
+# --------------------------------------------------------------------
+# 🔹 Token endpoints (SIMPLE_JWT TOKEN_OBTAIN/REFRESH_SERIALIZER)
+# --------------------------------------------------------------------
+class TokenObtainPairSerializer(BaseTokenObtainPairSerializer):
+    @classmethod
+    def get_token(cls, user):
+        token = super().get_token(user)
+        token[USERNAME_CLAIM] = user.username
+        token[VERSION_CLAIM] = user.token_version
+        return token
+
+
+class TokenRefreshSerializer(BaseTokenRefreshSerializer):
+    """A revoked refresh token gets no new access token."""
+
+    def validate(self, attrs):
+        check_token(self.token_class(attrs["refresh"]))
+        return super().validate(attrs)
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.7 on 2026-10-18 11:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0002_user_search_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='appuser',
+            name='token_version',
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
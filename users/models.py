@@ -1,8 +1,54 @@
 from django.contrib.auth.models import AbstractUser
 from django.db import models
+from django.db.models.functions import Lower
 
 class AppUser(AbstractUser):
     phone = models.CharField(max_length=20, blank=True, null=True)
+    # Carried in every JWT (users/authentication.py); bumping it revokes them all
+    token_version = models.PositiveIntegerField(default=0)
+
+    class Meta(AbstractUser.Meta):
+        # Case-insensitive prefix search for member autocomplete (users/search.py)
+        indexes = [
+            models.Index(Lower("username"), name="users_username_lower_idx"),
+            models.Index(Lower("email"), name="users_email_lower_idx"),
+            models.Index(fields=["phone"], name="users_phone_idx"),
+        ]
 
     def __str__(self):
-        return self.username
\ No newline at end of file
+        return self.username
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_is_active = instance.__dict__.get("is_active")
+        instance._loaded_search_values = instance.search_values()
+        return instance
+
+    def search_values(self):
+        """Loaded username, email and phone: what the prefix index (users/search.py) holds."""
+        return tuple(self.__dict__.get(name) for name in ("username", "email", "phone"))
+
+    def change_password(self, raw_password):
+        """
+        A new password from the user or an admin; revokes their tokens once
+        saved. set_password alone does not: Django also calls it to rehash
+        on login (check_password), which must not sign anyone out.
+        """
+        self.set_password(raw_password)
+        self.revoke_tokens()
+
+    def revoke_tokens(self):
+        """Invalidate every token issued so far, once saved."""
+        self.token_version += 1
+        self._tokens_revoked = True
+
+    def save(self, *args, **kwargs):
+        if not self.is_active and getattr(self, "_loaded_is_active", False):
+            self.revoke_tokens()  # deactivated
+        if getattr(self, "_tokens_revoked", False) and kwargs.get("update_fields") is not None:
+            kwargs["update_fields"] = {*kwargs["update_fields"], "token_version"}
+        super().save(*args, **kwargs)
+        self._tokens_revoked = False
+        self._loaded_is_active = self.is_active
+        self._loaded_search_values = self.search_values()
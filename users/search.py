@@ -0,0 +1,183 @@
+import threading
+import time
+from bisect import bisect_left, insort
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db.models import F, Q
+from django.db.models.functions import Lower
+from django.db.models.lookups import GreaterThanOrEqual, LessThan, StartsWith
+
+
+# --------------------------------------------------------------------
+# 🔹 Settings
+# --------------------------------------------------------------------
+DEFAULTS = {
+    "MIN_QUERY_LENGTH": 2,    # shorter queries return nothing instead of scanning
+    "MAX_RESULTS": 20,        # autocomplete never needs more than a screenful
+    "PREFIX_INDEX": False,    # serve lookups from the in-memory index below
+    "REFRESH_SECONDS": 300,   # full rebuild interval of the in-memory index
+}
+
+SEARCH_FIELDS = ("username", "email", "phone")
+GENERATION_KEY = "user-prefix-index:generation"
+MAX_CHAR = "\U0010ffff"
+
+
+def search_setting(name):
+    return getattr(settings, "USER_SEARCH", {}).get(name, DEFAULTS[name])
+
+
+def normalize(query):
+    return (query or "").strip().lower()
+
+
+# --------------------------------------------------------------------
+# 🔹 Database prefix search
+#
+# Each field is matched as `lower(field) >= q AND lower(field) < q + max`,
+# a range the lower() expression indexes on AppUser can answer on both
+# SQLite and PostgreSQL (a plain LIKE 'q%' can't use them under most
+# collations); the startswith keeps the match exact.
+# --------------------------------------------------------------------
+def prefix_condition(field, prefix):
+    expression = Lower(field) if field != "phone" else F(field)
+    return Q(
+        GreaterThanOrEqual(expression, prefix),
+        LessThan(expression, prefix + MAX_CHAR),
+        StartsWith(expression, prefix),
+    )
+
+
+def search_queryset(queryset, query):
+    condition = Q()
+    for field in SEARCH_FIELDS:
+        condition |= prefix_condition(field, query)
+    return queryset.filter(condition).order_by("username")
+
+
+# --------------------------------------------------------------------
+# 🔹 In-memory prefix index
+# --------------------------------------------------------------------
+class UserPrefixIndex:
+    """
+    Sorted list of (key, user id) for every searchable field value, so a
+    prefix lookup is a bisect plus a short scan. Saves in this process
+    update it in place; saves elsewhere bump a generation counter in the
+    shared cache and the next lookup here rebuilds.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._keys = []
+        self._users = {}
+        self._generation = None
+        self._built_at = None
+
+    # --- building ---
+    @staticmethod
+    def entry_keys(user):
+        return {(normalize(user[field]), user["id"]) for field in SEARCH_FIELDS if user.get(field)}
+
+    def rebuild(self):
+        User = get_user_model()
+        users = {row["id"]: row for row in User.objects.values("id", *SEARCH_FIELDS).iterator()}
+        keys = sorted(key for user in users.values() for key in self.entry_keys(user))
+        with self._lock:
+            self._users, self._keys = users, keys
+            self._generation = cache.get(GENERATION_KEY)
+            self._built_at = time.monotonic()
+
+    def ensure_fresh(self):
+        stale = (
+            self._built_at is None
+            or self._generation != cache.get(GENERATION_KEY)
+            or time.monotonic() - self._built_at > search_setting("REFRESH_SECONDS")
+        )
+        if stale:
+            self.rebuild()
+
+    # --- incremental updates (signals) ---
+    def _remove(self, user_id):
+        old = self._users.pop(user_id, None)
+        if old is not None:
+            for key in self.entry_keys(old):
+                index = bisect_left(self._keys, key)
+                if index < len(self._keys) and self._keys[index] == key:
+                    del self._keys[index]
+
+    def update_user(self, user):
+        if not search_setting("PREFIX_INDEX"):
+            return
+        if getattr(user, "_loaded_search_values", None) == user.search_values():
+            return  # last_login, password, flags: nothing searchable changed
+        row = {"id": user.pk, **{field: getattr(user, field) for field in SEARCH_FIELDS}}
+        with self._lock:
+            if self._built_at is not None:
+                self._remove(user.pk)
+                self._users[user.pk] = row
+                for key in self.entry_keys(row):
+                    insort(self._keys, key)
+        self._publish()
+
+    def remove_user(self, user_id):
+        if not search_setting("PREFIX_INDEX"):
+            return
+        with self._lock:
+            if self._built_at is not None:
+                self._remove(user_id)
+        self._publish()
+
+    def _publish(self):
+        try:
+            generation = cache.incr(GENERATION_KEY)
+        except ValueError:
+            cache.add(GENERATION_KEY, 1, None)
+            generation = cache.get(GENERATION_KEY)
+        # Our own copy is already current; only other processes rebuild.
+        with self._lock:
+            if self._built_at is not None:
+                self._generation = generation
+
+    def clear(self):
+        with self._lock:
+            self._keys, self._users = [], {}
+            self._generation = self._built_at = None
+
+    # --- lookup ---
+    def search(self, prefix, limit):
+        self.ensure_fresh()
+        with self._lock:
+            keys, users = self._keys, self._users
+            matches = set()
+            index = bisect_left(keys, (prefix,))
+            while index < len(keys) and keys[index][0].startswith(prefix):
+                matches.add(keys[index][1])
+                index += 1
+            rows = [users[user_id] for user_id in matches if user_id in users]
+        rows.sort(key=lambda row: row["username"])
+        return rows[:limit]
+
+
+prefix_index = UserPrefixIndex()
+
+
+# --------------------------------------------------------------------
+# 🔹 Public API
+# --------------------------------------------------------------------
+def search_users(query):
+    """
+    Users whose username, email or phone starts with `query`
+    (case-insensitive), ordered by username and capped at MAX_RESULTS.
+    Returns dicts from the in-memory index when it is enabled, otherwise
+    a sliced queryset.
+    """
+    prefix = normalize(query)
+    if len(prefix) < search_setting("MIN_QUERY_LENGTH"):
+        return []
+    limit = search_setting("MAX_RESULTS")
+    if search_setting("PREFIX_INDEX"):
+        return prefix_index.search(prefix, limit)
+    queryset = get_user_model().objects.only("id", *SEARCH_FIELDS)
+    return search_queryset(queryset, prefix)[:limit]
@@ -0,0 +1,23 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from django.conf import settings
+
+from .authentication import forget_token_state
+from .search import prefix_index
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+def refresh_prefix_index(sender, instance, **kwargs):
+    prefix_index.update_user(instance)
+
+
+@receiver(post_delete, sender=settings.AUTH_USER_MODEL)
+def drop_from_prefix_index(sender, instance, **kwargs):
+    prefix_index.remove_user(instance.pk)
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+@receiver(post_delete, sender=settings.AUTH_USER_MODEL)
+def drop_token_state(sender, instance, **kwargs):
+    # Revocations (token_version) and deactivations apply from the next request
+    forget_token_state(instance.pk)
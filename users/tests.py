@@ -1,3 +1,151 @@
-from django.test import TestCase
+from django.contrib.auth import authenticate, get_user_model
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import update_last_login
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient, APIRequestFactory
 
-# Create your tests here.
+from .authentication import StatelessJWTAuthentication
+from .search import GENERATION_KEY, prefix_index
+
+User = get_user_model()
+
+
+class UserSearchTests(TestCase):
+    def setUp(self):
+        self.alice = User.objects.create_user(username="Alice", email="alice@example.com", password="pw")
+        self.bob = User.objects.create_user(username="bob", email="ALbert@corp.io", password="pw", phone="5551234")
+        self.carol = User.objects.create_user(username="carol", email="c@example.com", password="pw")
+        self.client = APIClient()
+        self.client.force_authenticate(self.carol)
+        prefix_index.clear()
+
+    def search(self, q):
+        response = self.client.get("/api/v1/auth/users/", {"q": q})
+        self.assertEqual(response.status_code, 200)
+        return [user["username"] for user in response.data]
+
+    def test_prefix_match_on_username_email_and_phone(self):
+        self.assertEqual(self.search("al"), ["Alice", "bob"])
+        self.assertEqual(self.search("555"), ["bob"])
+        self.assertEqual(self.search("lice"), [])
+
+    def test_minimum_length_and_cap(self):
+        with self.assertNumQueries(0):
+            self.assertEqual(self.search("a"), [])
+        for i in range(5):
+            User.objects.create_user(username=f"zed{i}", password="pw")
+        with override_settings(USER_SEARCH={"MAX_RESULTS": 3}):
+            self.assertEqual(self.search("ze"), ["zed0", "zed1", "zed2"])
+
+    @override_settings(USER_SEARCH={"PREFIX_INDEX": True})
+    def test_in_memory_index_follows_saves(self):
+        self.assertEqual(self.search("al"), ["Alice", "bob"])
+        with self.assertNumQueries(0):
+            self.assertEqual(self.search("ca"), ["carol"])
+
+        self.bob.email = "bob@example.com"
+        self.bob.save()
+        dave = User.objects.create_user(username="alfred", password="pw")
+        self.assertEqual(self.search("al"), ["Alice", "alfred"])
+
+        dave.delete()
+        self.assertEqual(self.search("al"), ["Alice"])
+
+    def test_unrelated_saves_leave_the_index_alone(self):
+        generation = cache.get(GENERATION_KEY)
+        self.bob.email = "bob@example.com"
+        self.bob.save()  # index disabled: no cache traffic at all
+        self.assertEqual(cache.get(GENERATION_KEY), generation)
+
+        with override_settings(USER_SEARCH={"PREFIX_INDEX": True}):
+            user = User.objects.get(pk=self.alice.pk)
+            update_last_login(None, user)
+            user.set_unusable_password()
+            user.save()
+            self.assertEqual(cache.get(GENERATION_KEY), generation)
+            user.phone = "5550000"
+            user.save(update_fields=["phone"])
+            self.assertNotEqual(cache.get(GENERATION_KEY), generation)
+
+    def test_without_query_lists_everyone(self):
+        response = self.client.get("/api/v1/auth/users/")
+        self.assertEqual(response.data["count"], 3)
+
+
+class StatelessJWTTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.user = User.objects.create_user(username="dana", password="pw-1234!")
+        self.client = APIClient()
+        tokens = self.client.post("/api/v1/auth/login/", {"username": "dana", "password": "pw-1234!"}).json()
+        self.access, self.refresh = tokens["access"], tokens["refresh"]
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {self.access}")
+
+    def user_queries(self, path):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(path)
+        self.assertEqual(response.status_code, 200)
+        return [q["sql"] for q in ctx.captured_queries if 'FROM "users_appuser"' in q["sql"]]
+
+    def test_requests_do_not_load_the_user(self):
+        self.user_queries("/api/v1/projects/")  # caches the revocation state
+        self.assertEqual(self.user_queries("/api/v1/projects/"), [])
+
+    def test_model_loads_when_a_view_needs_it(self):
+        response = self.client.post("/api/v1/projects/", {"name": "Mine"}, format="json")
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(self.client.get("/api/v1/auth/me/").data["username"], "dana")
+
+    def test_password_change_revokes_tokens(self):
+        self.user.change_password("new-pw-5678!")
+        self.user.save(update_fields=["password"])
+        self.assertEqual(self.client.get("/api/v1/projects/").status_code, 401)
+        refreshed = self.client.post("/api/v1/auth/refresh/", {"refresh": self.refresh})
+        self.assertEqual(refreshed.status_code, 401)
+
+        tokens = self.client.post("/api/v1/auth/login/", {"username": "dana", "password": "new-pw-5678!"}).json()
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {tokens['access']}")
+        self.assertEqual(self.client.get("/api/v1/projects/").status_code, 200)
+
+    @override_settings(PASSWORD_HASHERS=[
+        "django.contrib.auth.hashers.PBKDF2PasswordHasher",
+        "django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher",
+    ])
+    def test_hash_upgrade_on_login_keeps_tokens(self):
+        User.objects.filter(pk=self.user.pk).update(password=make_password("pw-1234!", hasher="pbkdf2_sha1"))
+        self.client.get("/api/v1/projects/")  # caches the revocation state
+        # ModelBackend (admin, session login) rehashes through set_password + save
+        self.assertIsNotNone(authenticate(username="dana", password="pw-1234!"))
+        self.assertTrue(User.objects.get(pk=self.user.pk).password.startswith("pbkdf2_sha256$"))
+        self.assertEqual(self.client.get("/api/v1/projects/").status_code, 200)
+        self.assertEqual(self.client.post("/api/v1/auth/refresh/", {"refresh": self.refresh}).status_code, 200)
+
+    def test_deactivation_revokes_tokens(self):
+        self.client.get("/api/v1/projects/")
+        user = User.objects.get(pk=self.user.pk)
+        user.is_active = False
+        user.save(update_fields=["is_active"])
+        self.assertEqual(User.objects.get(pk=self.user.pk).token_version, self.user.token_version + 1)
+        self.assertEqual(self.client.get("/api/v1/projects/").status_code, 401)
+
+    def test_claims_user_id_has_the_pk_type(self):
+        request = APIRequestFactory().get("/", HTTP_AUTHORIZATION=f"Bearer {self.access}")
+        user, _ = StatelessJWTAuthentication().authenticate(request)
+        self.assertEqual((user.id, user.pk), (self.user.pk, self.user.pk))
+        self.assertIsInstance(user.id, int)
+
+    def test_refresh_keeps_claims(self):
+        response = self.client.post("/api/v1/auth/refresh/", {"refresh": self.refresh})
+        self.assertEqual(response.status_code, 200)
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {response.json()['access']}")
+        self.assertEqual(self.user_queries("/api/v1/projects/"), [])
+
+    @override_settings(TOKEN_AUTH={"STATELESS": False})
+    def test_stateful_mode_still_checks_revocation(self):
+        self.user.change_password("other-pw-999!")
+        self.user.save()
+        self.assertEqual(self.client.get("/api/v1/projects/").status_code, 401)
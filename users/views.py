@@ -1,16 +1,25 @@
 from rest_framework import generics, permissions
+from rest_framework.response import Response
 from .serializers import UserSerializer
+from .search import search_users
 from django.contrib.auth import get_user_model
 
 User = get_user_model()
 
 class UserListView(generics.ListAPIView):
+    """
+    All users, paginated; with ?q= a capped, unpaginated autocomplete list
+    of users whose username, email or phone starts with q (see users/search.py).
+    """
     serializer_class = UserSerializer
     permission_classes = [permissions.IsAuthenticated]
 
     def get_queryset(self):
-        queryset = User.objects.all().order_by("username")
-        query = self.request.query_params.get("q")
-        if query:
-            queryset = queryset.filter(username__icontains=query)
-        return queryset
\ No newline at end of file
+        return User.objects.all().order_by("username")
+
+    def list(self, request, *args, **kwargs):
+        query = request.query_params.get("q")
+        if query is None:
+            return super().list(request, *args, **kwargs)
+        serializer = self.get_serializer(search_users(query), many=True)
+        return Response(serializer.data)